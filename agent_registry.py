@@ -0,0 +1,98 @@
+"""
+Çok kiracılı (multi-tenant) ajan kaydı.
+
+Tek süreçte binlerce ev tutulurken varsayılan kural tabanı bir kez
+derlenir ve tüm evler arasında değişmez olarak paylaşılır. Bir eve özel
+kural eklendiğinde yalnızca o evin kural tabanı kopyalanır (kopyala-yaz).
+Gemini istemcisi, LLM toplayıcısı ve yerel niyet eşleştiricisi de evler
+arasında ortaktır; ev başına yalnızca gerçekler, kural doğruluk bitleri ve
+cihaz durumları tutulur.
+"""
+
+from typing import Callable, Dict, Iterator, Optional
+
+from app import LogicAgent, default_rule_base
+from events import EventBus
+from gemini_client import GeminiClient
+from llm_batcher import LLMBatcher
+from metrics import AgentMetrics
+from rule_engine import RuleNetwork
+from scheduler import Scheduler
+
+
+class AgentRegistry:
+    """Ev kimliği -> LogicAgent kaydı."""
+
+    def __init__(self, api_key: Optional[str] = None, llm_endpoint: Optional[str] = None,
+                 gemini_client: Optional[GeminiClient] = None,
+                 rule_base: Optional[RuleNetwork] = None,
+                 agent_factory: Optional[Callable[[str], LogicAgent]] = None,
+                 event_bus: Optional[EventBus] = None,
+                 scheduler: Optional[Scheduler] = None,
+                 metrics: Optional[AgentMetrics] = None,
+                 llm_batcher: Optional[LLMBatcher] = None):
+        """
+        rule_base verilirse dondurulur ve tüm evler için ortak taban olarak
+        kullanılır; verilmezse varsayılan kural tabanı paylaşılır. Tüm evler
+        olaylarını aynı event_bus'a yayınlar (olayın source alanı ajandır).
+        Zaman gerçekleri tek bir paylaşılan zamanlayıcıdan güncellenir;
+        komutlar onu çalıştırmaz, run_pending (ya da AsyncAgentHub.run_scheduler)
+        çalıştırır.
+        metrics verilirse tüm evlerin ölçümleri aynı kayda toplanır. Evlerin
+        LLM komutları paylaşılan llm_batcher'da toplanıp birleştirilir.
+        """
+        self.api_key = api_key
+        self.gemini = gemini_client or GeminiClient(api_key, llm_endpoint)
+        self.llm_batcher = llm_batcher or LLMBatcher(self.gemini)
+        self.rule_base = (rule_base if rule_base is not None else default_rule_base()).freeze()
+        self.event_bus = event_bus
+        self.scheduler = scheduler if scheduler is not None else Scheduler()
+        self.metrics = metrics
+        self._agent_factory = agent_factory or self._default_agent
+        self._agents: Dict[str, LogicAgent] = {}
+
+    def _default_agent(self, home_id: str) -> LogicAgent:
+        return LogicAgent(api_key=self.api_key, llm_endpoint=self.gemini.endpoint,
+                          gemini_client=self.gemini, rule_base=self.rule_base, event_bus=self.event_bus,
+                          scheduler=self.scheduler, metrics=self.metrics, llm_batcher=self.llm_batcher)
+
+    def get(self, home_id: str) -> LogicAgent:
+        """Ev için ajanı döndür; yoksa oluştur."""
+        agent = self._agents.get(home_id)
+        if agent is None:
+            agent = self._agent_factory(home_id)
+            self._agents[home_id] = agent
+        return agent
+
+    def remove(self, home_id: str):
+        """Evi kayıttan çıkar ve zamanlanmış işlerini iptal et."""
+        agent = self._agents.pop(home_id, None)
+        if agent is not None:
+            agent.close()
+
+    def run_pending(self) -> int:
+        """Paylaşılan zamanlayıcıda zamanı gelmiş işleri (tüm evler için) çalıştır."""
+        return self.scheduler.run_pending()
+
+    def add_home_rule(self, home_id: str, rule: str):
+        """Yalnızca bu eve özel bir kural ekle; ortak taban değişmez."""
+        self.get(home_id).tell_rule(rule)
+
+    def has_custom_rules(self, home_id: str) -> bool:
+        """Ev ortak kural tabanından ayrılmış (kendi kopyasını almış) mı?"""
+        agent = self._agents.get(home_id)
+        return agent is not None and agent._network is not self.rule_base
+
+    def __contains__(self, home_id: str) -> bool:
+        return home_id in self._agents
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._agents)
+
+    def __len__(self) -> int:
+        return len(self._agents)
+
+    def close(self):
+        """Paylaşılan LLM toplayıcısını ve HTTP istemcisini kapat."""
+        self.llm_batcher.close()
+        self.gemini.close()
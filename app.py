@@ -1,7 +1,44 @@
+import heapq
 import json
-import datetime
-import requests  # Added for API requests
-from typing import Dict, List, Set, Tuple, Union, Optional
+import logging
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Set, Tuple, Union, Optional
+
+from gemini_client import DEFAULT_ENDPOINT, GeminiAPIError, GeminiClient
+from compact_state import DEFAULT_DEVICES, DeviceStates
+from devices import ActionTable, DeviceDispatcher, Driver, default_action_table
+from events import (DeviceChanged, EventBus, FactAsserted, FactRetracted, Notice, PatternsUpdated, RuleAdded,
+                    RuleFired, TemperatureChanged, default_event_bus, print_event)
+from intent_matcher import IntentMatch, default_intent_matcher, turkish_casefold
+from llm_batcher import REQUEST_SUFFIX, LLMBatcher, action_catalogue
+from metrics import NO_STAGE, AgentMetrics, StageTimer
+from pattern_learner import PatternLearner
+from scheduler import TIME_BUCKETS, Clock, Job, Scheduler, TimeWindow, next_time_of_day
+from rule_compiler import RuleReport, analyze
+from rule_engine import SYMBOLS, RuleCycleError, RuleNetwork, compile_condition, parse_rule
+
+# Zaman dilimi gerçekleri ve sınırları (gün içi dakika)
+TIME_BUCKET_MASK = SYMBOLS.mask(fact for fact, _, _ in TIME_BUCKETS)
+TIME_BUCKET_STARTS = tuple(start for _, start, _ in TIME_BUCKETS)
+_TIME_BUCKET_WINDOWS = tuple(TimeWindow(fact, start, end) for fact, start, end in TIME_BUCKETS)
+
+
+def _next_bucket_boundary(timestamp: float) -> float:
+    return next_time_of_day(timestamp, TIME_BUCKET_STARTS)
+
+
+def _next_hour(timestamp: float) -> float:
+    return next_time_of_day(timestamp, range(0, 24 * 60, 60))
+
+
+# Kullanıcının bu saatte sık kullandığı cihazlar için eklenen gerçeklerin öneki ("alışkanlık_ışık")
+HABIT_PREFIX = "alışkanlık_"
+
+# Komutta algılanan duygunun gerçeği ("kullanıcı_duygu_üzgün"); yalnızca o komut boyunca doğrudur
+EMOTION_PREFIX = "kullanıcı_duygu_"
+
 
 class LogicAgent:
     """
@@ -10,429 +47,1137 @@ class LogicAgent:
     yürütülebilir eylemlere dönüştürür.
     """
     
-    def __init__(self, api_key: str = None, llm_endpoint: str = None):
-        """LogicAgent'i başlat."""
-        self.facts: Set[str] = set()
-        self.rules: Dict[str, str] = {}
+    # Tek bir değerlendirme geçişinde bir gerçeğin değişebileceği en fazla sayı;
+    # aşılırsa kurallar arasında bir döngü olduğu kabul edilir
+    MAX_FACT_CHANGES = 10
+    
+    # Yerel eşleştiricinin sonucu bu güvenin altındaysa komut LLM'e yönlendirilir
+    LOCAL_CONFIDENCE_THRESHOLD = 0.5
+    
+    # Bir cihazın "alışkanlık_<cihaz>" gerçeği için haftanın bu saatindeki en düşük sönümlü kullanım puanı
+    HABIT_MIN_SCORE = 2.0
+    
+    # Sıcaklık niyetlerinin ısıtıcı sıcaklığına etkisi
+    TEMPERATURE_DELTAS = {
+        "sıcaklık_artır_isteği": 1.0,
+        "sıcaklık_azalt_isteği": -1.0,
+    }
+    
+    # Cihaz kontrolü için temel kurallar
+    BASIC_RULES = (
+        "kişi_üşüyor -> ısıtıcı_aç",
+        "zaman_gece & kişi_evde & ışık_isteği -> ışık_aç",
+        "televizyon_isteği -> televizyon_aç",
+        "kişi_çıkıyor -> kapı_kapat",
+        "zaman_sabah & kişi_evde & perde_isteği -> perde_aç",
+        "ısıtıcı_aç_isteği -> ısıtıcı_aç",
+        "ısıtıcı_kapat_isteği -> ısıtıcı_kapat",
+        "kapı_aç_isteği -> kapı_aç",
+        "kapı_kapat_isteği -> kapı_kapat",
+        "ışık_aç_isteği -> ışık_aç",
+        "ışık_kapat_isteği -> ışık_kapat",
+        "perde_aç_isteği -> perde_aç",
+        "perde_kapat_isteği -> perde_kapat",
+        "televizyon_aç_isteği -> televizyon_aç",
+        "televizyon_kapat_isteği -> televizyon_kapat",
+    )
+    
+    # Bağlam farkındalığı ve konfor için gelişmiş kurallar
+    ADVANCED_RULES = (
+        "zaman_gece & !kişi_evde -> ışık_kapat",
+        "zaman_sabah & !perde_açık & kişi_uyanıyor -> perde_aç",
+        "yüksek_sıcaklık & kişi_evde -> soğutma_öner",
+        "zaman_gece & kişi_uyuma_hazırlığı -> gece_modu",
+        "(zaman_sabah | zaman_akşam) & kişi_evde & !televizyon_açık & eğlence_isteği -> televizyon_aç",
+        "kullanıcı_duygu_mutlu & zaman_akşam -> mutlu_ortam_ışığı",
+        "kullanıcı_duygu_üzgün -> neşeli_müzik_çal",
+        "kullanıcı_duygu_yorgun & zaman_akşam -> uyku_ortamı_hazırla",
+    )
+    
+    # Binlerce ev aynı süreçte tutulabildiğinden ev başına durum __slots__ ile sıkıştırılır
+    __slots__ = (
+        "_fact_bits", "_asserted", "_support", "_network", "_rule_truth",
+        "_batch_depth", "_pending_facts", "_pending_devices", "_held_devices", "_checkpoint", "_undo",
+        "_replaying",
+        "api_key", "llm_endpoint", "_gemini", "intent_matcher", "tier_stats", "events",
+        "devices", "device_temps", "_patterns", "actions", "dispatcher",
+        "clock", "scheduler", "_own_scheduler", "_jobs", "metrics", "_sample", "_llm",
+    )
+    
+    def __init__(self, api_key: str = None, llm_endpoint: str = None,
+                 gemini_client: Optional[GeminiClient] = None,
+                 rule_base: Optional[RuleNetwork] = None,
+                 event_bus: Optional[EventBus] = None,
+                 action_table: Optional[ActionTable] = None,
+                 dispatcher: Optional[DeviceDispatcher] = None,
+                 clock: Optional[Clock] = None,
+                 scheduler: Optional[Scheduler] = None,
+                 metrics: Optional[AgentMetrics] = None,
+                 llm_batcher: Optional[LLMBatcher] = None):
+        """
+        LogicAgent'i başlat. gemini_client verilirse (örneğin birden fazla
+        ajan arasında paylaşılan havuzlu istemci) o kullanılır. rule_base
+        verilmezse tüm ajanların paylaştığı değişmez varsayılan kural tabanı
+        kullanılır; ajana özel kural eklendiğinde taban kopyalanır.
+        Gerçek, kural ve cihaz olayları event_bus'a (verilmezse paylaşılan
+        varsayılan veriyoluna) yayınlanır. Eylemler action_table ile cihaz
+        komutlarına çözülür; dispatcher verilirse cihaz komutları kayıtlı
+        sürücülere eşzamanlı iletilir, verilmezse durumlar yalnızca bellekte
+        tutulur. Zaman gerçekleri scheduler'daki (verilmezse ajana özel)
+        işlerle yalnızca dilim sınırlarında değiştirilir; clock enjekte
+        edilebilir. Ajana özel zamanlayıcının işleri komutlarda çalışır,
+        paylaşılan zamanlayıcıyı ise sahibi çalıştırır. metrics verilirse kural, aşama ve LLM ölçümleri ona
+        kaydedilir. LLM niyet çıkarımı llm_batcher (verilmezse ilk kullanımda
+        oluşturulan, toplama penceresiz) üzerinden yapılır; evler arasında
+        paylaşılan bir batcher eşzamanlı komutları tek istekte toplar.
+        """
+        # Olaylar yalnızca abonesi olan türler için oluşturulur
+        self.events = event_bus if event_bus is not None else default_event_bus()
+        # Çalışma zamanı metrikleri (evler arasında paylaşılabilir); verilmezse ölçüm yapılmaz
+        self.metrics = metrics
+        self._sample = None
+        if metrics is not None and gemini_client is not None:
+            metrics.watch_gemini(gemini_client)
+        if metrics is not None and llm_batcher is not None:
+            metrics.watch_llm(llm_batcher)
+        # Gerçekler, paylaşılan sembol tablosundaki kimliklerine göre bit maskesinde tutulur
+        self._fact_bits = 0
+        # Doğrudan söylenen gerçeklerin maskesi ve çıkarılan gerçeklerin dayanakları
+        # (gerçek kimliği -> kural kimlikleri)
+        self._asserted = 0
+        self._support: Dict[int, Set[int]] = {}
+        # Gerçek -> kural dizini (paylaşılan) ve her kuralın son doğruluk değeri (eve özel)
+        self._network = rule_base if rule_base is not None else default_rule_base()
+        self._rule_truth = bytearray(len(self._network))
+        
+        # Toplu işlem (batch) durumu: değişen gerçekler ve bekleyen cihaz komutları
+        self._batch_depth = 0
+        self._pending_facts = 0
+        self._pending_devices: Dict[str, bool] = {}
+        # asyncio ön yüzünde sürücülere gidecek komutlar geçişten sonra beklenmek üzere tutulur
+        self._held_devices: Optional[Dict[str, bool]] = None
+        # En dıştaki değişiklikten önceki durum ve değişen kural doğruluk değerleri (bkz. _rollback)
+        self._checkpoint: Optional[Tuple[int, int, int]] = None
+        self._undo: Optional[List[Tuple[int, bool]]] = None
+        # Kayıtlı durum oynatılırken kurallar eylem yürütmeden yalnızca gerçek çıkarır
+        self._replaying = False
         self.api_key = api_key
-        self.llm_endpoint = llm_endpoint or "https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent"
-        
-        # Cihazları Türkçeleştir
-        self.devices = {
-            "ısıtıcı": False,  # False = kapalı, True = açık
-            "kapı": False,     # False = kapalı, True = açık
-            "perde": False,    # False = kapalı, True = açık
-            "televizyon": False, # False = kapalı, True = açık
-            "ışık": False,     # False = kapalı, True = açık
-        }
+        self.llm_endpoint = llm_endpoint or DEFAULT_ENDPOINT
+        # İstemci (HTTP oturumu) ve LLM toplayıcısı ilk kullanımda oluşturulur
+        self._gemini = gemini_client
+        self._llm = llm_batcher
+        
+        # Katmanlı komut işleme: paylaşılan yerel eşleştirici; istatistikler ilk kayıtta oluşturulur
+        self.intent_matcher = default_intent_matcher()
+        self.tier_stats: Optional[Dict[str, Dict[str, float]]] = None
+        
+        # Cihaz durumları tek bir bit maskesinde tutulur (False = kapalı, True = açık)
+        self.devices = DeviceStates(DEFAULT_DEVICES)
         self.device_temps = {"ısıtıcı": 22.0}  # Float olarak tanımla
         
-        # Kullanıcı davranış takibi
-        self.user_patterns = {
-            "sabah_rutini": [],
-            "akşam_rutini": [],
-            "sık_kullanılan_cihazlar": {},
-            "sıcaklık_tercihleri": []
-        }
+        # Eylem -> cihaz komutları tablosu (paylaşılan) ve cihaz sürücüleri
+        self.actions = action_table if action_table is not None else default_action_table()
+        self.dispatcher = dispatcher
+        
+        # Kullanıcı davranış takibi; öğrenici ilk komutta oluşturulur
+        self._patterns: Optional[PatternLearner] = None
+        
+        # Zaman: enjekte edilebilir saat ve (evler arasında paylaşılabilen) zamanlayıcı
+        if clock is None:
+            clock = scheduler.clock if scheduler is not None else time.time
+        self.clock = clock
+        self._own_scheduler = scheduler is None
+        self.scheduler = scheduler if scheduler is not None else Scheduler(clock)
+        self._jobs: List[Job] = []
+        
+        # Temel bağlamsal gerçekler ile başlat ve paylaşılan kuralları bu gerçeklere göre değerlendir
+        with self.batch():
+            self._setup_initial_facts()
+            self._evaluate_rules()
         
-        # Temel bağlamsal gerçekler ve kurallar ile başlat
-        self._setup_initial_facts()
-        self._setup_initial_rules()
-        self._setup_advanced_rules()
+        # Zaman dilimi gerçekleri sınırlarda, alışkanlık gerçekleri saat başlarında güncellenir
+        self._jobs.append(self.scheduler.schedule_recurring(_next_bucket_boundary, self.update_time_facts, "zaman",
+                                                            owner=self))
+        self._jobs.append(self.scheduler.schedule_recurring(_next_hour, self._on_hour, "alışkanlık", owner=self))
+    
+    @property
+    def facts(self) -> FrozenSet[str]:
+        """Mevcut gerçeklerin adları (bit maskesinden çözülen salt okunur görünüm)."""
+        return frozenset(SYMBOLS.names(self._fact_bits))
+    
+    def has_fact(self, fact: str) -> bool:
+        """Gerçeğin bilgi tabanında olup olmadığını döndür; bilinmeyen adlar sembol tablosuna eklenmez."""
+        fact_id = SYMBOLS.lookup(fact)
+        return fact_id is not None and bool(self._fact_bits >> fact_id & 1)
+    
+    @property
+    def patterns(self) -> PatternLearner:
+        """Kullanıcı alışkanlığı öğrenicisi; ilk kullanımda oluşturulur."""
+        if self._patterns is None:
+            self._patterns = PatternLearner()
+        return self._patterns
+    
+    @patterns.setter
+    def patterns(self, learner: PatternLearner):
+        self._patterns = learner
+    
+    @property
+    def user_patterns(self) -> Dict:
+        """Öğrenilen alışkanlıkların okunabilir özeti."""
+        return self.patterns.summary(self.clock())
+    
+    @property
+    def rules(self) -> List[Tuple[str, str]]:
+        """Tüm kurallar, tanımlanma sırasıyla (koşul, eylem) çiftleri olarak."""
+        return [(rule.condition, rule.action) for rule in self._network.rules]
+    
+    def has_rule(self, condition: str, action: str) -> bool:
+        """Koşulu ve eylemi verilen kuralın bilgi tabanında olup olmadığını döndür."""
+        return self._network.find(condition, action) is not None
+    
+    @property
+    def gemini(self) -> GeminiClient:
+        """Gemini istemcisi; verilmediyse ilk kullanımda oluşturulur."""
+        if self._gemini is None:
+            self._gemini = GeminiClient(self.api_key, self.llm_endpoint)
+            if self.metrics is not None:
+                self.metrics.watch_gemini(self._gemini)
+        return self._gemini
+    
+    @property
+    def llm(self) -> LLMBatcher:
+        """LLM niyet çıkarımı için birleştirici/toplayıcı; verilmediyse ilk kullanımda oluşturulur."""
+        if self._llm is None:
+            self._llm = LLMBatcher(self.gemini, window=0.0)
+            if self.metrics is not None:
+                self.metrics.watch_llm(self._llm)
+        return self._llm
+    
+    @property
+    def action_catalogue(self) -> Tuple[str, ...]:
+        """LLM'in döndürebileceği gerçekler (kural tabanı başına bir kez oluşturulur)."""
+        return action_catalogue(self._network, self.intent_matcher.intents)
+    
+    def _stage(self, name: str):
+        """Komut işleme aşamasının süresini ölçen bağlam; komut örneklenmiyorsa boş."""
+        if self._sample is None:
+            return NO_STAGE
+        return StageTimer(self._sample, name)
+    
+    def _notify(self, message: str, severity: int = logging.INFO):
+        """Serbest metinli bir bildirim yayınla."""
+        if self.events.wants(Notice):
+            self.events.publish(Notice(self, message, severity))
     
     def _setup_initial_facts(self):
         """Çevre hakkında ilk gerçekleri kur."""
-        current_time = datetime.datetime.now()
-        
         # Zamanla ilgili gerçekler
-        if 5 <= current_time.hour < 12:
-            self.tell_fact("zaman_sabah")
-        elif 12 <= current_time.hour < 17:
-            self.tell_fact("zaman_öğle")
-        elif 17 <= current_time.hour < 22:
-            self.tell_fact("zaman_akşam")
-        else:
-            self.tell_fact("zaman_gece")
-            
+        self.update_time_facts()
+        
         # Varsayılan gerçekler
         self.tell_fact("kişi_evde")
     
-    def _setup_initial_rules(self):
-        """Mantıksal ajan için ilk kuralları kur."""
-        # Cihaz kontrolü için temel kurallar
-        basic_rules = [
-            "kişi_üşüyor -> ısıtıcı_aç",
-            "zaman_gece & kişi_evde & ışık_isteği -> ışık_aç",
-            "televizyon_isteği -> televizyon_aç",
-            "kişi_çıkıyor -> kapı_kapat",
-            "zaman_sabah & kişi_evde & perde_isteği -> perde_aç",
-            "ısıtıcı_aç_isteği -> ısıtıcı_aç",
-            "ısıtıcı_kapat_isteği -> ısıtıcı_kapat",
-            "kapı_aç_isteği -> kapı_aç",
-            "kapı_kapat_isteği -> kapı_kapat",
-            "ışık_aç_isteği -> ışık_aç",
-            "ışık_kapat_isteği -> ışık_kapat",
-            "perde_aç_isteği -> perde_aç",
-            "perde_kapat_isteği -> perde_kapat",
-            "televizyon_aç_isteği -> televizyon_aç",
-            "televizyon_kapat_isteği -> televizyon_kapat"
-        ]
-        
-        for rule in basic_rules:
-            self.tell_rule(rule)
-    
-    def _setup_advanced_rules(self):
-        """Bağlam farkındalığı ve konfor için gelişmiş kurallar kur."""
-        advanced_rules = [
-            "zaman_gece & !kişi_evde -> ışık_kapat",
-            "zaman_sabah & !perde_açık & kişi_uyanıyor -> perde_aç",
-            "yüksek_sıcaklık & kişi_evde -> soğutma_öner",
-            "zaman_gece & kişi_uyuma_hazırlığı -> gece_modu",
-            "(zaman_sabah | zaman_akşam) & kişi_evde & !televizyon_açık & eğlence_isteği -> televizyon_aç",
-            "kullanıcı_duygu_mutlu & zaman_akşam -> mutlu_ortam_ışığı",
-            "kullanıcı_duygu_üzgün -> neşeli_müzik_çal",
-            "kullanıcı_duygu_yorgun & zaman_akşam -> uyku_ortamı_hazırla"
-        ]
-        
-        for rule in advanced_rules:
-            self.tell_rule(rule)
-    
     def tell_fact(self, fact: str):
         """Ajan'ın bilgi tabanına yeni bir gerçek ekle."""
-        self.facts.add(fact)
-        print(f"Gerçek eklendi: {fact}")
+        bit = SYMBOLS.bit(fact)
+        if self._asserted & bit:
+            return
+        
+        if not self._batch_depth:
+            self._take_checkpoint()
+        self._asserted |= bit
+        if self._fact_bits & bit:
+            # Gerçek zaten bir kural tarafından çıkarılmış; doğruluk değeri değişmedi
+            return
         
-        # Yeni bir gerçek ekledikten sonra, tetiklenmesi gereken kurallar var mı diye kontrol et
-        self._evaluate_rules()
+        self._fact_bits |= bit
+        if self.events.wants(FactAsserted):
+            self.events.publish(FactAsserted(self, fact))
+        
+        # Yalnızca bu gerçeğe başvuran kuralları yeniden değerlendir
+        self._fact_changed(bit)
     
     def retract_fact(self, fact: str):
-        """Bir gerçeği ajan'ın bilgi tabanından kaldır."""
-        if fact in self.facts:
-            self.facts.remove(fact)
-            print(f"Gerçek kaldırıldı: {fact}")
+        """
+        Bir gerçeği ajan'ın bilgi tabanından kaldır. Yalnızca doğrudan söylenmiş
+        gerçekler kaldırılabilir; çıkarılan gerçekler dayanakları ortadan
+        kalktığında kendiliğinden geri çekilir.
+        """
+        fact_id = SYMBOLS.lookup(fact)
+        if fact_id is None:
+            return
+        bit = 1 << fact_id
+        if not self._asserted & bit:
+            return
+        
+        if not self._batch_depth:
+            self._take_checkpoint()
+        self._asserted &= ~bit
+        if fact_id in self._support:
+            # Hâlâ kurallarca destekleniyor; destek yalnızca gerçeğin kendisine dayanan
+            # bir döngüden geliyorsa (y1 -> y2, y2 -> y1) döngüdeki gerçeklerle birlikte düşer
+            unfounded = self._unfounded(fact_id)
+            if not unfounded:
+                return
+            del self._support[fact_id]
+            self._drop_derived(unfounded & ~bit)
+        
+        self._fact_bits &= ~bit
+        if self.events.wants(FactRetracted):
+            self.events.publish(FactRetracted(self, fact))
+        
+        # Olumsuzlanmış koşullar (!gerçek) kaldırma ile doğru hale gelebilir
+        self._fact_changed(bit)
+    
+    def tell_facts(self, facts: Iterable[str]):
+        """Birden fazla gerçeği ekle ve kuralları tek geçişte değerlendir."""
+        with self.batch():
+            for fact in facts:
+                self.tell_fact(fact)
+    
+    def retract_facts(self, facts: Iterable[str]):
+        """Birden fazla gerçeği kaldır ve kuralları tek geçişte değerlendir."""
+        with self.batch():
+            for fact in facts:
+                self.retract_fact(fact)
+    
+    @contextmanager
+    def batch(self):
+        """
+        Toplu işlem bağlamı. İçeride yapılan tüm ekleme ve kaldırmalar önce
+        uygulanır; bağlamdan çıkılırken kurallar bir kez, sabit noktaya kadar
+        değerlendirilir. Her cihaz yalnızca son durumuna bir kez geçirilir.
+        İç içe kullanılabilir; değerlendirme en dıştaki bağlamın sonunda yapılır.
+        Kurallar döngüye girerse (RuleCycleError) bağlamdaki tüm değişiklikler
+        geri alınır.
+        """
+        if not self._batch_depth:
+            self._take_checkpoint()
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+        
+        if self._batch_depth == 0:
+            self._flush_batch()
+    
+    @contextmanager
+    def replaying(self):
+        """
+        Kayıtlı durumu oynatmak için toplu işlem bağlamı. Kuralların doğruluk
+        değerleri ve çıkardıkları gerçekler güncellenir, ancak eylemleri
+        yürütülmez: eylemlerin sonuçları (cihaz durumları, sıcaklıklar)
+        kaydın kendisinden geri yüklenir.
+        """
+        self._replaying = True
+        try:
+            with self.batch():
+                yield self
+        finally:
+            self._replaying = False
+    
+    def _fact_changed(self, bit: int):
+        """Değişen gerçeğin bitini kuyruğa al; toplu işlem yoksa hemen değerlendir."""
+        self._pending_facts |= bit
+        if not self._batch_depth:
+            self._flush_batch()
+    
+    def _flush_batch(self):
+        """
+        Bekleyen değişiklikleri sabit noktaya kadar ileri zincirleme ile işle.
+        
+        Yalnızca değişen gerçeklerden etkilenen kurallar, kural ağının
+        topolojik sırasıyla değerlendirilir; kuralların çıkardığı gerçekler
+        aynı geçişte sıraya eklenir. Cihaz durum gerçekleri (örn. perde_açık)
+        cihazlar güncellendikten sonraki geçişin girdisi olur.
+        """
+        change_counts: Dict[int, int] = {}
+        
+        # Eylemlerin yol açtığı yeni değişiklikler de aynı geçişte toplansın
+        self._batch_depth += 1
+        try:
+            while self._pending_facts or self._pending_devices:
+                if self._pending_facts:
+                    self._evaluate_rules(self._take_changes(change_counts), change_counts)
+                
+                # Cihazlar son durumlarına bir kez geçirilir; durumu zaten istenen
+                # değerde olan cihazlara komut gönderilmez
+                pending_devices = self._pending_devices
+                self._pending_devices = {}
+                if self._held_devices is not None:
+                    # Sürücü komutları olay döngüsünde beklenecek (bkz. _actuate_held_async)
+                    self._held_devices.update(pending_devices)
+                    continue
+                changes = {device: state for device, state in pending_devices.items()
+                           if self.devices[device] != state}
+                if changes:
+                    with self._stage("eylem"):
+                        if self.dispatcher is not None:
+                            self._actuate(changes)
+                        for device, state in changes.items():
+                            self._set_device(device, state)
+        except RuleCycleError:
+            self._pending_facts = 0
+            self._pending_devices = {}
+            self._rollback()
+            raise
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self._checkpoint = self._undo = None
+    
+    def _take_checkpoint(self):
+        """En dıştaki değişiklikten önce geri alma noktası al."""
+        self._checkpoint = (self._fact_bits, self._asserted, self.devices.bits)
+        self._undo = []
+    
+    def _rollback(self):
+        """
+        Geri alma noktasından bu yana yapılan değişiklikleri geri al: gerçekler,
+        kural doğruluk değerleri ve dayanakları, cihaz durumları. Yayınlanmış
+        olaylar ve sürücülere iletilmiş komutlar geri alınamaz.
+        """
+        if self._checkpoint is None:
+            return
+        
+        for rule_id, was_true in reversed(self._undo):
+            self._rule_truth[rule_id] = was_true
+        self._fact_bits, self._asserted, self.devices.bits = self._checkpoint
+        self._support = {}
+        for rule in self._network.rules:
+            if self._rule_truth[rule.rule_id]:
+                self._support.setdefault(rule.action_id, set()).add(rule.rule_id)
+        if self._held_devices:
+            self._held_devices = {}
     
     def tell_rule(self, rule: str):
-        """Ajan'ın bilgi tabanına yeni bir kural ekle."""
-        if "->" not in rule:
-            raise ValueError("Kural 'koşul -> eylem' formatında olmalıdır")
+        """
+        Ajan'ın bilgi tabanına yeni bir kural ekle. Aynı koşula sahip kurallar
+        birlikte tutulur; koşulu ve eylemi aynı olan kural yeniden eklenmez.
+        """
+        condition, action = parse_rule(rule)
+        if self._network.find(condition, action) is not None:
+            return
+        
+        # Paylaşılan kural tabanı ilk eve özel kuralda kopyalanır (kopyala-yaz)
+        network = self._network
+        if network.frozen:
+            self._network = network.copy()
         
-        condition, action = rule.split("->")
-        condition = condition.strip()
-        action = action.strip()
+        # Koşul ağa eklenirken bir kez derlenir; değerlendirmede yalnızca ağaç kullanılır
+        rule = self._network.add(condition, action)
         
-        self.rules[condition] = action
-        print(f"Kural eklendi: {condition} -> {action}")
+        # Yeni kural mevcut gerçeklerle zaten sağlanıyorsa hemen tetiklenir
+        self._rule_truth.append(0)
+        try:
+            with self.batch():
+                self._update_rule(rule)
+        except RuleCycleError:
+            # Döngüye yol açan kural eklenmez
+            del self._rule_truth[-1]
+            if self._network is network:
+                network.remove_last(rule)
+            else:
+                self._network = network
+            raise
+        
+        if self.events.wants(RuleAdded):
+            self.events.publish(RuleAdded(self, condition, action))
+    
+    def analyze_rules(self, inputs: Iterable[str] = ()) -> RuleReport:
+        """
+        Kural tabanını statik olarak çözümle (aynı koşullu kurallar, çelişen
+        eylemler, ölü kurallar, döngüler). Girdi gerçekleri ajanın dışarıdan
+        aldığı gerçeklerdir: söylenmiş gerçekler, zaman dilimleri, cihaz durum
+        ve alışkanlık gerçekleri, duygular ve LLM eylem kataloğu; inputs ile
+        başka kaynakların söylediği gerçekler eklenebilir.
+        """
+        time_facts = [fact for fact, _, _ in TIME_BUCKETS]
+        known = list(SYMBOLS.names(self._asserted))
+        known += time_facts
+        known += [f"{device}_açık" for device in self.devices]
+        known += [f"{HABIT_PREFIX}{device}" for device in self.devices]
+        known += [f"{EMOTION_PREFIX}{emotion}" for emotion in self.intent_matcher.emotions]
+        known += self.action_catalogue
+        known += inputs
+        return analyze(self._network, known, self.actions, exclusive=[time_facts])
     
     def _parse_condition(self, condition: str) -> bool:
         """Mantıksal bir koşulu ayrıştır ve değerlendir."""
-        # AND koşullarını ele al
-        if "&" in condition:
-            subconditions = [c.strip() for c in condition.split("&")]
-            return all(self._parse_condition(subcond) for subcond in subconditions)
+        # Derlenmiş ağaç önbellekten gelir; metin yalnızca ilk kullanımda ayrıştırılır
+        return compile_condition(condition).evaluate_bits(self._fact_bits)
+    
+    def _take_changes(self, change_counts: Dict[int, int]) -> int:
+        """Bekleyen değişen gerçekleri al; bir gerçek çok sık değiştiyse RuleCycleError fırlat."""
+        changed = self._pending_facts
+        self._pending_facts = 0
+        for fact_id in SYMBOLS.ids(changed):
+            change_counts[fact_id] = change_counts.get(fact_id, 0) + 1
+            if change_counts[fact_id] > self.MAX_FACT_CHANGES:
+                raise RuleCycleError(
+                    f"Kurallar arasında döngü algılandı: '{SYMBOLS.name(fact_id)}' sürekli değişiyor")
+        return changed
+    
+    def _evaluate_rules(self, changed_bits: Optional[int] = None, change_counts: Optional[Dict[int, int]] = None):
+        """
+        Değişen gerçeklerden (bit maskesi) etkilenen kuralları değerlendir ve
+        eylemleri yürüt. changed_bits verilmezse tüm kurallar değerlendirilir.
+        
+        Kurallar ağın topolojik sırasıyla değerlendirilir: bir kuralın
+        başvurduğu gerçekleri üreten kurallar ondan önce gelir. change_counts
+        verilirse değerlendirme sırasında değişen gerçeklerden etkilenen
+        kurallar da aynı geçişte sıraya eklenir (bkz. _propagate).
+        """
+        network = self._network
+        sequence = network.sequence
+        if changed_bits is None:
+            ranks = range(len(sequence))
+        else:
+            ranks = network.affected_ranks(changed_bits)
+            if not ranks:
+                return
+        
+        if change_counts is not None:
+            self._propagate(list(ranks), change_counts)
+            return
+        
+        rules = sequence if changed_bits is None else [sequence[rank] for rank in sorted(ranks)]
+        if self._sample is None:
+            for rule in rules:
+                self._update_rule(rule)
+            return
+        
+        self._sample.add("kurallar", sum(self._timed_update(rule) for rule in rules))
+    
+    def _propagate(self, queue: List[int], change_counts: Dict[int, int]):
+        """
+        Sıraları verilen kuralları değerlendir; değişen gerçeklerden etkilenen
+        kuralları sıraya ekleyerek sabit noktaya kadar sürdür. Döngüsüz bir
+        kural tabanında her kural geçiş başına en fazla bir kez değerlendirilir.
+        """
+        network = self._network
+        sequence = network.sequence
+        heapq.heapify(queue)
+        timed = self._sample is not None
+        total = 0.0
+        last = -1
+        while queue:
+            rank = heapq.heappop(queue)
+            # Aynı kural sıraya birden çok kez eklenmiş olabilir; ardışık gelir
+            if rank == last:
+                continue
+            last = rank
+            if timed:
+                total += self._timed_update(sequence[rank])
+            else:
+                self._update_rule(sequence[rank])
+            
+            if self._pending_facts:
+                for rank in network.affected_ranks(self._take_changes(change_counts)):
+                    heapq.heappush(queue, rank)
+                    # Kendi girdisini değiştiren kural yeniden değerlendirilmeli
+                    if rank == last:
+                        last = -1
+        
+        if timed:
+            self._sample.add("kurallar", total)
+    
+    def _timed_update(self, rule) -> float:
+        """Örneklenen komutlarda kuralı güncelle ve süresini kural istatistiğine yaz."""
+        start = time.perf_counter()
+        self._update_rule(rule)
+        elapsed = time.perf_counter() - start
+        self.metrics.rule_evaluated(rule, elapsed)
+        return elapsed
+    
+    def _update_rule(self, rule):
+        """
+        Kuralın doğruluk değerini güncelle. Yanlıştan doğruya geçişte kuralın
+        sonucu çıkarılan bir gerçek olarak eklenir ve eylem yürütülür; doğrudan
+        yanlışa geçişte sonucun bu kurala dayanan desteği geri çekilir.
+        """
+        is_true = rule.matches(self._fact_bits)
+        if is_true == self._rule_truth[rule.rule_id]:
+            return
+        
+        self._rule_truth[rule.rule_id] = is_true
+        if self._undo is not None:
+            self._undo.append((rule.rule_id, not is_true))
+        if is_true:
+            self._add_support(rule.rule_id, rule.action_bit)
+            if self._replaying:
+                return
+            if self.metrics is not None:
+                self.metrics.rule_fired(rule)
+            if self.events.wants(RuleFired):
+                self.events.publish(RuleFired(self, rule.rule_id, rule.condition, rule.action))
+            self._execute_action(rule.action)
+        else:
+            self._withdraw_support(rule.rule_id, rule.action_bit)
+    
+    def _add_support(self, rule_id: int, bit: int):
+        """Bir kuralı çıkarılan gerçeğin dayanakları arasına ekle."""
+        fact_id = bit.bit_length() - 1
+        supporters = self._support.setdefault(fact_id, set())
+        supporters.add(rule_id)
         
-        # OR koşullarını ele al
-        if "|" in condition:
-            subconditions = [c.strip() for c in condition.split("|")]
-            return any(self._parse_condition(subcond) for subcond in subconditions)
+        if not self._fact_bits & bit:
+            self._fact_bits |= bit
+            if self.events.wants(FactAsserted):
+                self.events.publish(FactAsserted(self, SYMBOLS.name(fact_id), derived=True))
+            self._fact_changed(bit)
+    
+    def _withdraw_support(self, rule_id: int, bit: int):
+        """Kuralın desteğini geri çek; başka dayanağı kalmayan gerçeği kaldır."""
+        fact_id = bit.bit_length() - 1
+        supporters = self._support.get(fact_id)
+        if supporters is None:
+            return
         
-        # NOT koşullarını ele al
-        if condition.startswith("!"):
-            return not self._parse_condition(condition[1:].strip())
+        supporters.discard(rule_id)
+        if supporters:
+            # Kalan dayanaklar yalnızca gerçeğin kendisine dayanan bir döngü olabilir
+            if not self._asserted & bit:
+                self._drop_derived(self._unfounded(fact_id))
+            return
         
-        # Temel durum: koşulun gerçeklerde olup olmadığını kontrol et
-        return condition.strip() in self.facts
+        del self._support[fact_id]
+        if not self._asserted & bit:
+            self._fact_bits &= ~bit
+            if self.events.wants(FactRetracted):
+                self.events.publish(FactRetracted(self, SYMBOLS.name(fact_id), derived=True))
+            self._fact_changed(bit)
     
-    def _evaluate_rules(self):
-        """Mevcut gerçeklere dayalı tüm kuralları değerlendir ve eylemleri yürüt."""
-        for condition, action in self.rules.items():
-            if self._parse_condition(condition):
-                self._execute_action(action)
+    def _unfounded(self, fact_id: int) -> int:
+        """
+        Gerçeğin ve türetilmiş atalarının söylenen gerçeklerden türetilemeyenlerini
+        (bit maskesi) döndür. Atalar dayanak kurallarının başvurduğu, söylenmemiş
+        ve hâlâ desteklenen gerçeklerdir; bunlar dışındaki gerçekler sağlam kabul
+        edilir ve atalar dayanak kurallarıyla bu gerçeklerden yeniden türetilir.
+        """
+        rules = self._network.rules
+        suspects = 0
+        stack = [fact_id]
+        while stack:
+            current = stack.pop()
+            if suspects >> current & 1:
+                continue
+            suspects |= 1 << current
+            for rule_id in self._support.get(current, ()):
+                ancestors = SYMBOLS.mask(rules[rule_id].atoms) & self._fact_bits & ~self._asserted & ~suspects
+                stack.extend(ancestor for ancestor in SYMBOLS.ids(ancestors) if ancestor in self._support)
+        
+        founded = self._fact_bits & ~suspects
+        changed = True
+        while changed:
+            changed = False
+            for suspect in SYMBOLS.ids(suspects):
+                if any(rules[rule_id].matches(founded) for rule_id in self._support.get(suspect, ())):
+                    founded |= 1 << suspect
+                    suspects &= ~(1 << suspect)
+                    changed = True
+        return suspects
+    
+    def _drop_derived(self, bits: int):
+        """
+        Türetilmiş gerçekleri dayanaklarıyla birlikte kaldır. Etkilenen kurallar
+        bir sonraki değerlendirme geçişinde (bkz. _fact_changed) ele alınır.
+        """
+        if not bits:
+            return
+        
+        for fact_id in SYMBOLS.ids(bits):
+            del self._support[fact_id]
+            if self.events.wants(FactRetracted):
+                self.events.publish(FactRetracted(self, SYMBOLS.name(fact_id), derived=True))
+        self._fact_bits &= ~bits
+        self._pending_facts |= bits
     
     def _execute_action(self, action: str):
-        """Tetiklenen bir kurala dayalı bir eylemi yürüt."""
-        print(f"Eylem yürütülüyor: {action}")
-        
-        # Cihaz kontrolleri (Türkçeleştirilmiş)
-        if action == "ısıtıcı_aç":
-            self._turn_on_device("ısıtıcı")
-        elif action == "ısıtıcı_kapat":
-            self._turn_off_device("ısıtıcı")
-        elif action == "kapı_aç":
-            self._turn_on_device("kapı")
-        elif action == "kapı_kapat":
-            self._turn_off_device("kapı")
-        elif action == "perde_aç":
-            self._turn_on_device("perde")
-        elif action == "perde_kapat":
-            self._turn_off_device("perde")
-        elif action == "televizyon_aç":
-            self._turn_on_device("televizyon")
-        elif action == "televizyon_kapat":
-            self._turn_off_device("televizyon")
-        elif action == "ışık_aç":
-            self._turn_on_device("ışık")
-        elif action == "ışık_kapat":
-            self._turn_off_device("ışık")
-        # Gelişmiş konfor eylemleri
-        elif action == "mutlu_ortam_ışığı":
-            self._turn_on_device("ışık")
-            print("Mutlu ortam ışığı ayarlanıyor: parlak, sıcak tonlar")
-        elif action == "neşeli_müzik_çal":
-            print("Moral yükseltici müzik çalınıyor...")
-        elif action == "uyku_ortamı_hazırla":
-            self._turn_off_device("televizyon")
-            self._turn_off_device("ışık")
-            self._turn_off_device("perde")
-            print("Uyku ortamı hazırlanıyor: perdeler kapatılıyor, ışıklar söndürülüyor.")
+        """Tetiklenen bir kurala dayalı bir eylemi eylem tablosundan çözüp yürüt."""
+        definition = self.actions.resolve(action)
+        if definition is None:
+            return
+        
+        for device, state in definition.devices:
+            if state:
+                self._turn_on_device(device)
+            else:
+                self._turn_off_device(device)
+        if definition.message:
+            self._notify(definition.message)
+    
+    def add_device(self, device: str, driver: Optional[Driver] = None, timeout: Optional[float] = None):
+        """
+        Yeni bir cihaz ekle (başlangıçta kapalı). ``<cihaz>_aç`` ve
+        ``<cihaz>_kapat`` eylemleri eylem tablosu değiştirilmeden çalışır.
+        driver verilirse cihaz komutları bu sürücüye iletilir.
+        """
+        if device not in self.devices:
+            self.devices[device] = False
+        if driver is not None:
+            if self.dispatcher is None:
+                self.dispatcher = DeviceDispatcher()
+            self.dispatcher.register(device, driver, timeout)
+    
+    def _actuate(self, changes: Dict[str, bool]):
+        """Cihaz komutlarını sürücülere eşzamanlı ilet; başarısız olanları changes'ten çıkar."""
+        for device, error in self.dispatcher.actuate(changes).items():
+            if error is not None:
+                del changes[device]
+                self._notify(error, logging.WARNING)
+    
+    async def _actuate_held_async(self):
+        """
+        Tutulan cihaz komutlarını sürücülere olay döngüsünü bloklamadan ilet ve
+        başarılı olanları uygula. Uygulanan durumlar kuralları yeniden
+        tetikleyip yeni komutlar doğurabilir; bunlar da aynı şekilde beklenir.
+        """
+        for _ in range(self.MAX_FACT_CHANGES):
+            changes = {device: state for device, state in self._held_devices.items()
+                       if self.devices[device] != state}
+            self._held_devices = {}
+            if not changes:
+                return
+            
+            for device, error in (await self.dispatcher.actuate_async(changes)).items():
+                if error is not None:
+                    del changes[device]
+                    self._notify(error, logging.WARNING)
+            with self.batch():
+                for device, state in changes.items():
+                    self._set_device(device, state)
+        
+        self._held_devices = {}
+        raise RuleCycleError("Kurallar arasında döngü algılandı: cihaz komutları sürekli değişiyor")
     
     def _turn_on_device(self, device: str):
         """Bir cihazı aç."""
         if device in self.devices:
-            self.devices[device] = True
-            print(f"{device.capitalize()} AÇILDI")
+            self._request_device_state(device, True)
     
     def _turn_off_device(self, device: str):
         """Bir cihazı kapat."""
         if device in self.devices:
-            self.devices[device] = False
-            print(f"{device.capitalize()} KAPATILDI")
+            self._request_device_state(device, False)
+    
+    def _request_device_state(self, device: str, state: bool):
+        """Cihaz komutunu biriktir; toplu işlem yoksa hemen uygula."""
+        # Aynı cihaza gelen ardışık komutlardan yalnızca sonuncusu uygulanır
+        self._pending_devices[device] = state
+        if not self._batch_depth:
+            self._flush_batch()
+    
+    def _set_device(self, device: str, state: bool):
+        """Cihaz durumunu değiştir ve durumu '<cihaz>_açık' gerçeği olarak yansıt."""
+        self.devices[device] = state
+        if self.events.wants(DeviceChanged):
+            self.events.publish(DeviceChanged(self, device, state))
+        
+        if state:
+            self.tell_fact(f"{device}_açık")
+        else:
+            self.retract_fact(f"{device}_açık")
     
     def _adjust_heater_temp(self, delta: float):
         """Isıtıcı sıcaklığını ayarla."""
         self.device_temps["ısıtıcı"] += delta
-        print(f"Isıtıcı sıcaklığı {self.device_temps['ısıtıcı']}°C olarak ayarlandı")
-    
-    def update_time_facts(self):
-        """Günün saatiyle ilgili gerçekleri güncelle"""
-        current_time = datetime.datetime.now()
-        current_hour = current_time.hour
-        
-        # Mevcut tüm zaman gerçeklerini kaldır
-        for time_fact in ["zaman_sabah", "zaman_öğle", "zaman_akşam", "zaman_gece"]:
-            self.retract_fact(time_fact)
-        
-        # Mevcut zaman gerçeğini ekle
-        if 5 <= current_hour < 12:
-            self.tell_fact("zaman_sabah")
-        elif 12 <= current_hour < 17:
-            self.tell_fact("zaman_öğle")
-        elif 17 <= current_hour < 22:
-            self.tell_fact("zaman_akşam")
-        else:
-            self.tell_fact("zaman_gece")
+        if self.events.wants(TemperatureChanged):
+            self.events.publish(TemperatureChanged(self, "ısıtıcı", self.device_temps["ısıtıcı"]))
     
-    def detect_emotion(self, command: str):
-        """Kullanıcı komutlarından duyguları algıla"""
-        command_lower = command.lower()
+    def update_time_facts(self, timestamp: Optional[float] = None):
+        """
+        Zaman dilimi gerçeğini (zaman_sabah, zaman_öğle ...) verilen ana göre
+        güncelle. Zamanlayıcı bunu yalnızca dilim sınırlarında çağırır; dilim
+        değişmediyse hiçbir gerçek değişmez ve hiçbir kural değerlendirilmez.
+        """
+        if timestamp is None:
+            timestamp = self.clock()
+        for window in _TIME_BUCKET_WINDOWS:
+            if window.contains(timestamp):
+                current = window.fact
+                break
+        current_bit = SYMBOLS.bit(current)
+        if self._asserted & TIME_BUCKET_MASK == current_bit:
+            return
+        
+        # Kaldırma ve ekleme tek bir değerlendirmede birleşir
+        with self.batch():
+            self.retract_facts(SYMBOLS.names(self._asserted & TIME_BUCKET_MASK & ~current_bit))
+            self.tell_fact(current)
+    
+    def _run_due_jobs(self):
+        """
+        Ajana özel zamanlayıcıda zamanı gelmiş işleri çalıştır. Paylaşılan
+        zamanlayıcı burada çalıştırılmaz: bir evin komutu diğer evlerin
+        işlerini çalıştırmamalıdır (bkz. AgentRegistry.run_pending).
+        """
+        if self._own_scheduler:
+            with self._stage("zaman"):
+                self.scheduler.run_pending()
+    
+    def _on_hour(self, timestamp: float):
+        self.update_habit_facts(timestamp)
+    
+    def add_time_window(self, fact: str, start, end, days: Optional[Iterable[int]] = None) -> Job:
+        """
+        Kullanıcı tanımlı zaman penceresi: fact, start-end ("SS:DD") arasında
+        (days verilirse yalnızca o günlerde; Pazartesi = 0) doğrudur. Gerçek
+        zamanlayıcı tarafından pencere sınırlarında değiştirilir.
+        """
+        window = TimeWindow(fact, start, end, days)
+        
+        def apply(timestamp: float):
+            if window.contains(timestamp):
+                self.tell_fact(fact)
+            else:
+                self.retract_fact(fact)
+        
+        apply(self.clock())
+        job = self.scheduler.schedule_recurring(window.next_boundary, apply, fact, owner=self)
+        self._jobs.append(job)
+        return job
+    
+    def add_cron_trigger(self, expression: str, fact: str) -> Optional[Job]:
+        """
+        Cron ifadesine ("dakika saat ay_günü ay haftanın_günü") uyan her anda
+        fact kısa bir süre doğru olur: eklenir ve hemen kaldırılır, böylece
+        ona bağlı kurallar her tetiklemede yeniden çalışır.
+        """
+        def pulse(timestamp: float):
+            self.tell_fact(fact)
+            self.retract_fact(fact)
         
-        # Türkçe'de duygusal anahtar kelimeleri tanımla
-        emotion_keywords = {
-            "mutlu": ["mutlu", "sevinçli", "neşeli", "harika", "güzel", "memnun"],
-            "üzgün": ["üzgün", "mutsuz", "kötü", "kederli", "sıkıntılı"],
-            "kızgın": ["kızgın", "sinirli", "öfkeli", "kızmış", "sinirlendim"],
-            "yorgun": ["yorgun", "yoruldum", "bitkin", "tükendim", "uykulu"]
-        }
+        job = self.scheduler.cron(expression, pulse, fact, owner=self)
+        if job is not None:
+            self._jobs.append(job)
+        return job
+    
+    def close(self):
+        """Ajanın zamanlanmış işlerini iptal et (paylaşılan zamanlayıcıdan ayrılırken)."""
+        for job in self._jobs:
+            job.cancel()
+        self._jobs = []
+    
+    def update_habit_facts(self, timestamp: Optional[float] = None):
+        """
+        Haftanın bu saatinde sık kullanılan cihazlar için "alışkanlık_<cihaz>"
+        gerçeklerini güncelle; kurallar bunlarla proaktif öneri yapabilir
+        (örn. "alışkanlık_ışık & !ışık_açık -> ışık_öner").
+        """
+        if self._patterns is None:
+            return
+        
+        if timestamp is None:
+            timestamp = self.clock()
+        habits = [f"{HABIT_PREFIX}{device}" for device, score in self.patterns.top_devices(timestamp)
+                  if score >= self.HABIT_MIN_SCORE]
+        habit_mask = SYMBOLS.mask(f"{HABIT_PREFIX}{device}" for device in self.devices)
+        stale = [fact for fact in SYMBOLS.names(self._asserted & habit_mask) if fact not in habits]
+        with self.batch():
+            self.retract_facts(stale)
+            self.tell_facts(habits)
+    
+    def detect_emotion(self, command: str, match: Optional[IntentMatch] = None):
+        """Kullanıcı komutlarından duyguları algıla"""
+        # Duygu anahtar kelimeleri niyet kalıplarıyla aynı otomatta aranır
+        if match is None:
+            match = self.intent_matcher.match(command)
         
-        for emotion, keywords in emotion_keywords.items():
-            if any(keyword in command_lower for keyword in keywords):
-                emotion_fact = f"kullanıcı_duygu_{emotion}"
-                self.tell_fact(emotion_fact)
-                return emotion
+        emotion = match.primary_emotion
+        if emotion:
+            self.tell_fact(f"{EMOTION_PREFIX}{emotion}")
         
-        return None
+        return emotion
     
     def learn_from_command(self, command, facts_added):
-        """Davranış kalıpları oluşturmak için kullanıcı komutlarından öğren"""
-        current_time = datetime.datetime.now()
-        current_hour = current_time.hour
-        
-        # Cihaz kullanım sıklığını takip et
-        for fact in facts_added:
-            if fact.endswith("_isteği"):
-                device = fact.replace("_isteği", "").split("_")[0]
-                if device in self.devices:
-                    if device not in self.user_patterns["sık_kullanılan_cihazlar"]:
-                        self.user_patterns["sık_kullanılan_cihazlar"][device] = 0
-                    self.user_patterns["sık_kullanılan_cihazlar"][device] += 1
-        
-        # Sabah/akşam rutinlerini öğren
-        if 5 <= current_hour < 10:
-            for fact in facts_added:
-                if fact not in self.user_patterns["sabah_rutini"]:
-                    self.user_patterns["sabah_rutini"].append(fact)
-        elif 18 <= current_hour < 23:
-            for fact in facts_added:
-                if fact not in self.user_patterns["akşam_rutini"]:
-                    self.user_patterns["akşam_rutini"].append(fact)
-        
-        # Sıcaklık tercihlerini öğren
-        if "kişi_üşüyor" in facts_added or "sıcaklık_artır_isteği" in facts_added:
-            self.user_patterns["sıcaklık_tercihleri"].append("daha_sıcak_tercih")
-        elif "sıcaklık_azalt_isteği" in facts_added:
-            self.user_patterns["sıcaklık_tercihleri"].append("daha_serin_tercih")
-    
-    def call_gemini_api(self, prompt: str) -> str:
+        """
+        Davranış kalıpları oluşturmak için kullanıcı komutlarından öğren. Her
+        komut sabit sürede, sabit boyutlu sayaçlara işlenir.
+        """
+        facts_added = tuple(facts_added)
+        devices = self._devices_for(facts_added)
+        
+        # Sıcaklık niyeti varsa ayarlanan sıcaklık tercih olarak öğrenilir
+        temperature = None
+        if any(fact in self.TEMPERATURE_DELTAS for fact in facts_added):
+            temperature = self.device_temps.get("ısıtıcı")
+        
+        timestamp = self.clock()
+        self.patterns.observe(facts_added, devices, timestamp, temperature)
+        
+        if self.events.wants(PatternsUpdated):
+            self.events.publish(PatternsUpdated(self, facts_added, devices, timestamp, temperature))
+    
+    def _devices_for(self, facts: Iterable[str]) -> Tuple[str, ...]:
+        """İstek gerçeklerinin (<eylem>_isteği) eylem tablosuna göre kullandığı cihazlar."""
+        devices = []
+        for fact in facts:
+            if fact.endswith(REQUEST_SUFFIX):
+                action = self.actions.resolve(fact[:-len(REQUEST_SUFFIX)])
+                if action is not None:
+                    for device, _ in action.devices:
+                        if device in self.devices and device not in devices:
+                            devices.append(device)
+        return tuple(devices)
+    
+    def suggest_devices(self, k: int = 3) -> List[Tuple[str, float]]:
+        """Haftanın bu saatinde kullanıcının en sık kullandığı k cihaz (öneriler için)."""
+        return self.patterns.top_devices(self.clock(), k)
+    
+    def preferred_temperature(self) -> Optional[float]:
+        """Kullanıcının öğrenilen tercih sıcaklığı; henüz bilinmiyorsa None."""
+        return self.patterns.preferred_temperature()
+    
+    def _llm_failed(self, error: GeminiAPIError, elapsed: float):
+        """Başarısız LLM çağrısını metriklere kaydet ve bildir."""
+        if self.metrics is not None:
+            self.metrics.llm_request(elapsed, error=True)
+        self._notify(f"API çağrısı sırasında hata: {str(error)}", logging.ERROR)
+    
+    def call_gemini_api(self, prompt: str, cache_key: Optional[str] = None) -> str:
         """Gemini API'sini çağır ve yanıt al"""
         if not self.api_key:
-            print("API anahtarı tanımlanmamış!")
+            self._notify("API anahtarı tanımlanmamış!", logging.WARNING)
             return "API anahtarı gerekiyor"
         
+        start = time.perf_counter()
         try:
-            headers = {
-                "Content-Type": "application/json"
+            # Havuzlu oturum, zaman aşımı, yeniden deneme ve önbellek istemcide
+            with self._stage("llm"):
+                response = self.gemini.generate(prompt, cache_key=cache_key)
+        except GeminiAPIError as e:
+            self._llm_failed(e, time.perf_counter() - start)
+            if e.status_code is not None:
+                return f"API hatası: {e.status_code}"
+            return f"Hata: {str(e)}"
+        
+        if self.metrics is not None:
+            self.metrics.llm_request(time.perf_counter() - start)
+        return response
+    
+    def _record_tier(self, tier: str, hit: bool, elapsed: float):
+        """Bir işleme katmanının denemesini, isabetini ve süresini kaydet."""
+        if self.tier_stats is None:
+            self.tier_stats = {
+                name: {"deneme": 0, "isabet": 0, "toplam_süre_sn": 0.0}
+                for name in ("yerel", "llm")
             }
-            
-            data = {
-                "contents": [{
-                    "parts": [{
-                        "text": prompt
-                    }]
-                }],
-                "generationConfig": {
-                    "temperature": 0.7,
-                    "maxOutputTokens": 800
-                }
+        stats = self.tier_stats[tier]
+        stats["deneme"] += 1
+        stats["isabet"] += int(hit)
+        stats["toplam_süre_sn"] += elapsed
+        if self.metrics is not None:
+            self.metrics.tier(tier, hit)
+    
+    def get_tier_stats(self) -> Dict[str, Dict[str, float]]:
+        """Katman başına isabet oranı ve ortalama gecikmeyi döndür."""
+        report = {}
+        for tier, stats in (self.tier_stats or {}).items():
+            attempts = stats["deneme"]
+            report[tier] = {
+                "deneme": attempts,
+                "isabet": stats["isabet"],
+                "isabet_oranı": stats["isabet"] / attempts if attempts else 0.0,
+                "ortalama_süre_sn": stats["toplam_süre_sn"] / attempts if attempts else 0.0,
             }
-            
-            # API endpoint'ine API anahtarını ekle
-            endpoint = f"{self.llm_endpoint}?key={self.api_key}"
-            
-            response = requests.post(endpoint, headers=headers, json=data)
-            
-            if response.status_code == 200:
-                result = response.json()
-                # API yanıtını ayrıştır
-                if "candidates" in result and len(result["candidates"]) > 0:
-                    if "content" in result["candidates"][0] and "parts" in result["candidates"][0]["content"]:
-                        return result["candidates"][0]["content"]["parts"][0]["text"]
-                    
-                return "API yanıtı ayrıştırılamadı"
-            else:
-                print(f"API hatası: {response.status_code}")
-                print(f"Hata detayı: {response.text}")
-                return f"API hatası: {response.status_code}"
-                
-        except Exception as e:
-            print(f"API çağrısı sırasında hata: {str(e)}")
-            return f"Hata: {str(e)}"
+        return report
     
-    def process_command_with_gemini(self, command: str):
-        """Doğal dil komutunu Gemini API ile işle"""
-        if not self.api_key:
-            print("Gemini API anahtarı tanımlanmamış!")
-            return self.process_command(command)
+    def _match_locally(self, command: str) -> Tuple[IntentMatch, bool]:
+        """1. katman: komutu yerel niyet eşleştirici ile tara ve yeterince güvenli olup olmadığını döndür."""
+        start = time.perf_counter()
+        with self._stage("niyet"):
+            match = self.intent_matcher.match(command)
+        local_hit = match.confidence >= self.LOCAL_CONFIDENCE_THRESHOLD
+        self._record_tier("yerel", local_hit, time.perf_counter() - start)
+        return match, local_hit
+    
+    def _llm_actions(self, command: str) -> List[str]:
+        """Komutun eylemlerini LLM'den al (toplu ve birleştirilmiş istekle); hata olursa boş liste."""
+        start = time.perf_counter()
+        try:
+            with self._stage("llm"):
+                actions = self.llm.extract(command, self.action_catalogue)
+        except GeminiAPIError as e:
+            self._llm_failed(e, time.perf_counter() - start)
+            return []
+        
+        if self.metrics is not None:
+            self.metrics.llm_request(time.perf_counter() - start)
+        return actions
+    
+    async def _llm_actions_async(self, command: str) -> List[str]:
+        """_llm_actions'ın olay döngüsünü bloklamayan sürümü."""
+        # Bekleme sırasında başka evlerin komutları işlenebildiğinden süre aşama olarak değil,
+        # yalnızca LLM histogramına kaydedilir
+        start = time.perf_counter()
+        try:
+            actions = await self.llm.extract_async(command, self.action_catalogue)
+        except GeminiAPIError as e:
+            self._llm_failed(e, time.perf_counter() - start)
+            return []
         
-        prompt = f"""
-        Ben bir akıllı ev sistemi için mantıksal bir ajanım. Aşağıdaki komutu analiz edip eyleme dönüştürmeme yardım et:
+        if self.metrics is not None:
+            self.metrics.llm_request(time.perf_counter() - start)
+        return actions
+    
+    def _measure_command(self, handler, *args):
+        """handler'ı tek bir komut olarak say ve (örneklenirse) aşama sürelerini ölç."""
+        if self.metrics is None:
+            return handler(*args)
+        self._sample = self.metrics.begin_command()
+        try:
+            return handler(*args)
+        finally:
+            sample, self._sample = self._sample, None
+            if sample is not None:
+                self.metrics.end_command(sample)
+    
+    def process_command_with_gemini(self, command: str):
+        """
+        Doğal dil komutunu katmanlı olarak işle: önce yerel eşleştirici denenir,
+        yalnızca yerel sonuç yeterince güvenli değilse Gemini API'ye başvurulur.
+        """
+        return self._measure_command(self._process_command_with_gemini, command)
+    
+    def _process_command_with_gemini(self, command: str):
+        # 1. katman: yerel niyet eşleştirici
+        match, local_hit = self._match_locally(command)
+        if local_hit:
+            return self._process_command(command, match)
         
-        Komut: "{command}"
+        if not self.api_key:
+            self._notify("Gemini API anahtarı tanımlanmamış!", logging.WARNING)
+            return self._process_command(command, match)
         
-        Aşağıdaki eylemlerden hangisinin uygun olduğunu belirt:
-        - ısıtıcı_aç_isteği
-        - ısıtıcı_kapat_isteği
-        - kapı_aç_isteği
-        - kapı_kapat_isteği
-        - perde_aç_isteği
-        - perde_kapat_isteği
-        - televizyon_aç_isteği
-        - televizyon_kapat_isteği
-        - ışık_aç_isteği
-        - ışık_kapat_isteği
-        - sıcaklık_artır_isteği
-        - sıcaklık_azalt_isteği
-        - kişi_çıkıyor
-        - kişi_uyuma_hazırlığı
-        - kişi_üşüyor
+        # 2. katman: LLM. Aynı komut (normalize edilmiş haliyle) tekrar geldiğinde ya da
+        # uçuştayken ağa yeniden çıkılmaz
+        start = time.perf_counter()
+        actions = self._llm_actions(command)
+        self._record_tier("llm", bool(actions), time.perf_counter() - start)
         
-        Hangi eylem(ler) gerçekleştirilmeli? Sadece eylem adlarını liste halinde döndür, açıklama ekleme.
+        return self._apply_gemini_actions(command, match, actions)
+    
+    async def process_command_async(self, command: str):
         """
+        process_command_with_gemini'nin asyncio sürümü. LLM çağrısı ve cihaz
+        sürücülerine giden komutlar olay döngüsünü bloklamaz; uçuştaki LLM
+        isteği sayısını paylaşılan LLMBatcher sınırlar.
+        """
+        match, local_hit = self._match_locally(command)
+        if local_hit:
+            return await self._with_async_actuation(self.process_command, command, match)
         
-        api_response = self.call_gemini_api(prompt)
+        if not self.api_key:
+            self._notify("Gemini API anahtarı tanımlanmamış!", logging.WARNING)
+            return await self._with_async_actuation(self.process_command, command, match)
         
-        # API yanıtından eylemleri çıkar
-        actions = [line.strip() for line in api_response.split('\n') if line.strip() and '_isteği' in line.strip() or line.strip() in ["kişi_çıkıyor", "kişi_uyuma_hazırlığı", "kişi_üşüyor"]]
+        start = time.perf_counter()
+        actions = await self._llm_actions_async(command)
+        self._record_tier("llm", bool(actions), time.perf_counter() - start)
         
-        if not actions:
-            print(f"Gemini API'den uygun eylem bulunamadı. Normal işlemeye devam ediliyor.")
-            return self.process_command(command)
-        
-        # Zaman gerçeklerini güncelle
-        self.update_time_facts()
+        return await self._with_async_actuation(self._measure_command, self._apply_gemini_actions,
+                                                command, match, actions)
+    
+    async def _with_async_actuation(self, handler, *args):
+        """handler'ı çalıştır; sürücüsü olan cihazların komutlarını ardından bekle."""
+        if self.dispatcher is None:
+            return handler(*args)
         
-        # Duyguları algıla
-        detected_emotion = self.detect_emotion(command)
+        self._held_devices = {}
+        try:
+            result = handler(*args)
+            await self._actuate_held_async()
+        finally:
+            self._held_devices = None
+        return result
+    
+    def _apply_gemini_actions(self, command: str, match: IntentMatch, actions: List[str]):
+        """LLM'in döndürdüğü eylemleri tek bir toplu işlemde uygula."""
+        if not actions:
+            self._notify("Gemini API'den uygun eylem bulunamadı. Normal işlemeye devam ediliyor.")
+            return self._process_command(command, match)
         
-        # Komut işlemeden önce gerçekleri takip et
-        facts_before = set(self.facts)
+        # Zaman gerçekleri zamanlayıcıdan gelir; yalnızca zamanı gelmiş işler çalışır
+        self._run_due_jobs()
         
-        # API'den gelen eylemleri uygula
-        for action in actions:
-            action = action.strip()
-            if action:
-                self.tell_fact(action)
+        # Tüm gerçek değişiklikleri tek bir değerlendirme geçişinde uygulanır
+        with self.batch():
+            # Duyguları algıla
+            with self._stage("duygu"):
+                detected_emotion = self.detect_emotion(command, match)
+            
+            # Komut işlemeden önce gerçekleri takip et (bit maskesinin kopyası)
+            facts_before = self._fact_bits
             
+            # API'den gelen eylemleri uygula (katalogdaki gerçekler)
+            self.tell_facts(actions)
+            
+            # Kurallar henüz değerlendirilmedi; fark yalnızca komutun gerçeklerini içerir
+            facts_added = SYMBOLS.names(self._fact_bits & ~facts_before)
+        
         # Bu komuttan öğren
-        facts_added = self.facts - facts_before
         self.learn_from_command(command, facts_added)
+        self._retract_command_facts(facts_added, detected_emotion)
         
         return detected_emotion
     
-    def process_command(self, command: str):
-        """Doğal dil komutunu işle."""
-        # Zaman gerçeklerini güncelle
-        self.update_time_facts()
+    def process_command(self, command: str, match: Optional[IntentMatch] = None):
+        """
+        Doğal dil komutunu yerel niyet eşleştirici ile işle. match verilirse
+        (katmanlı işlemede zaten hesaplanmışsa) komut yeniden taranmaz.
+        """
+        return self._measure_command(self._process_command, command, match)
+    
+    def _process_command(self, command: str, match: Optional[IntentMatch]):
+        # Niyet kalıpları ve duygu anahtar kelimeleri tek geçişte aranır
+        if match is None:
+            with self._stage("niyet"):
+                match = self.intent_matcher.match(command)
         
-        # Duyguları algıla
-        detected_emotion = self.detect_emotion(command)
-        
-        # Komutu kolay eşleştirme için küçük harfe çevir
-        command = command.lower()
-        
-        # Komut işlemeden önce gerçekleri takip et
-        facts_before = set(self.facts)
-        
-        # Türkçe komutlar için desen eşleştirme
-        if any(phrase in command for phrase in ["klimayı aç", "ısıtıcıyı aç", "ısıtıcı aç"]):
-            self.tell_fact("ısıtıcı_aç_isteği")
-        elif any(phrase in command for phrase in ["klimayı kapat", "ısıtıcıyı kapat", "ısıtıcı kapat"]):
-            self.tell_fact("ısıtıcı_kapat_isteği")
-        elif any(phrase in command for phrase in ["üşüyorum", "soğuk", "çok soğuk"]):
-            self.tell_fact("kişi_üşüyor")
-        elif any(phrase in command for phrase in ["kapıyı aç", "kapı aç"]):
-            self.tell_fact("kapı_aç_isteği")
-        elif any(phrase in command for phrase in ["kapıyı kapat", "kapı kapat"]):
-            self.tell_fact("kapı_kapat_isteği")
-        elif any(phrase in command for phrase in ["perdeyi aç", "perdeleri aç", "perde aç"]):
-            self.tell_fact("perde_aç_isteği")
-        elif any(phrase in command for phrase in ["perdeyi kapat", "perdeleri kapat", "perde kapat"]):
-            self.tell_fact("perde_kapat_isteği")
-        elif any(phrase in command for phrase in ["televizyonu aç", "tv aç", "tv'yi aç"]):
-            self.tell_fact("televizyon_aç_isteği")
-        elif any(phrase in command for phrase in ["televizyonu kapat", "tv kapat", "tv'yi kapat"]):
-            self.tell_fact("televizyon_kapat_isteği")
-        elif any(phrase in command for phrase in ["ışıkları aç", "lambayı aç", "ışık aç"]):
-            self.tell_fact("ışık_aç_isteği")
-        elif any(phrase in command for phrase in ["ışıkları kapat", "lambayı kapat", "ışık kapat"]):
-            self.tell_fact("ışık_kapat_isteği")
-        elif any(phrase in command for phrase in ["sıcaklığı arttır", "daha sıcak"]):
-            self.tell_fact("sıcaklık_artır_isteği")
-            self._adjust_heater_temp(1.0)
-        elif any(phrase in command for phrase in ["sıcaklığı azalt", "daha soğuk"]):
-            self.tell_fact("sıcaklık_azalt_isteği")
-            self._adjust_heater_temp(-1.0)
-        elif "çıkıyorum" in command or "gidiyorum" in command:
-            self.tell_fact("kişi_çıkıyor")
-        elif "uyumak" in command:
-            self.tell_fact("kişi_uyuma_hazırlığı")
-        else:
-            print(f"Anlaşılamadı: {command}")
+        # Zaman gerçekleri zamanlayıcıdan gelir; yalnızca zamanı gelmiş işler çalışır
+        self._run_due_jobs()
+        
+        # Tüm gerçek değişiklikleri tek bir değerlendirme geçişinde uygulanır
+        with self.batch():
+            # Duyguları algıla
+            with self._stage("duygu"):
+                detected_emotion = self.detect_emotion(command, match)
+            
+            # Komut işlemeden önce gerçekleri takip et (bit maskesinin kopyası)
+            facts_before = self._fact_bits
+            
+            # Bileşik komutlardaki tüm niyetler birlikte eklenir ("ışıkları aç ve perdeyi kapat")
+            if match.intents:
+                self.tell_facts(match.intents)
+                for intent in match.intents:
+                    if intent in self.TEMPERATURE_DELTAS:
+                        self._adjust_heater_temp(self.TEMPERATURE_DELTAS[intent])
+            else:
+                self._notify(f"Anlaşılamadı: {turkish_casefold(command)}")
+            
+            # Kurallar henüz değerlendirilmedi; fark yalnızca komutun gerçeklerini içerir
+            facts_added = SYMBOLS.names(self._fact_bits & ~facts_before)
         
         # Bu komuttan öğren
-        facts_added = self.facts - facts_before
-        self.learn_from_command(command, facts_added)
+        self.learn_from_command(turkish_casefold(command), facts_added)
+        self._retract_command_facts(facts_added, detected_emotion)
         
         return detected_emotion
     
+    def _retract_command_facts(self, facts_added: List[str], emotion: Optional[str] = None):
+        """
+        Komutla gelen istek gerçeklerini ve algılanan duygunun gerçeğini kaldır.
+        Kurallar yalnızca doğruluk değeri değiştiğinde tetiklendiğinden, aynı
+        komut tekrar geldiğinde yeniden tetiklenebilmesi için bu gerçekler
+        komutla sınırlı tutulur; duygular da böylece birikmez.
+        """
+        facts = list(facts_added)
+        if emotion:
+            facts.append(f"{EMOTION_PREFIX}{emotion}")
+        self.retract_facts(facts)
+    
     def get_device_status(self):
         """Tüm cihazların mevcut durumunu döndür."""
         status = {}
@@ -454,18 +1199,31 @@ class LogicAgent:
     def display_rules(self):
         """Tüm kuralları görüntüle."""
         print("\nMevcut Kurallar:")
-        for condition, action in self.rules.items():
+        for condition, action in self.rules:
             print(f"- EĞER {condition} İSE {action}")
 
 
+@lru_cache(maxsize=None)
+def default_rule_base() -> RuleNetwork:
+    """Tüm ajanların paylaştığı, bir kez derlenen değişmez varsayılan kural tabanı."""
+    network = RuleNetwork()
+    for rule in LogicAgent.BASIC_RULES + LogicAgent.ADVANCED_RULES:
+        network.add(*parse_rule(rule))
+    return network.freeze()
+
+
 def run_demo():
     """LogicAgent'in basit bir interaktif demosunu çalıştır."""
     print("Akıllı Ev Mantık Ajanı")
     print("=" * 50)
     
+    # Ajan olayları konsola yazılır
+    bus = EventBus()
+    bus.subscribe(print_event)
+    
     # Ajanı Gemini API anahtarı ile başlat
     gemini_api_key = "Lütfen Buraya Kendi APInizi giriniz"
-    agent = LogicAgent(api_key=gemini_api_key)
+    agent = LogicAgent(api_key=gemini_api_key, event_bus=bus)
     
     print("\nMevcut cihaz durumları:")
     print(json.dumps(agent.get_device_status(), indent=2, ensure_ascii=False))
@@ -0,0 +1,106 @@
+"""
+Tek süreçte birden fazla evi eşzamanlı işleyen asyncio ön yüzü.
+
+Her ev kimliği için ayrı bir LogicAgent ve ayrı bir kilit tutulur: aynı
+evin komutları sırayla işlenirken farklı evlerin komutları birbirini
+beklemez. LLM'e giden komutlar paylaşılan bir LLMBatcher'da kısa bir
+pencere boyunca toplanıp tek istekte gönderilir, aynı komutlar birleştirilir;
+uç noktaya aynı anda gönderilebilecek toplu istek sayısı sınırlıdır, sınır
+dolduğunda yeni istekler sırada bekler.
+"""
+
+import asyncio
+import weakref
+from typing import Callable, Optional, Set
+
+from agent_registry import AgentRegistry
+from app import LogicAgent
+from events import EventBus
+from gemini_client import GeminiClient
+from llm_batcher import DEFAULT_WINDOW, LLMBatcher
+from metrics import AgentMetrics
+from scheduler import Job
+
+DEFAULT_MAX_INFLIGHT_LLM = 8
+
+
+class AsyncAgentHub:
+    """Ev kimliğine göre ajanları yöneten ve komutları eşzamanlı işleyen merkez."""
+
+    def __init__(self, api_key: Optional[str] = None, llm_endpoint: Optional[str] = None,
+                 max_inflight_llm: int = DEFAULT_MAX_INFLIGHT_LLM,
+                 agent_factory: Optional[Callable[[str], LogicAgent]] = None,
+                 gemini_client: Optional[GeminiClient] = None,
+                 event_bus: Optional[EventBus] = None,
+                 metrics: Optional[AgentMetrics] = None,
+                 llm_window: float = DEFAULT_WINDOW):
+        """
+        Ajanlar bir AgentRegistry'de tutulur; agent_factory verilmezse her ev
+        paylaşılan kural tabanını ve Gemini istemcisini kullanır. İstemcinin
+        bağlantı havuzu uçuştaki istek sınırına göre boyutlandırılır; LLM
+        komutları llm_window saniyelik pencerelerde toplanır.
+        """
+        gemini_client = gemini_client or GeminiClient(api_key, llm_endpoint, pool_size=max_inflight_llm)
+        self.registry = AgentRegistry(
+            api_key, llm_endpoint,
+            gemini_client=gemini_client,
+            agent_factory=agent_factory,
+            event_bus=event_bus,
+            metrics=metrics,
+            llm_batcher=LLMBatcher(gemini_client, window=llm_window, max_inflight=max_inflight_llm),
+        )
+        self.max_inflight_llm = max_inflight_llm
+        # Kilit yalnızca onu tutan ya da bekleyen komut varken yaşar; boşta kalan
+        # evlerin kilitleri sözlükten kendiliğinden düşer
+        self._locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        # Kilidi bir komut tarafından tutulan ajanlar; zamanlanmış işleri ertelenir
+        self._busy: Set[LogicAgent] = set()
+
+    def get_agent(self, home_id: str) -> LogicAgent:
+        """Ev için ajanı döndür; yoksa oluştur."""
+        return self.registry.get(home_id)
+
+    def homes(self):
+        """Ajanı oluşturulmuş ev kimliklerini döndür."""
+        return list(self.registry)
+
+    def _lock_for(self, home_id: str) -> asyncio.Lock:
+        lock = self._locks.get(home_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[home_id] = lock
+        return lock
+
+    async def process_command_async(self, home_id: str, command: str):
+        """
+        Evin komutunu işle ve algılanan duyguyu döndür. Aynı evin komutları
+        sırayla işlenir; LLM beklenirken diğer evlerin komutları ilerler.
+        """
+        async with self._lock_for(home_id):
+            agent = self.get_agent(home_id)
+            self._busy.add(agent)
+            try:
+                return await agent.process_command_async(command)
+            finally:
+                self._busy.discard(agent)
+
+    async def process_many(self, commands):
+        """(ev kimliği, komut) çiftlerini eşzamanlı işle; sonuçları aynı sırayla döndür."""
+        return await asyncio.gather(*(self.process_command_async(home_id, command)
+                                      for home_id, command in commands))
+
+    async def run_scheduler(self, stop: Optional[asyncio.Event] = None):
+        """
+        Paylaşılan zamanlayıcıyı çalıştır: zaman dilimi gerçekleri ve
+        zamanlanmış tetikleyiciler komut beklemeden, sınır anlarında işlenir.
+        Komutu işlenmekte olan (LLM'i bekleyen) bir evin işleri, evin kilidi
+        bırakılana kadar ertelenir.
+        """
+        await self.registry.scheduler.run(stop, defer=self._is_busy)
+
+    def _is_busy(self, job: Job) -> bool:
+        return job.owner in self._busy
+
+    def close(self):
+        """Paylaşılan HTTP istemcisini kapat."""
+        self.registry.close()
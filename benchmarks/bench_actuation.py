@@ -0,0 +1,64 @@
+"""
+Cihaz komutu verim ölçümü.
+
+Benzetim sürücüsü (SimulatedDriver) ile her cihaz komutuna yapay gecikme
+eklenir ve birden fazla cihazı aynı anda değiştiren komutların saniyedeki
+sayısı ölçülür. --workers 1 seri yürütmeyi, daha büyük değerler paralel
+yürütmeyi gösterir.
+
+Kullanım:
+    python benchmarks/bench_actuation.py --commands 50 --latency 0.02 --workers 8
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import LogicAgent  # noqa: E402
+from devices import DeviceDispatcher, SimulatedDriver  # noqa: E402
+
+# Her komut üç cihazı birlikte değiştirir
+COMMANDS = ("perdeyi aç, televizyonu aç ve ışıkları aç", "perdeyi kapat, televizyonu kapat ve ışıkları kapat")
+
+
+def measure(commands: int, latency: float, workers: int) -> dict:
+    """commands adet komutu işle ve verim ile sürücü çağrı sayısını döndür."""
+    driver = SimulatedDriver(latency=latency)
+    dispatcher = DeviceDispatcher(default_driver=driver, max_workers=workers)
+    agent = LogicAgent(dispatcher=dispatcher)
+
+    start = time.perf_counter()
+    for index in range(commands):
+        agent.process_command(COMMANDS[index % 2])
+        # Aynı komutun tekrarı cihaza yeniden gönderilmez (birleştirme)
+        agent.process_command(COMMANDS[index % 2])
+    elapsed = time.perf_counter() - start
+    dispatcher.close()
+
+    return {
+        "komut_sayısı": commands * 2,
+        "gecikme_sn": latency,
+        "iş_parçacığı": workers,
+        "süre_sn": elapsed,
+        "komut_per_sn": commands * 2 / elapsed,
+        "sürücü_çağrısı": driver.calls,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cihaz komutu verimini ölç")
+    parser.add_argument("--commands", type=int, default=50, help="Farklı komut sayısı")
+    parser.add_argument("--latency", type=float, default=0.02, help="Cihaz başına benzetim gecikmesi (sn)")
+    parser.add_argument("--workers", type=int, default=8, help="Eşzamanlı cihaz komutu sayısı")
+    args = parser.parse_args(argv)
+
+    result = measure(args.commands, args.latency, args.workers)
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
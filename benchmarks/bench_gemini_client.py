@@ -0,0 +1,206 @@
+"""
+Gemini istemcisinin yerel sahte HTTP sunucusuna karşı denetimi.
+
+Sahte uç nokta, sıraya konan yanıtları (durum kodu, gecikme) sırayla
+döndürür; sıra boşsa 200 ile yanıt verir. Şunlar doğrulanır ve ölçülür:
+
+- 5xx ve 429 yanıtlarında üstel geri çekilmeyle yeniden deneme,
+- yeniden denenmeyen durum kodları (örn. 400) ve tükenen deneme hakkı,
+- okuma zaman aşımında isteğin kesilip yeniden denenmesi,
+- normalize edilmiş komut anahtarlarıyla önbellek isabet oranı.
+
+Kullanım:
+    python benchmarks/bench_gemini_client.py --commands 500 --distinct 50
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gemini_client import GeminiAPIError, GeminiClient, normalize_command  # noqa: E402
+
+
+class StubServer:
+    """Sıraya konan (durum kodu, gecikme) yanıtlarını döndüren sahte generateContent uç noktası."""
+
+    def __init__(self):
+        self.requests = 0
+        self._script = deque()
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(handler):
+                body = json.loads(handler.rfile.read(int(handler.headers["Content-Length"])))
+                with stub._lock:
+                    stub.requests += 1
+                    status, delay = stub._script.popleft() if stub._script else (200, 0.0)
+                if delay:
+                    time.sleep(delay)
+
+                if status == 200:
+                    prompt = body["contents"][0]["parts"][0]["text"]
+                    reply = {"candidates": [{"content": {"parts": [{"text": f"yanıt: {prompt}"}]}}]}
+                else:
+                    reply = {"error": {"code": status}}
+                data = json.dumps(reply, ensure_ascii=False).encode("utf-8")
+                try:
+                    handler.send_response(status)
+                    handler.send_header("Content-Type", "application/json")
+                    handler.send_header("Content-Length", str(len(data)))
+                    handler.end_headers()
+                    handler.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    # İstemci zaman aşımıyla bağlantıyı kapatmış olabilir
+                    pass
+
+            def log_message(handler, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}/generate"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def script(self, *responses):
+        """Sonraki isteklere sırayla verilecek (durum kodu, gecikme) yanıtlarını ekle."""
+        with self._lock:
+            self._script.extend(responses)
+
+    def reset(self):
+        with self._lock:
+            self._script.clear()
+            self.requests = 0
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def make_client(stub: StubServer, delays: list, **kwargs) -> GeminiClient:
+    """Geri çekilme beklemelerini gerçekten uyumak yerine delays'e kaydeden istemci."""
+    return GeminiClient("sahte-anahtar", stub.url, sleep=delays.append, **kwargs)
+
+
+def check_retries(stub: StubServer) -> dict:
+    """Geçici hatalarda yeniden deneme, kalıcı hatalarda hemen vazgeçme."""
+    delays = []
+    client = make_client(stub, delays, max_retries=3, backoff_factor=0.5)
+    try:
+        # 503, 500 ve 429 yeniden denenir; dördüncü deneme başarılı olur
+        stub.reset()
+        stub.script((503, 0.0), (500, 0.0), (429, 0.0))
+        assert client.generate("selam") == "yanıt: selam"
+        assert stub.requests == 4 and client.retries == 3, (stub.requests, client.retries)
+        assert delays == [0.5, 1.0, 2.0], delays
+
+        # 400 yeniden denenmez
+        stub.reset()
+        stub.script((400, 0.0))
+        try:
+            client.generate("bozuk istek")
+        except GeminiAPIError as e:
+            assert e.status_code == 400, e.status_code
+        else:
+            raise AssertionError("400 yanıtı hata fırlatmalı")
+        assert stub.requests == 1, stub.requests
+
+        # Deneme hakkı tükenince son durum koduyla vazgeçilir
+        stub.reset()
+        stub.script(*[(502, 0.0)] * (client.max_retries + 1))
+        try:
+            client.generate("hep hata")
+        except GeminiAPIError as e:
+            assert e.status_code == 502, e.status_code
+        else:
+            raise AssertionError("Tükenen denemeler hata fırlatmalı")
+        assert stub.requests == client.max_retries + 1, stub.requests
+        return {"geri_çekilme_sn": delays[:3], **client.stats()}
+    finally:
+        client.close()
+
+
+def check_timeout(stub: StubServer, timeout: float) -> dict:
+    """Yavaş yanıtlar zaman aşımıyla kesilir ve yeniden denenir."""
+    delays = []
+    client = make_client(stub, delays, timeout=(1.0, timeout), max_retries=1)
+    try:
+        # İlk yanıt zaman aşımından uzun sürer, ikincisi hemen gelir
+        stub.reset()
+        stub.script((200, timeout * 4))
+        start = time.perf_counter()
+        assert client.generate("yavaş") == "yanıt: yavaş"
+        recovered = time.perf_counter() - start
+        assert stub.requests == 2 and client.retries == 1, (stub.requests, client.retries)
+        assert recovered < timeout * 3, recovered
+
+        # Her deneme zaman aşımına uğrarsa bekleme sınırlıdır
+        stub.reset()
+        stub.script((200, timeout * 4), (200, timeout * 4))
+        start = time.perf_counter()
+        try:
+            client.generate("hep yavaş")
+        except GeminiAPIError as e:
+            assert e.status_code is None, e.status_code
+        else:
+            raise AssertionError("Zaman aşımı hata fırlatmalı")
+        failed = time.perf_counter() - start
+        assert failed < timeout * 2 * 3, failed
+        return {"okuma_zaman_aşımı_sn": timeout, "toparlanma_sn": recovered, "vazgeçme_sn": failed}
+    finally:
+        client.close()
+
+
+def check_cache(stub: StubServer, commands: int, distinct: int) -> dict:
+    """Büyük/küçük harf ve boşluk farkları aynı önbellek anahtarına düşer."""
+    client = make_client(stub, [])
+    try:
+        stub.reset()
+        start = time.perf_counter()
+        for index in range(commands):
+            command = f"Işıkları  AÇ #{index % distinct}" if index % 2 else f"ışıkları aç #{index % distinct}"
+            client.generate(command, cache_key=normalize_command(command))
+        elapsed = time.perf_counter() - start
+
+        unique = min(commands, distinct)
+        expected_rate = (commands - unique) / commands if commands else 0.0
+        assert stub.requests == unique, (stub.requests, unique)
+        assert abs(client.cache.hit_rate - expected_rate) < 1e-9, client.cache.hit_rate
+        return {
+            "komut_sayısı": commands,
+            "http_isteği": stub.requests,
+            "önbellek_isabet_oranı": client.cache.hit_rate,
+            "komut_per_sn": commands / elapsed,
+        }
+    finally:
+        client.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gemini istemcisini yerel sahte sunucuya karşı denetle")
+    parser.add_argument("--commands", type=int, default=500, help="Önbellek denetimindeki komut sayısı")
+    parser.add_argument("--distinct", type=int, default=50, help="Farklı komut sayısı")
+    parser.add_argument("--timeout", type=float, default=0.2, help="Okuma zaman aşımı (sn)")
+    args = parser.parse_args(argv)
+
+    stub = StubServer()
+    try:
+        result = {
+            "yeniden_deneme": check_retries(stub),
+            "zaman_aşımı": check_timeout(stub, args.timeout),
+            "önbellek": check_cache(stub, args.commands, args.distinct),
+        }
+    finally:
+        stub.close()
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+LLM istek birleştirme ve mikro toplu işleme ölçümü.
+
+Yerel bir sahte Gemini uç noktası başlatır (her istekte yapay gecikme
+uygular ve numaralı komutlara JSON yanıt üretir). Yerel eşleştiricinin
+anlayamadığı komutlar AsyncAgentHub üzerinden eşzamanlı işlenir; farklı
+toplama pencereleri için uç noktaya giden HTTP isteği sayısı, ortalama
+toplu boyut, birleştirilen komut sayısı ve verim raporlanır. Her komutun
+eylemlerinin evin cihazlarına uygulandığı da doğrulanır.
+
+Kullanım:
+    python benchmarks/bench_llm_batching.py --commands 2000 --windows 0 0.01 0.05
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from async_agent import AsyncAgentHub  # noqa: E402
+
+# Yerel eşleştiricinin anlamadığı komutlar ve sahte modelin döndürdüğü eylemler
+PHRASES = {
+    "biraz karanlık oldu": ["ışık_aç_isteği"],
+    "film izlemek istiyorum": ["televizyon_aç_isteği"],
+    "dışarıyı görmek istiyorum": ["perde_aç_isteği"],
+    "burası fırın gibi": ["sıcaklık_azalt_isteği"],
+    "misafir geliyor": ["kapı_aç_isteği"],
+    "bir şey yapma": [],
+}
+
+# Komuttan sonra beklenen cihaz durumu (LLM gerçeği ilgili kuralı tetikler)
+EXPECTED_DEVICES = {
+    "biraz karanlık oldu": ("ışık", True),
+    "film izlemek istiyorum": ("televizyon", True),
+    "dışarıyı görmek istiyorum": ("perde", True),
+    "misafir geliyor": ("kapı", True),
+}
+
+_COMMAND_LINE = re.compile(r'^(\d+)\. (".*")$', re.MULTILINE)
+
+
+class MockGemini:
+    """generateContent biçiminde yanıt veren sahte uç nokta."""
+
+    def __init__(self, latency: float):
+        self.requests = 0
+        self.commands = 0
+        self._lock = threading.Lock()
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(handler):
+                body = json.loads(handler.rfile.read(int(handler.headers["Content-Length"])))
+                prompt = body["contents"][0]["parts"][0]["text"]
+                commands = [(int(number), json.loads(text)) for number, text in _COMMAND_LINE.findall(prompt)]
+                with mock._lock:
+                    mock.requests += 1
+                    mock.commands += len(commands)
+                time.sleep(latency)
+
+                results = []
+                for number, command in commands:
+                    actions = next((actions for phrase, actions in PHRASES.items() if phrase in command), [])
+                    results.append({"no": number, "eylemler": actions})
+                text = json.dumps({"komutlar": results}, ensure_ascii=False)
+                # Modeller yanıtı çoğu zaman kod bloğu içinde döndürür
+                reply = json.dumps({"candidates": [{"content": {"parts": [{"text": f"```json\n{text}\n```"}]}}]})
+
+                data = reply.encode("utf-8")
+                handler.send_response(200)
+                handler.send_header("Content-Type", "application/json")
+                handler.send_header("Content-Length", str(len(data)))
+                handler.end_headers()
+                handler.wfile.write(data)
+
+            def log_message(handler, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}/generate"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def make_commands(count: int, homes: int, distinct: int):
+    """(ev, komut) çiftleri; komut metinleri distinct farklı değer alır."""
+    phrases = list(PHRASES)
+    return [(f"ev-{index % homes}", f"{phrases[index % len(phrases)]} #{index % distinct}")
+            for index in range(count)]
+
+
+def measure(commands, window: float, latency: float, max_inflight: int) -> dict:
+    mock = MockGemini(latency)
+    hub = AsyncAgentHub(api_key="sahte-anahtar", llm_endpoint=mock.url, max_inflight_llm=max_inflight,
+                        llm_window=window)
+    try:
+        start = time.perf_counter()
+        asyncio.run(hub.process_many(commands))
+        elapsed = time.perf_counter() - start
+
+        # LLM'den gelen gerçekler kuralları tetiklemiş olmalı
+        for home_id, command in commands:
+            expected = EXPECTED_DEVICES.get(command.split(" #")[0])
+            if expected is not None:
+                device, state = expected
+                assert hub.get_agent(home_id).devices[device] == state, (home_id, command)
+        stats = hub.registry.llm_batcher.stats()
+    finally:
+        hub.close()
+        mock.close()
+
+    return {
+        "pencere_sn": window,
+        "komut_sayısı": len(commands),
+        "http_isteği": mock.requests,
+        "modele_giden_komut": mock.commands,
+        "birleştirilen": stats["birleştirilen"],
+        "önbellek_isabet": stats["önbellek_isabet"],
+        "ortalama_toplu_boyut": stats["ortalama_toplu_boyut"],
+        "süre_sn": elapsed,
+        "komut_per_sn": len(commands) / elapsed,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="LLM istek birleştirme ve toplu işleme ölçümü (sahte uç nokta)")
+    parser.add_argument("--commands", type=int, default=2000, help="Komut sayısı")
+    parser.add_argument("--homes", type=int, default=200, help="Ev sayısı")
+    parser.add_argument("--distinct", type=int, default=500, help="Farklı komut metni sayısı")
+    parser.add_argument("--windows", type=float, nargs="+", default=[0.0, 0.01, 0.05],
+                        help="Toplama pencereleri (sn)")
+    parser.add_argument("--latency", type=float, default=0.05, help="Sahte uç noktanın istek başına gecikmesi (sn)")
+    parser.add_argument("--max-inflight", type=int, default=8, help="Aynı anda uçuştaki en fazla istek")
+    args = parser.parse_args(argv)
+
+    commands = make_commands(args.commands, args.homes, args.distinct)
+    results = [measure(commands, window, args.latency, args.max_inflight) for window in args.windows]
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
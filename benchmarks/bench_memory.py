@@ -0,0 +1,68 @@
+"""
+Ev başına bellek kullanımı ölçümü.
+
+AgentRegistry ile çok sayıda ev oluşturur ve tracemalloc ile ev başına
+ayrılan bayt miktarını raporlar. Karşılaştırma için aynı sayıda evin
+her biri kendi kural tabanı kopyasıyla da ölçülebilir (--no-share).
+
+Kullanım:
+    python benchmarks/bench_memory.py --homes 10000
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent_registry import AgentRegistry  # noqa: E402
+from app import LogicAgent, default_rule_base  # noqa: E402
+
+
+def measure(homes: int, share: bool) -> dict:
+    """homes adet ev oluştur ve ev başına ayrılan belleği döndür."""
+    registry = AgentRegistry()
+    if not share:
+        registry._agent_factory = lambda home_id: LogicAgent(
+            gemini_client=registry.gemini, rule_base=default_rule_base().copy())
+
+    # Paylaşılan yapılar (kural tabanı, eşleştirici) ölçümden önce oluşturulsun
+    with contextlib.redirect_stdout(io.StringIO()):
+        registry.get("ısınma")
+    gc.collect()
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for index in range(homes):
+            registry.get(f"ev-{index}")
+    gc.collect()
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "ev_sayısı": homes,
+        "kural_tabanı_paylaşımlı": share,
+        "toplam_bayt": after - before,
+        "ev_başına_bayt": (after - before) / homes,
+        "tepe_bayt": peak - before,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ev başına bellek kullanımını ölç")
+    parser.add_argument("--homes", type=int, default=10000, help="Oluşturulacak ev sayısı")
+    parser.add_argument("--no-share", action="store_true", help="Her ev için kural tabanını kopyala")
+    args = parser.parse_args(argv)
+
+    result = measure(args.homes, share=not args.no_share)
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
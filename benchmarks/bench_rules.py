@@ -0,0 +1,259 @@
+"""
+Kural motoru ölçüm takımı.
+
+Sentetik kural tabanları (10 - 100k kural; koşul derinliği ve gerçek başına
+kural sayısı ayarlanabilir) ve komut akışları üretir. Her kural tabanı için:
+
+- derleme süresi,
+- tell_fact / retract_fact gecikme yüzdelikleri ve verim,
+- tüm kuralların değerlendirilmesi (_evaluate_rules) gecikmesi,
+- ölçüm sırasında ayrılan bellek (tracemalloc) ve ajan başına bellek,
+
+ayrıca varsayılan kural tabanıyla uçtan uca process_command süresi ölçülür.
+Sonuçlar karşılaştırılabilmesi için JSON olarak yazılır. --profile ile sıcak
+yol cProfile altında çalıştırılır ve .prof dosyası kaydedilir (snakeviz ya da
+flameprof ile alev grafiğine dönüştürülebilir).
+
+Kullanım:
+    python benchmarks/bench_rules.py --rules 10 1000 100000 --output sonuç.json
+    python benchmarks/bench_rules.py --rules 10000 --profile profil.prof
+"""
+
+import argparse
+import contextlib
+import cProfile
+import datetime
+import gc
+import io
+import json
+import os
+import platform
+import pstats
+import random
+import sys
+import time
+import tracemalloc
+from typing import Dict, List, Sequence, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import LogicAgent  # noqa: E402
+from events import EventBus  # noqa: E402
+from rule_engine import RuleNetwork  # noqa: E402
+
+COMMANDS = (
+    "ışıkları aç", "ışıkları kapat", "perdeyi aç ve televizyonu aç", "perdeyi kapat",
+    "sıcaklığı artır", "çok üşüdüm", "kapıyı kapat, çıkıyorum", "bugün çok yorgunum",
+    "televizyonu kapat", "müzik çal",
+)
+
+
+def generate_rules(count: int, depth: int, fan_in: int, chain: float, rng: random.Random) -> List[Tuple[str, str]]:
+    """
+    count adet sentetik kural üret. Her koşul depth atomdan oluşur; gerçek
+    sözlüğü, her gerçeğe ortalama fan_in kural başvuracak şekilde boyutlanır.
+    chain olasılığıyla bir atom daha önceki bir kuralın sonucudur (döngüsüz
+    ileri zincirleme).
+    """
+    vocabulary = max(8, count * depth // max(1, fan_in))
+    rules = []
+    for index in range(count):
+        atoms = []
+        for _ in range(depth):
+            if index and rng.random() < chain:
+                atom = f"sonuç_{rng.randrange(index)}"
+            else:
+                atom = f"g_{rng.randrange(vocabulary)}"
+            if rng.random() < 0.2:
+                atom = f"!{atom}"
+            atoms.append(atom)
+
+        # Atomları rastgele & ve | ile birleştir; yarısında ilk iki atom parantez içinde
+        condition = atoms[0]
+        for atom in atoms[1:]:
+            condition = f"{condition} {rng.choice('&&|')} {atom}"
+        if depth > 2 and rng.random() < 0.5:
+            condition = f"({atoms[0]} | {atoms[1]}) & " + " & ".join(atoms[2:])
+        rules.append((condition, f"sonuç_{index}"))
+    return rules
+
+
+def percentiles(samples: Sequence[float]) -> Dict[str, float]:
+    """Mikrosaniye cinsinden yüzdelikler."""
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+
+    def at(fraction: float) -> float:
+        return ordered[min(last, int(fraction * last + 0.5))] / 1000.0
+
+    return {
+        "p50_us": at(0.50),
+        "p90_us": at(0.90),
+        "p99_us": at(0.99),
+        "en_yüksek_us": ordered[last] / 1000.0,
+        "ortalama_us": sum(ordered) / len(ordered) / 1000.0,
+    }
+
+
+def build_network(rules: List[Tuple[str, str]]) -> RuleNetwork:
+    network = RuleNetwork()
+    for condition, action in rules:
+        network.add(condition, action)
+    return network.freeze()
+
+
+def fact_stream(rules: List[Tuple[str, str]], operations: int, rng: random.Random) -> List[str]:
+    """Kuralların başvurduğu temel gerçeklerden rastgele bir akış."""
+    facts = sorted({atom.strip("!()") for condition, _ in rules
+                    for atom in condition.replace("(", " ").replace(")", " ").split()
+                    if atom.strip("!").startswith("g_")})
+    return [rng.choice(facts) for _ in range(operations)]
+
+
+def measure_rule_base(count: int, depth: int, fan_in: int, chain: float, operations: int,
+                      agents: int, seed: int) -> Dict:
+    """Tek bir sentetik kural tabanı için tüm ölçümleri yap."""
+    rng = random.Random(seed)
+    rules = generate_rules(count, depth, fan_in, chain, rng)
+
+    start = time.perf_counter()
+    network = build_network(rules)
+    compile_time = time.perf_counter() - start
+
+    agent = LogicAgent(rule_base=network, event_bus=EventBus())
+    stream = fact_stream(rules, operations, rng)
+
+    # Gerçek ekleme/kaldırma gecikmesi (ileri zincirleme dahil)
+    gc.collect()
+    tell_samples = []
+    retract_samples = []
+    start = time.perf_counter()
+    for fact in stream:
+        begin = time.perf_counter_ns()
+        agent.tell_fact(fact)
+        middle = time.perf_counter_ns()
+        agent.retract_fact(fact)
+        tell_samples.append(middle - begin)
+        retract_samples.append(time.perf_counter_ns() - middle)
+    elapsed = time.perf_counter() - start
+
+    # Bellek ayırımları ayrı bir geçişte ölçülür; tracemalloc gecikmeleri şişirir
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    for fact in stream:
+        agent.tell_fact(fact)
+        agent.retract_fact(fact)
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Tüm kuralların değerlendirilmesi (doğruluk değerleri değişmez; yalnızca eşleştirme maliyeti)
+    sweep_samples = []
+    for _ in range(max(3, min(50, 200000 // max(1, count)))):
+        begin = time.perf_counter_ns()
+        agent._evaluate_rules()
+        sweep_samples.append(time.perf_counter_ns() - begin)
+
+    # Aynı kural tabanını paylaşan ajan başına bellek
+    gc.collect()
+    tracemalloc.start()
+    memory_before, _ = tracemalloc.get_traced_memory()
+    homes = [LogicAgent(rule_base=network, event_bus=EventBus()) for _ in range(agents)]
+    memory_after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del homes
+
+    return {
+        "kural_sayısı": count,
+        "derinlik": depth,
+        "gerçek_başına_kural": fan_in,
+        "derleme_sn": compile_time,
+        "işlem_sayısı": operations,
+        "tell_fact": percentiles(tell_samples),
+        "retract_fact": percentiles(retract_samples),
+        "verim_işlem_per_sn": operations * 2 / elapsed,
+        "tam_değerlendirme": percentiles(sweep_samples),
+        "ayrılan_bayt_per_işlem": (after - before) / (operations * 2),
+        "tepe_bayt": peak - before,
+        "ajan_başına_bayt": (memory_after - memory_before) / agents,
+    }
+
+
+def measure_commands(commands: int, seed: int) -> Dict:
+    """Varsayılan kural tabanıyla uçtan uca process_command süresi (konsol çıktısı bastırılır)."""
+    rng = random.Random(seed)
+    stream = [rng.choice(COMMANDS) for _ in range(commands)]
+    agent = LogicAgent(event_bus=EventBus())
+    samples = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for command in stream:
+            begin = time.perf_counter_ns()
+            agent.process_command(command)
+            samples.append(time.perf_counter_ns() - begin)
+        elapsed = time.perf_counter() - start
+    result = {"komut_sayısı": commands, "komut_per_sn": commands / elapsed}
+    result.update(percentiles(samples))
+    return result
+
+
+def profile(count: int, depth: int, fan_in: int, chain: float, operations: int, seed: int, path: str):
+    """Gerçek ekleme/kaldırma döngüsünü cProfile altında çalıştır ve sonucu kaydet."""
+    rng = random.Random(seed)
+    rules = generate_rules(count, depth, fan_in, chain, rng)
+    agent = LogicAgent(rule_base=build_network(rules), event_bus=EventBus())
+    stream = fact_stream(rules, operations, rng)
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    for fact in stream:
+        agent.tell_fact(fact)
+        agent.retract_fact(fact)
+    profiler.disable()
+    profiler.dump_stats(path)
+    pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(25)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Kural motoru gecikme, verim ve bellek ölçümleri")
+    parser.add_argument("--rules", type=int, nargs="+", default=[10, 100, 1000, 10000], help="Kural sayıları")
+    parser.add_argument("--depth", type=int, default=3, help="Koşul başına atom sayısı")
+    parser.add_argument("--fan-in", type=int, default=4, help="Gerçek başına ortalama kural sayısı")
+    parser.add_argument("--chain", type=float, default=0.2, help="Atomun önceki bir kuralın sonucu olma olasılığı")
+    parser.add_argument("--operations", type=int, default=5000, help="Ekleme/kaldırma çifti sayısı")
+    parser.add_argument("--agents", type=int, default=200, help="Ajan başına bellek ölçümündeki ajan sayısı")
+    parser.add_argument("--commands", type=int, default=2000, help="Uçtan uca ölçümdeki komut sayısı")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="JSON sonucun yazılacağı dosya (verilmezse standart çıktı)")
+    parser.add_argument("--profile", metavar="DOSYA", help="Yalnızca ilk kural sayısı için cProfile çalıştır")
+    args = parser.parse_args(argv)
+
+    if args.profile:
+        profile(args.rules[0], args.depth, args.fan_in, args.chain, args.operations, args.seed, args.profile)
+        return
+
+    result = {
+        "zaman": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parametreler": {
+            "derinlik": args.depth, "gerçek_başına_kural": args.fan_in, "zincir": args.chain,
+            "işlem_sayısı": args.operations, "tohum": args.seed,
+        },
+        "kural_tabanları": [
+            measure_rule_base(count, args.depth, args.fan_in, args.chain, args.operations, args.agents, args.seed)
+            for count in args.rules
+        ],
+        "process_command": measure_commands(args.commands, args.seed),
+    }
+
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            output.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Kalıcı durum deposu ölçümü.
+
+Farklı uzunlukta komut geçmişleri üretir ve her biri için açılışta geri
+yükleme süresini, oynatılan günlük kaydı sayısını ve yazma büyütmesini
+(diske yazılan bayt / günlük kaydı baytı) raporlar. --snapshot-every 0 ile
+anlık görüntü kapatılarak tüm günlüğün oynatıldığı durumla karşılaştırılabilir.
+
+Kullanım:
+    python benchmarks/bench_state_store.py --history 200 2000 10000 --snapshot-every 1000
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import LogicAgent  # noqa: E402
+from events import EventBus  # noqa: E402
+from state_store import StateStore  # noqa: E402
+
+COMMANDS = ("ışıkları aç", "perdeyi aç", "sıcaklığı artır", "ışıkları kapat", "perdeyi kapat", "televizyonu aç")
+
+
+def measure(history: int, snapshot_every: int, sync_every: int) -> dict:
+    """history adet komutluk geçmiş üret, ardından geri yükleme süresini ölç."""
+    with tempfile.TemporaryDirectory() as directory:
+        store = StateStore(directory, sync_every=sync_every, snapshot_every=snapshot_every)
+        agent = LogicAgent(event_bus=EventBus())
+        store.restore(agent)
+        store.attach(agent)
+        for index in range(history):
+            agent.process_command(COMMANDS[index % len(COMMANDS)])
+        store.close()
+        stats = store.stats()
+
+        start = time.perf_counter()
+        restored = LogicAgent(event_bus=EventBus())
+        store = StateStore(directory, snapshot_every=snapshot_every)
+        replayed = store.restore(restored)
+        elapsed = time.perf_counter() - start
+        store.close()
+
+        assert restored.facts == agent.facts and dict(restored.devices) == dict(agent.devices)
+
+    return {
+        "geçmiş_komut": history,
+        "geri_yükleme_sn": elapsed,
+        "oynatılan_kayıt": replayed,
+        "fsync_sayısı": stats["fsync_sayısı"],
+        "anlık_görüntü_sayısı": stats["anlık_görüntü_sayısı"],
+        "yazma_büyütmesi": stats["yazma_büyütmesi"],
+    }
+
+
+def check_rule_actions_not_replayed() -> None:
+    """
+    Kuralın açtığı ve sonradan elle kapatılan cihaz geri yüklemede kapalı
+    kalmalı: kayıttaki gerçekler kuralı yeniden tetiklememeli.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        store = StateStore(directory)
+        agent = LogicAgent(event_bus=EventBus())
+        store.restore(agent)
+        store.attach(agent)
+        agent.tell_fact("kişi_üşüyor")
+        assert agent.devices["ısıtıcı"]
+        agent.process_command("ısıtıcıyı kapat")
+        assert not agent.devices["ısıtıcı"]
+        store.close()
+
+        restored = LogicAgent(event_bus=EventBus())
+        store = StateStore(directory)
+        store.restore(restored)
+        store.close()
+
+        assert not restored.devices["ısıtıcı"]
+        assert restored.facts == agent.facts and dict(restored.devices) == dict(agent.devices)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Durum deposunun geri yükleme süresini ve yazma büyütmesini ölç")
+    parser.add_argument("--history", type=int, nargs="+", default=[200, 2000, 10000], help="Geçmiş uzunlukları")
+    parser.add_argument("--snapshot-every", type=int, default=1000, help="Anlık görüntü aralığı (kayıt, 0 = kapalı)")
+    parser.add_argument("--sync-every", type=int, default=64, help="fsync aralığı (kayıt)")
+    args = parser.parse_args(argv)
+
+    check_rule_actions_not_replayed()
+    results = [measure(history, args.snapshot_every, args.sync_every) for history in args.history]
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
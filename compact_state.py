@@ -0,0 +1,81 @@
+"""
+Ev başına tutulan durum için sıkıştırılmış veri yapıları.
+
+Binlerce ev aynı süreçte tutulduğunda her ev için ayrı sözlükler ciddi
+bellek tüketir. Buradaki yapılar isim tablolarını evler arasında paylaşır
+ve ev başına yalnızca küçük bir tam sayı (bit maskesi) saklar.
+"""
+
+from collections.abc import MutableMapping
+from functools import lru_cache
+from typing import Dict, Iterator, Tuple
+
+# Varsayılan cihazlar (sıra bit konumunu belirler)
+DEFAULT_DEVICES: Tuple[str, ...] = ("ısıtıcı", "kapı", "perde", "televizyon", "ışık")
+
+# Cihaz adı demeti -> ad: bit konumu. Aynı cihaz kümesine sahip evler aynı dizini paylaşır;
+# önbellek sınırlıdır, çıkarılan bir düzenin dizini onu kullanan evlerde kalır
+DEVICE_INDEX_CACHE_SIZE = 256
+
+
+@lru_cache(maxsize=DEVICE_INDEX_CACHE_SIZE)
+def _device_index(names: Tuple[str, ...]) -> Dict[str, int]:
+    return {name: position for position, name in enumerate(names)}
+
+
+class DeviceStates(MutableMapping):
+    """
+    Cihaz adı -> açık/kapalı eşlemesi; durumlar tek bir tam sayının
+    bitlerinde tutulur. Sözlük gibi kullanılır (devices["ışık"] = True).
+    """
+
+    __slots__ = ("_names", "_index", "_bits")
+
+    def __init__(self, names: Tuple[str, ...] = DEFAULT_DEVICES, bits: int = 0):
+        self._names = names
+        self._index = _device_index(names)
+        self._bits = bits
+
+    @property
+    def bits(self) -> int:
+        """Tüm cihaz durumlarının bit maskesi (anlık görüntü için)."""
+        return self._bits
+
+    @bits.setter
+    def bits(self, bits: int):
+        self._bits = bits
+
+    def __getitem__(self, device: str) -> bool:
+        return bool(self._bits >> self._index[device] & 1)
+
+    def __setitem__(self, device: str, is_on: bool):
+        position = self._index.get(device)
+        if position is None:
+            # Yeni cihaz: paylaşılan ad tablosu değiştirilmez, genişletilmiş tabloya geçilir
+            self._names = self._names + (device,)
+            self._index = _device_index(self._names)
+            position = self._index[device]
+        if is_on:
+            self._bits |= 1 << position
+        else:
+            self._bits &= ~(1 << position)
+
+    def __delitem__(self, device: str):
+        position = self._index[device]
+        low = self._bits & ((1 << position) - 1)
+        high = self._bits >> (position + 1)
+        self._names = self._names[:position] + self._names[position + 1:]
+        self._index = _device_index(self._names)
+        self._bits = low | (high << position)
+
+    def __contains__(self, device) -> bool:
+        return device in self._index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._names)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __repr__(self):
+        return repr(dict(self.items()))
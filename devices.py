@@ -0,0 +1,237 @@
+"""
+Cihaz sürücüsü katmanı.
+
+Kural eylemleri (``ışık_aç``, ``uyku_ortamı_hazırla`` ...) bir eylem
+tablosunda veri olarak tanımlanır ve sabit sürede cihaz komutlarına
+çözülür. Cihaz komutları cihaz adına göre kayıtlı sürücülere iletilir;
+farklı cihazların komutları bir iş parçacığı havuzunda eşzamanlı yürütülür
+ve her cihaz için ayrı zaman aşımı uygulanır. asyncio ön yüzü aynı
+havuzu ``actuate_async`` ile olay döngüsünü bloklamadan bekler.
+
+Sürücü, ``driver(device, state)`` biçiminde çağrılabilen herhangi bir
+nesnedir; hata fırlatması komutun başarısız olduğu anlamına gelir.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, Iterable, Mapping, Optional, Tuple
+
+from compact_state import DEFAULT_DEVICES
+
+Driver = Callable[[str, bool], None]
+
+# Eylem adının cihaz komutu olarak yorumlanan ekleri
+ON_SUFFIX = "_aç"
+OFF_SUFFIX = "_kapat"
+
+DEFAULT_DEVICE_TIMEOUT = 2.0
+
+
+class Action:
+    """Bir eylemin verisi: sırayla istenen cihaz durumları ve isteğe bağlı bildirim."""
+
+    __slots__ = ("name", "devices", "message")
+
+    def __init__(self, name: str, devices: Iterable[Tuple[str, bool]] = (), message: Optional[str] = None):
+        self.name = name
+        self.devices = tuple(devices)
+        self.message = message
+
+    def __repr__(self):
+        return f"Action({self.name!r}, devices={self.devices}, message={self.message!r})"
+
+
+# Bileşik eylemler: (eylem, [(cihaz, durum)], bildirim)
+COMPOSITE_ACTIONS: Tuple[Tuple[str, Tuple[Tuple[str, bool], ...], Optional[str]], ...] = (
+    ("mutlu_ortam_ışığı", (("ışık", True),), "Mutlu ortam ışığı ayarlanıyor: parlak, sıcak tonlar"),
+    ("neşeli_müzik_çal", (), "Moral yükseltici müzik çalınıyor..."),
+    ("uyku_ortamı_hazırla", (("televizyon", False), ("ışık", False), ("perde", False)),
+     "Uyku ortamı hazırlanıyor: perdeler kapatılıyor, ışıklar söndürülüyor."),
+)
+
+
+def device_command(action: str) -> Optional[Tuple[str, bool]]:
+    """``<cihaz>_aç`` / ``<cihaz>_kapat`` biçimindeki eylemi (cihaz, durum) olarak çöz."""
+    if action.endswith(ON_SUFFIX):
+        return action[:-len(ON_SUFFIX)], True
+    if action.endswith(OFF_SUFFIX):
+        return action[:-len(OFF_SUFFIX)], False
+    return None
+
+
+class ActionTable:
+    """
+    Eylem adı -> Action sevk tablosu. Tabloda olmayan ``<cihaz>_aç`` ve
+    ``<cihaz>_kapat`` eylemleri ada göre çözülür; böylece yeni bir cihaz
+    eklemek için tabloyu değiştirmek gerekmez.
+    """
+
+    def __init__(self, devices: Iterable[str] = DEFAULT_DEVICES, composites=COMPOSITE_ACTIONS):
+        self._actions: Dict[str, Action] = {}
+        for device in devices:
+            self.register(f"{device}{ON_SUFFIX}", [(device, True)])
+            self.register(f"{device}{OFF_SUFFIX}", [(device, False)])
+        for name, device_states, message in composites:
+            self.register(name, device_states, message)
+
+    def __contains__(self, action: str) -> bool:
+        return action in self._actions
+
+    def __len__(self):
+        return len(self._actions)
+
+    def register(self, name: str, devices: Iterable[Tuple[str, bool]] = (), message: Optional[str] = None) -> Action:
+        """Eylemi tanımla ya da değiştir."""
+        action = Action(name, devices, message)
+        self._actions[name] = action
+        return action
+
+    def resolve(self, name: str) -> Optional[Action]:
+        """Eylemin tanımını döndür; tanımlı değilse ve cihaz komutu değilse None."""
+        action = self._actions.get(name)
+        if action is None:
+            command = device_command(name)
+            if command is not None:
+                action = Action(name, (command,))
+        return action
+
+
+class SimulatedDriver:
+    """
+    Yerel benzetim sürücüsü: her komutta ``latency`` saniye bekler ve son
+    durumları kaydeder. ``fail_devices`` içindeki cihazlar için hata fırlatır.
+    Verim ölçümleri ve denemeler içindir.
+    """
+
+    def __init__(self, latency: float = 0.0, fail_devices: Iterable[str] = (),
+                 sleep: Callable[[float], None] = time.sleep):
+        self.latency = latency
+        self.fail_devices = frozenset(fail_devices)
+        self.states: Dict[str, bool] = {}
+        self.calls = 0
+        self._sleep = sleep
+        self._lock = threading.Lock()
+
+    def __call__(self, device: str, state: bool):
+        if self.latency:
+            self._sleep(self.latency)
+        if device in self.fail_devices:
+            raise RuntimeError(f"Cihaz yanıt vermedi: {device}")
+        with self._lock:
+            self.calls += 1
+            self.states[device] = state
+
+
+def _timeout_message(device: str) -> str:
+    return f"Cihaz komutu zaman aşımına uğradı: {device}"
+
+
+def _failure_message(device: str, error: Exception) -> str:
+    return f"Cihaz komutu başarısız: {device} ({error})"
+
+
+class DeviceDispatcher:
+    """
+    Cihaz adı -> sürücü kaydı ve eşzamanlı yürütücü.
+
+    ``actuate`` bir toplu işlemde biriken cihaz komutlarını (cihaz başına
+    yalnızca son durum) alır, farklı cihazları havuzda paralel yürütür ve
+    cihaz başına sonucu döndürür. Zaman aşımına uğrayan komutun iş
+    parçacığı iptal edilemez; sonucu yok sayılır.
+    """
+
+    def __init__(self, default_driver: Optional[Driver] = None, max_workers: int = 8,
+                 timeout: float = DEFAULT_DEVICE_TIMEOUT):
+        self.default_driver = default_driver
+        self.timeout = timeout
+        self._drivers: Dict[str, Tuple[Driver, float]] = {}
+        self._max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    def register(self, device: str, driver: Driver, timeout: Optional[float] = None):
+        """Cihaz için sürücü kaydet; timeout verilmezse varsayılan zaman aşımı kullanılır."""
+        self._drivers[device] = (driver, self.timeout if timeout is None else timeout)
+
+    def unregister(self, device: str):
+        self._drivers.pop(device, None)
+
+    def driver_for(self, device: str) -> Tuple[Optional[Driver], float]:
+        """Cihazın sürücüsünü ve zaman aşımını döndür."""
+        return self._drivers.get(device, (self.default_driver, self.timeout))
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="device")
+            return self._executor
+
+    def actuate(self, commands: Mapping[str, bool]) -> Dict[str, Optional[str]]:
+        """
+        Komutları yürüt; cihaz -> hata mesajı (başarılıysa None) döndür.
+        Sürücüsü olmayan cihazlar başarılı sayılır (yalnızca bellekte tutulur).
+        """
+        results: Dict[str, Optional[str]] = {}
+        pending = []
+        for device, state in commands.items():
+            driver, timeout = self.driver_for(device)
+            if driver is None:
+                results[device] = None
+            else:
+                pending.append((device, self._get_executor().submit(driver, device, state), timeout))
+
+        start = time.monotonic()
+        for device, future, timeout in pending:
+            try:
+                future.result(timeout=max(0.0, start + timeout - time.monotonic()))
+                results[device] = None
+            except FutureTimeoutError:
+                results[device] = _timeout_message(device)
+            except Exception as e:
+                results[device] = _failure_message(device, e)
+        return results
+
+    async def actuate_async(self, commands: Mapping[str, bool]) -> Dict[str, Optional[str]]:
+        """
+        actuate'in olay döngüsünü bloklamayan sürümü: sürücüler aynı havuzda
+        çalışır, sonuçları zaman aşımıyla birlikte beklenir.
+        """
+        loop = asyncio.get_running_loop()
+        results: Dict[str, Optional[str]] = {}
+        pending = []
+        for device, state in commands.items():
+            driver, timeout = self.driver_for(device)
+            if driver is None:
+                results[device] = None
+            else:
+                future = loop.run_in_executor(self._get_executor(), driver, device, state)
+                pending.append((device, asyncio.wait_for(future, timeout)))
+
+        outcomes = await asyncio.gather(*(waiter for _, waiter in pending), return_exceptions=True)
+        for (device, _), outcome in zip(pending, outcomes):
+            if isinstance(outcome, asyncio.TimeoutError):
+                results[device] = _timeout_message(device)
+            elif isinstance(outcome, Exception):
+                results[device] = _failure_message(device, outcome)
+            else:
+                results[device] = None
+        return results
+
+    def close(self):
+        """Yürütücü iş parçacıklarını kapat."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+_DEFAULT_ACTIONS: Optional[ActionTable] = None
+
+
+def default_action_table() -> ActionTable:
+    """Varsayılan cihazlar ve bileşik eylemlerle kurulan, ajanların paylaştığı tabloyu döndür."""
+    global _DEFAULT_ACTIONS
+    if _DEFAULT_ACTIONS is None:
+        _DEFAULT_ACTIONS = ActionTable()
+    return _DEFAULT_ACTIONS
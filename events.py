@@ -0,0 +1,286 @@
+"""
+Ajan olayları için tipli olay veriyolu (event bus).
+
+Ajan gerçek ekleme/kaldırma, kural tetiklenmesi ve cihaz değişiklikleri
+için konsola yazmak yerine tipli olaylar yayınlar. Olaylar yalnızca o türe
+abone olan biri varsa oluşturulur; abonesi olmayan bir veriyolunun
+maliyeti tek bir küme sorgusudur.
+
+Aboneler olayları doğrudan (aynı iş parçacığında) ya da QueueSink
+aracılığıyla arka planda alabilir; QueueSink G/Ç'yi komut yolunun dışında
+tutar. Cihaz sürücüleri ve metrikler de aynı olaylara abone olur; hiçbir
+bileşenin konsol metnini ayrıştırması gerekmez.
+"""
+
+import logging
+import queue
+import threading
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple, Type
+
+logger = logging.getLogger("logic_agent")
+
+
+class Event:
+    """Tüm olayların temel sınıfı. source olayı yayınlayan ajandır."""
+
+    __slots__ = ("source",)
+
+    # format_event için varsayılan günlük seviyesi
+    level = logging.INFO
+
+    def __init__(self, source):
+        self.source = source
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class FactAsserted(Event):
+    """Bir gerçek bilgi tabanına eklendi; derived kural tarafından çıkarıldığını belirtir."""
+
+    __slots__ = ("fact", "derived")
+    level = logging.DEBUG
+
+    def __init__(self, source, fact: str, derived: bool = False):
+        super().__init__(source)
+        self.fact = fact
+        self.derived = derived
+
+
+class FactRetracted(Event):
+    """Bir gerçek bilgi tabanından kaldırıldı."""
+
+    __slots__ = ("fact", "derived")
+    level = logging.DEBUG
+
+    def __init__(self, source, fact: str, derived: bool = False):
+        super().__init__(source)
+        self.fact = fact
+        self.derived = derived
+
+
+class RuleAdded(Event):
+    """Ajana yeni bir kural eklendi."""
+
+    __slots__ = ("condition", "action")
+    level = logging.DEBUG
+
+    def __init__(self, source, condition: str, action: str):
+        super().__init__(source)
+        self.condition = condition
+        self.action = action
+
+
+class RuleFired(Event):
+    """Bir kuralın koşulu yanlıştan doğruya geçti ve eylemi yürütülüyor."""
+
+    __slots__ = ("rule_id", "condition", "action")
+
+    def __init__(self, source, rule_id: int, condition: str, action: str):
+        super().__init__(source)
+        self.rule_id = rule_id
+        self.condition = condition
+        self.action = action
+
+
+class DeviceChanged(Event):
+    """Bir cihazın açık/kapalı durumu değişti."""
+
+    __slots__ = ("device", "state")
+
+    def __init__(self, source, device: str, state: bool):
+        super().__init__(source)
+        self.device = device
+        self.state = state
+
+
+class TemperatureChanged(Event):
+    """Bir cihazın hedef sıcaklığı değişti."""
+
+    __slots__ = ("device", "temperature")
+
+    def __init__(self, source, device: str, temperature: float):
+        super().__init__(source)
+        self.device = device
+        self.temperature = temperature
+
+
+class PatternsUpdated(Event):
+    """Ajan bir komuttan kullanıcı alışkanlıklarını öğrendi; alanlar öğrenilen gözlemdir."""
+
+    __slots__ = ("facts", "devices", "timestamp", "temperature")
+    level = logging.DEBUG
+
+    def __init__(self, source, facts: Tuple[str, ...], devices: Tuple[str, ...], timestamp: float,
+                 temperature: Optional[float] = None):
+        super().__init__(source)
+        self.facts = facts
+        self.devices = devices
+        self.timestamp = timestamp
+        self.temperature = temperature
+
+
+class Notice(Event):
+    """Diğer olaylara uymayan, kullanıcıya yönelik serbest metinli bildirim."""
+
+    __slots__ = ("message", "severity")
+
+    def __init__(self, source, message: str, severity: int = logging.INFO):
+        super().__init__(source)
+        self.message = message
+        self.severity = severity
+
+
+EVENT_TYPES = (FactAsserted, FactRetracted, RuleAdded, RuleFired, DeviceChanged, TemperatureChanged,
+               PatternsUpdated, Notice)
+
+Handler = Callable[[Event], None]
+
+
+def format_event(event: Event) -> str:
+    """Olayı eski konsol çıktısıyla aynı Türkçe metne dönüştür."""
+    if isinstance(event, FactAsserted):
+        return f"Gerçek {'çıkarıldı' if event.derived else 'eklendi'}: {event.fact}"
+    if isinstance(event, FactRetracted):
+        return f"{'Çıkarılan gerçek geri çekildi' if event.derived else 'Gerçek kaldırıldı'}: {event.fact}"
+    if isinstance(event, RuleAdded):
+        return f"Kural eklendi: {event.condition} -> {event.action}"
+    if isinstance(event, RuleFired):
+        return f"Eylem yürütülüyor: {event.action}"
+    if isinstance(event, DeviceChanged):
+        return f"{event.device.capitalize()} {'AÇILDI' if event.state else 'KAPATILDI'}"
+    if isinstance(event, TemperatureChanged):
+        return f"{event.device.capitalize()} sıcaklığı {event.temperature}°C olarak ayarlandı"
+    if isinstance(event, PatternsUpdated):
+        return "Kullanıcı alışkanlıkları güncellendi"
+    if isinstance(event, Notice):
+        return event.message
+    return repr(event)
+
+
+def event_level(event: Event) -> int:
+    """Olayın günlük (logging) seviyesi."""
+    return event.severity if isinstance(event, Notice) else event.level
+
+
+class EventBus:
+    """
+    Olay türüne göre abonelere dağıtım yapan veriyolu.
+
+    Yayıncılar olayı oluşturmadan önce ``wants(tür)`` ile sorgular; abone
+    yoksa hiçbir nesne oluşturulmaz. Abone listeleri kopyala-yaz ile
+    güncellendiğinden yayın sırasında kilit tutulmaz.
+    """
+
+    def __init__(self):
+        self._subscriptions: List[tuple] = []
+        self._dispatch: Dict[Type[Event], tuple] = {}
+        self._active: FrozenSet[Type[Event]] = frozenset()
+        self._lock = threading.Lock()
+
+    def subscribe(self, handler: Handler, event_type: Type[Event] = Event) -> Handler:
+        """handler'ı event_type (ve alt türleri) için abone et; handler'ı döndür."""
+        with self._lock:
+            self._subscriptions = self._subscriptions + [(event_type, handler)]
+            self._rebuild()
+        return handler
+
+    def unsubscribe(self, handler: Handler, event_type: Optional[Type[Event]] = None):
+        """handler'ın aboneliğini (event_type verilirse yalnızca o tür için) kaldır."""
+        with self._lock:
+            self._subscriptions = [
+                (subscribed_type, subscribed)
+                for subscribed_type, subscribed in self._subscriptions
+                if subscribed is not handler or (event_type is not None and subscribed_type is not event_type)
+            ]
+            self._rebuild()
+
+    def _rebuild(self):
+        dispatch = {}
+        for concrete in EVENT_TYPES:
+            handlers = tuple(handler for event_type, handler in self._subscriptions
+                             if issubclass(concrete, event_type))
+            if handlers:
+                dispatch[concrete] = handlers
+        self._dispatch = dispatch
+        self._active = frozenset(dispatch)
+
+    def wants(self, event_type: Type[Event]) -> bool:
+        """Bu tür için en az bir abone var mı?"""
+        return event_type in self._active
+
+    def publish(self, event: Event):
+        """Olayı abonelere ilet. Bir abonedeki hata diğerlerini ve yayıncıyı etkilemez."""
+        for handler in self._dispatch.get(type(event), ()):
+            try:
+                handler(event)
+            except Exception:
+                logger.exception("Olay abonesi hata verdi: %r", event)
+
+
+class QueueSink:
+    """
+    Olayları sınırlı bir kuyruğa alan ve arka plandaki bir iş parçacığında
+    hedefe ileten abone. Komut yolu hiçbir zaman beklemez: kuyruk doluysa
+    olay düşürülür ve ``dropped`` sayacı artırılır.
+    """
+
+    _STOP = object()
+
+    def __init__(self, target: Handler, max_size: int = 10000):
+        self.target = target
+        self.dropped = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_size)
+        self._thread = threading.Thread(target=self._run, name="event-sink", daemon=True)
+        self._thread.start()
+
+    def __call__(self, event: Event):
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            event = self._queue.get()
+            try:
+                if event is self._STOP:
+                    return
+                self.target(event)
+            except Exception:
+                logger.exception("Olay hedefi hata verdi: %r", event)
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """Kuyruktaki tüm olaylar iletilene kadar bekle."""
+        self._queue.join()
+
+    def close(self, timeout: Optional[float] = None):
+        """Kalan olayları ilet ve iş parçacığını durdur."""
+        self._queue.put(self._STOP)
+        self._thread.join(timeout)
+
+
+def log_event(event: Event, target_logger: logging.Logger = logger):
+    """Olayı seviyesine göre logging üzerinden yaz."""
+    level = event_level(event)
+    if target_logger.isEnabledFor(level):
+        target_logger.log(level, format_event(event))
+
+
+def print_event(event: Event):
+    """Olayı konsola yaz (etkileşimli demo için)."""
+    print(format_event(event))
+
+
+_DEFAULT_BUS: Optional[EventBus] = None
+
+
+def default_event_bus() -> EventBus:
+    """Aksi belirtilmedikçe tüm ajanların paylaştığı veriyolunu döndür."""
+    global _DEFAULT_BUS
+    if _DEFAULT_BUS is None:
+        _DEFAULT_BUS = EventBus()
+    return _DEFAULT_BUS
@@ -0,0 +1,238 @@
+"""
+Gemini API için kalıcı bağlantılı HTTP istemcisi.
+
+Tek bir ``requests.Session`` üzerinden bağlantı havuzu (keep-alive) kullanır,
+her isteğe zaman aşımı uygular, geçici hatalarda sınırlı üstel geri çekilme
+ile yeniden dener ve başarılı yanıtları normalize edilmiş komut metnine göre
+LRU/TTL önbelleğinde tutar.
+
+Uç nokta adresi yapılandırılabilir olduğundan istemci, Gemini yerine yerel
+bir sahte HTTP sunucusuna yöneltilerek denenebilir.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from intent_matcher import turkish_casefold
+
+DEFAULT_ENDPOINT = "https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent"
+
+# Yeniden denemeye değer geçici HTTP durum kodları
+RETRY_STATUS_CODES = frozenset((429, 500, 502, 503, 504))
+
+
+class GeminiAPIError(Exception):
+    """API isteği başarısız olduğunda ya da yanıt ayrıştırılamadığında fırlatılır."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def normalize_command(command: str) -> str:
+    """Önbellek anahtarı için komutu küçük harfe çevir ve boşlukları sadeleştir."""
+    return " ".join(turkish_casefold(command).split())
+
+
+class ResponseCache:
+    """Boyutu sınırlı, süreli (TTL) LRU önbellek."""
+
+    def __init__(self, max_size: int = 256, ttl: float = 3600.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[str]:
+        """Anahtara ait geçerli değeri döndür; yoksa ya da süresi dolduysa None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: str):
+        """Değeri önbelleğe ekle; kapasite aşılırsa en eski kullanılanı çıkar."""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Önbelleği boşalt."""
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class GeminiClient:
+    """Bağlantı havuzlu, zaman aşımı ve yeniden deneme destekli Gemini istemcisi."""
+
+    def __init__(self, api_key: Optional[str] = None, endpoint: Optional[str] = None,
+                 timeout: Union[float, Tuple[float, float]] = (3.05, 15.0),
+                 max_retries: int = 3, backoff_factor: float = 0.5, max_backoff: float = 8.0,
+                 pool_size: int = 10, cache_size: int = 256, cache_ttl: float = 3600.0,
+                 session: Optional[requests.Session] = None,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.api_key = api_key
+        self.endpoint = endpoint or DEFAULT_ENDPOINT
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.cache = ResponseCache(cache_size, cache_ttl)
+        self._sleep = sleep
+
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        self.session = session
+
+        # Gecikme ve hata sayaçları
+        self._stats_lock = threading.Lock()
+        self.requests_sent = 0
+        self.retries = 0
+        self.errors = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def close(self):
+        """Havuzdaki bağlantıları kapat."""
+        self.session.close()
+
+    def backoff_delay(self, attempt: int) -> float:
+        """attempt. yeniden deneme öncesi beklenecek süre (üstel, üst sınırlı)."""
+        return min(self.max_backoff, self.backoff_factor * (2 ** attempt))
+
+    def build_payload(self, prompt: str, json_mode: bool = False) -> Dict:
+        """
+        Gemini generateContent istek gövdesini oluştur. json_mode ile modelden
+        yalnızca JSON döndürmesi istenir.
+        """
+        payload = {
+            "contents": [{
+                "parts": [{
+                    "text": prompt
+                }]
+            }],
+            "generationConfig": {
+                "temperature": 0.7,
+                "maxOutputTokens": 800
+            }
+        }
+        if json_mode:
+            payload["generationConfig"]["responseMimeType"] = "application/json"
+        return payload
+
+    def generate(self, prompt: str, cache_key: Optional[str] = None, json_mode: bool = False) -> str:
+        """
+        Prompt'u gönder ve yanıt metnini döndür. cache_key verilirse başarılı
+        yanıt önbelleğe alınır ve aynı anahtar için ağa çıkılmaz.
+        """
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        return self._generate_uncached(prompt, cache_key, json_mode)
+
+    def _generate_uncached(self, prompt: str, cache_key: Optional[str], json_mode: bool = False) -> str:
+        if not self.api_key:
+            raise GeminiAPIError("API anahtarı tanımlanmamış")
+
+        text = self._parse_response(self._post_with_retries(self.build_payload(prompt, json_mode)))
+        if cache_key is not None:
+            self.cache.put(cache_key, text)
+        return text
+
+    def _post_with_retries(self, payload: Dict) -> Dict:
+        """İsteği gönder; bağlantı hatası, zaman aşımı ve geçici durum kodlarında yeniden dene."""
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                response = self.session.post(
+                    self.endpoint,
+                    params={"key": self.api_key},
+                    headers={"Content-Type": "application/json"},
+                    json=payload,
+                    timeout=self.timeout,
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._record(time.perf_counter() - start, error=True)
+                if attempt >= self.max_retries:
+                    raise GeminiAPIError(f"API isteği başarısız: {e}") from e
+            else:
+                self._record(time.perf_counter() - start, error=response.status_code != 200)
+                if response.status_code == 200:
+                    try:
+                        return response.json()
+                    except ValueError:
+                        raise GeminiAPIError("API yanıtı ayrıştırılamadı")
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                    raise GeminiAPIError(
+                        f"API hatası: {response.status_code} - {response.text}",
+                        status_code=response.status_code,
+                    )
+
+            self._sleep(self.backoff_delay(attempt))
+            attempt += 1
+            with self._stats_lock:
+                self.retries += 1
+
+    @staticmethod
+    def _parse_response(result: Dict) -> str:
+        """API yanıtından ilk adayın metnini çıkar."""
+        try:
+            return result["candidates"][0]["content"]["parts"][0]["text"]
+        except (KeyError, IndexError, TypeError):
+            raise GeminiAPIError("API yanıtı ayrıştırılamadı")
+
+    def _record(self, latency: float, error: bool):
+        with self._stats_lock:
+            self.requests_sent += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+            if error:
+                self.errors += 1
+
+    def stats(self) -> Dict[str, float]:
+        """Önbellek isabet oranı ve gecikme sayaçlarını döndür."""
+        with self._stats_lock:
+            return {
+                "istek_sayısı": self.requests_sent,
+                "yeniden_deneme": self.retries,
+                "hata_sayısı": self.errors,
+                "ortalama_gecikme_sn": self.total_latency / self.requests_sent if self.requests_sent else 0.0,
+                "en_yüksek_gecikme_sn": self.max_latency,
+                "önbellek_isabet": self.cache.hits,
+                "önbellek_ıskalama": self.cache.misses,
+                "önbellek_isabet_oranı": self.cache.hit_rate,
+            }
@@ -0,0 +1,257 @@
+"""
+Yerel niyet (intent) eşleştiricisi.
+
+Komut kalıpları ve duygu anahtar kelimeleri tek bir Aho-Corasick
+otomatında derlenir. Komut metni üzerinden tek geçişte tüm niyetler ve
+duygu anahtar kelimeleri bulunur; LLM'e yalnızca yerel eşleştirici emin
+olmadığında başvurulur.
+
+Kalıp sözdizimi: boşluk kelime yuvalarını, ``|`` aynı yuvadaki alternatif
+kökleri ayırır. Her kök bir kelimenin başıyla eşleşir, kelimenin geri
+kalanı (ekler) serbesttir: ``"ışık|ışığ|lamba aç"`` kalıbı "ışıkları aç",
+"ışığı açar mısın" ve "lambayı açın" komutlarını yakalar.
+"""
+
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Niyet tablosu: (eklenecek gerçek, kalıplar)
+INTENT_PHRASES: List[Tuple[str, List[str]]] = [
+    ("ısıtıcı_aç_isteği", ["klima|ısıtıcı aç"]),
+    ("ısıtıcı_kapat_isteği", ["klima|ısıtıcı kapat"]),
+    ("kişi_üşüyor", ["üşü", "soğuk"]),
+    ("kapı_aç_isteği", ["kapı aç"]),
+    ("kapı_kapat_isteği", ["kapı kapat"]),
+    ("perde_aç_isteği", ["perde aç"]),
+    ("perde_kapat_isteği", ["perde kapat"]),
+    ("televizyon_aç_isteği", ["televizyon|tv aç"]),
+    ("televizyon_kapat_isteği", ["televizyon|tv kapat"]),
+    ("ışık_aç_isteği", ["ışık|ışığ|lamba aç"]),
+    ("ışık_kapat_isteği", ["ışık|ışığ|lamba kapat"]),
+    ("sıcaklık_artır_isteği", ["sıcaklı|sıcaklığ artır|arttır|yükselt", "daha sıcak"]),
+    ("sıcaklık_azalt_isteği", ["sıcaklı|sıcaklığ azalt|düşür", "daha soğuk"]),
+    ("kişi_çıkıyor", ["çıkıyor", "gidiyor"]),
+    ("kişi_uyuma_hazırlığı", ["uyumak|uyuyaca"]),
+]
+
+# Türkçe duygu anahtar kelimeleri: (duygu, kökler). Sıra önceliği belirler.
+EMOTION_KEYWORDS: List[Tuple[str, List[str]]] = [
+    ("mutlu", ["mutlu", "sevinçli", "neşeli", "harika", "güzel", "memnun"]),
+    ("üzgün", ["üzgün", "mutsuz", "kötü", "kederli", "sıkıntılı"]),
+    ("kızgın", ["kızgın", "sinirli", "öfkeli", "kızmış", "sinirlendim"]),
+    ("yorgun", ["yorgun", "yoruldum", "bitkin", "tükendim", "uykulu"]),
+]
+
+INTENT = "niyet"
+EMOTION = "duygu"
+
+# Çok kelimeli kalıplarda yuvalar arasında atlanabilecek en fazla kelime ("ışıkları lütfen aç")
+MAX_WORD_GAP = 1
+
+# Kelime içinde sayılan noktalama ("tv'yi")
+_WORD_CHARS = "'’"
+
+
+def turkish_casefold(text: str) -> str:
+    """Türkçe kurallarına göre küçük harfe çevir (I -> ı, İ -> i)."""
+    return text.replace("I", "ı").replace("İ", "i").lower()
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char in _WORD_CHARS
+
+
+class AhoCorasick:
+    """
+    Çoklu kalıp arama otomatı. Kalıplar bir kez derlenir; arama metnin
+    uzunluğuyla doğrusal sürede, kalıp sayısından bağımsız olarak yapılır.
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, Any]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Her durumda biten kalıplar: (kalıp uzunluğu, yük)
+        self._output: List[List[Tuple[int, Any]]] = [[]]
+
+        for pattern, payload in patterns:
+            self._insert(pattern, payload)
+        self._build_failure_links()
+
+    def _insert(self, pattern: str, payload: Any):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append((len(pattern), payload))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find_word_prefixes(self, text: str) -> List[Tuple[int, Any]]:
+        """
+        Bir kelimenin başından başlayan eşleşmeleri (kelime sırası, yük) olarak
+        döndür. Kelime sınırları aynı geçişte izlenir.
+        """
+        matches = []
+        state = 0
+        goto = self._goto
+        fail = self._fail
+        word_index = -1
+        word_start = 0
+        in_word = False
+        for index, char in enumerate(text):
+            if _is_word_char(char):
+                if not in_word:
+                    in_word = True
+                    word_index += 1
+                    word_start = index
+            else:
+                in_word = False
+
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if in_word:
+                for length, payload in self._output[state]:
+                    if index + 1 - length == word_start:
+                        matches.append((word_index, payload))
+        return matches
+
+
+class IntentMatch:
+    """Tek bir komut için yerel eşleştirme sonucu."""
+
+    __slots__ = ("intents", "emotions", "confidence")
+
+    def __init__(self, intents: List[str], emotions: List[str], confidence: float):
+        self.intents = intents
+        self.emotions = emotions
+        self.confidence = confidence
+
+    @property
+    def primary_emotion(self) -> Optional[str]:
+        return self.emotions[0] if self.emotions else None
+
+    def __repr__(self):
+        return f"IntentMatch(intents={self.intents}, emotions={self.emotions}, confidence={self.confidence})"
+
+
+class IntentMatcher:
+    """
+    Niyet kalıpları ve duygu anahtar kelimeleri için tek otomatlı eşleştirici.
+
+    Komut Türkçe kurallarıyla küçük harfe çevrilir ve otomattan bir kez
+    geçirilir. Her kelimenin başında eşleşen kökler toplanır, ardından çok
+    kelimeli kalıplar kelime sıralarından birleştirilir. Bir eşleşme başka
+    bir eşleşmenin kelime aralığı içinde kalıyorsa ("daha soğuk" içindeki
+    "soğuk") yalnızca uzun olan tutulur.
+    """
+
+    def __init__(self, intent_phrases: List[Tuple[str, List[str]]] = None,
+                 emotion_keywords: List[Tuple[str, List[str]]] = None,
+                 max_word_gap: int = MAX_WORD_GAP):
+        intent_phrases = INTENT_PHRASES if intent_phrases is None else intent_phrases
+        emotion_keywords = EMOTION_KEYWORDS if emotion_keywords is None else emotion_keywords
+        self.max_word_gap = max_word_gap
+
+        # Kalıp kimliği -> (tür, ad, yuva sayısı); kök -> [(kalıp kimliği, yuva sırası)]
+        self._patterns: List[Tuple[str, str, int]] = []
+        self._emotion_priority: Dict[str, int] = {}
+        stems: Dict[str, List[Tuple[int, int]]] = {}
+
+        for kind, table in ((INTENT, intent_phrases), (EMOTION, emotion_keywords)):
+            for order, (name, phrases) in enumerate(table):
+                if kind == EMOTION:
+                    self._emotion_priority[name] = order
+                for phrase in phrases:
+                    slots = turkish_casefold(phrase).split()
+                    pattern_id = len(self._patterns)
+                    self._patterns.append((kind, name, len(slots)))
+                    for slot_index, alternatives in enumerate(slots):
+                        for stem in alternatives.split("|"):
+                            stems.setdefault(stem, []).append((pattern_id, slot_index))
+
+        self._automaton = AhoCorasick(stems.items())
+        self.intents: Tuple[str, ...] = tuple(dict.fromkeys(name for name, _ in intent_phrases))
+        self.emotions: Tuple[str, ...] = tuple(dict.fromkeys(name for name, _ in emotion_keywords))
+
+    def match(self, command: str) -> IntentMatch:
+        """Komuttaki tüm niyet ve duyguları tek geçişte bul."""
+        # Kelime sırası -> o kelimede başlayan (kalıp kimliği, yuva sırası) kümesi
+        slots_at: Dict[int, set] = {}
+        for word_index, entries in self._automaton.find_word_prefixes(turkish_casefold(command)):
+            slots_at.setdefault(word_index, set()).update(entries)
+
+        # Çok kelimeli kalıpları birleştir: (ilk kelime, son kelime, atlanan kelime, kalıp)
+        spans = []
+        for word_index in sorted(slots_at):
+            for pattern_id, slot_index in slots_at[word_index]:
+                if slot_index == 0:
+                    span = self._extend(pattern_id, word_index, slots_at)
+                    if span is not None:
+                        spans.append(span + (pattern_id,))
+
+        # Daha uzun bir eşleşmenin içinde kalan eşleşmeleri at
+        spans = [
+            span for span in spans
+            if not any(other[0] <= span[0] and span[1] <= other[1] and other[:2] != span[:2]
+                       for other in spans)
+        ]
+
+        intents: List[str] = []
+        emotions: List[str] = []
+        confidence = 0.0
+        for first, last, gaps, pattern_id in sorted(spans):
+            kind, name, _ = self._patterns[pattern_id]
+            if kind == INTENT:
+                if name not in intents:
+                    intents.append(name)
+                # Arada atlanan kelime varsa eşleşme biraz daha az güvenilirdir
+                confidence = max(confidence, 1.0 if gaps == 0 else 0.75)
+            elif name not in emotions:
+                emotions.append(name)
+
+        emotions.sort(key=self._emotion_priority.__getitem__)
+        return IntentMatch(intents, emotions, confidence)
+
+    def _extend(self, pattern_id: int, start: int, slots_at: Dict[int, set]) -> Optional[Tuple[int, int, int]]:
+        """Kalıbın kalan yuvalarını sonraki kelimelerde ara; bulunursa (ilk, son, atlanan) döndür."""
+        slot_count = self._patterns[pattern_id][2]
+        position = start
+        gaps = 0
+        for slot_index in range(1, slot_count):
+            for candidate in range(position + 1, position + 2 + self.max_word_gap):
+                if (pattern_id, slot_index) in slots_at.get(candidate, ()):
+                    gaps += candidate - position - 1
+                    position = candidate
+                    break
+            else:
+                return None
+        return start, position, gaps
+
+
+_DEFAULT_MATCHER: Optional[IntentMatcher] = None
+
+
+def default_intent_matcher() -> IntentMatcher:
+    """Varsayılan tablolardan derlenen, tüm ajanların paylaştığı eşleştiriciyi döndür."""
+    global _DEFAULT_MATCHER
+    if _DEFAULT_MATCHER is None:
+        _DEFAULT_MATCHER = IntentMatcher()
+    return _DEFAULT_MATCHER
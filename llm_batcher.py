@@ -0,0 +1,279 @@
+"""
+LLM niyet çıkarımı için istek birleştirme ve mikro toplu işleme.
+
+Eylem kataloğu (LLM'in döndürebileceği gerçekler) kural tabanından ve
+yerel eşleştiricinin niyetlerinden bir kez oluşturulur; prompt'un sabit
+kısmı katalog başına bir kez üretilir. Kısa bir pencere içinde gelen
+komutlar tek bir çok komutlu prompt'ta gönderilir ve model yanıtı yapısal
+JSON olarak, katı biçimde ayrıştırılır.
+
+Aynı katalogla gelen aynı (normalize edilmiş) komut için uçuşta bir istek
+varsa yeni istek gönderilmez, sonucu beklenir (single-flight). Başarılı
+sonuçlar katalog ve komut başına önbelleğe alınır.
+"""
+
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+from gemini_client import GeminiAPIError, GeminiClient, ResponseCache, normalize_command
+
+# Komutla gelen istek gerçeklerinin eki ("ışık_aç_isteği")
+REQUEST_SUFFIX = "_isteği"
+
+# Toplama penceresi (saniye) ve bir prompt'taki en fazla komut
+DEFAULT_WINDOW = 0.02
+DEFAULT_MAX_BATCH = 16
+
+# Aynı anda uçuşta olabilecek en fazla toplu istek
+DEFAULT_MAX_INFLIGHT = 4
+
+Catalogue = Tuple[str, ...]
+
+
+class LLMResponseError(GeminiAPIError):
+    """Model yanıtı beklenen JSON yapısında olmadığında fırlatılır."""
+
+
+@lru_cache(maxsize=256)
+def _catalogue_for(atoms: FrozenSet[str], intents: Catalogue) -> Catalogue:
+    requests = sorted(atom for atom in atoms if atom.endswith(REQUEST_SUFFIX) and atom not in intents)
+    return tuple(dict.fromkeys(intents + tuple(requests)))
+
+
+def action_catalogue(rule_base, intents: Iterable[str]) -> Catalogue:
+    """
+    LLM'in bir komut için döndürebileceği gerçekler: yerel eşleştiricinin
+    niyetleri ve kural tabanında başvurulan tüm istek gerçekleri
+    (``..._isteği``). Kural tabanının atom kümesi başına bir kez hesaplanır;
+    eve özel bir kural eklendiğinde katalog kendiliğinden yenilenir. Önbellek
+    kural tabanının kendisini tutmaz.
+    """
+    return _catalogue_for(rule_base.atoms, tuple(intents))
+
+
+@lru_cache(maxsize=256)
+def catalogue_key(catalogue: Catalogue) -> str:
+    """Kataloğun kısa kimliği; önbellek ve birleştirme anahtarlarının önekidir."""
+    return hashlib.sha1("\n".join(catalogue).encode("utf-8")).hexdigest()[:16]
+
+
+@lru_cache(maxsize=64)
+def catalogue_prompt(catalogue: Catalogue) -> str:
+    """Prompt'un katalog başına bir kez oluşturulan sabit kısmı."""
+    actions = "\n".join(f"- {action}" for action in catalogue)
+    return (
+        "Ben bir akıllı ev sistemi için mantıksal bir ajanım. Aşağıdaki numaralı komutların her biri için "
+        "uygun eylemleri yalnızca bu listeden seç:\n"
+        f"{actions}\n\n"
+        "Yanıtı açıklama eklemeden yalnızca şu biçimde JSON olarak döndür:\n"
+        '{"komutlar": [{"no": 1, "eylemler": ["ışık_aç_isteği"]}, {"no": 2, "eylemler": []}]}\n'
+        "Her komut numarası bir kez yer almalı; uygun eylem yoksa boş liste döndür.\n\n"
+        "Komutlar:\n"
+    )
+
+
+def build_prompt(commands: Sequence[str], catalogue: Catalogue) -> str:
+    """Bir ya da daha fazla komut için prompt oluştur."""
+    lines = "\n".join(f"{number}. {json.dumps(command, ensure_ascii=False)}"
+                      for number, command in enumerate(commands, 1))
+    return catalogue_prompt(catalogue) + lines
+
+
+def _strip_code_fence(text: str) -> str:
+    """Modelin yanıtı sardığı tek bir ```json ... ``` bloğunu kaldır."""
+    text = text.strip()
+    if text.startswith("```") and text.endswith("```"):
+        text = text[3:-3]
+        if text.startswith("json"):
+            text = text[4:]
+    return text.strip()
+
+
+def parse_actions(text: str, count: int, catalogue: Iterable[str]) -> List[List[str]]:
+    """
+    Model yanıtını ayrıştır ve komut başına eylem listesini döndür. Yapı
+    bozuksa LLMResponseError fırlatılır; katalogda olmayan eylemler atılır,
+    yanıtta yer almayan komutların eylem listesi boştur.
+    """
+    try:
+        data = json.loads(_strip_code_fence(text))
+    except ValueError as e:
+        raise LLMResponseError(f"LLM yanıtı JSON değil: {e}")
+
+    items = data.get("komutlar") if isinstance(data, dict) else None
+    if not isinstance(items, list):
+        raise LLMResponseError("LLM yanıtında 'komutlar' listesi yok")
+
+    allowed = frozenset(catalogue)
+    results: List[Optional[List[str]]] = [None] * count
+    for item in items:
+        if not isinstance(item, dict):
+            raise LLMResponseError(f"Geçersiz komut sonucu: {item!r}")
+        number = item.get("no")
+        actions = item.get("eylemler")
+        if not isinstance(number, int) or isinstance(number, bool) or not 1 <= number <= count:
+            raise LLMResponseError(f"Geçersiz komut numarası: {number!r}")
+        if results[number - 1] is not None:
+            raise LLMResponseError(f"Komut numarası tekrarlanmış: {number}")
+        if not isinstance(actions, list) or not all(isinstance(action, str) for action in actions):
+            raise LLMResponseError(f"Geçersiz eylem listesi: {actions!r}")
+        results[number - 1] = list(dict.fromkeys(action.strip() for action in actions
+                                                 if action.strip() in allowed))
+    return [actions if actions is not None else [] for actions in results]
+
+
+class LLMBatcher:
+    """
+    Komutları pencere süresince toplayıp tek prompt'ta gönderen, uçuştaki
+    aynı komutları birleştiren istemci. Birden fazla ajan (ev) ve iş
+    parçacığı aynı nesneyi paylaşabilir. window=0 ile her komut hemen
+    gönderilir (yalnızca birleştirme ve önbellek kalır).
+    """
+
+    def __init__(self, client: GeminiClient, window: float = DEFAULT_WINDOW,
+                 max_batch: int = DEFAULT_MAX_BATCH, max_inflight: int = DEFAULT_MAX_INFLIGHT,
+                 cache_size: int = 1024, cache_ttl: float = 3600.0):
+        self.client = client
+        self.window = window
+        self.max_batch = max_batch
+        self.cache = ResponseCache(cache_size, cache_ttl)
+        self._executor = ThreadPoolExecutor(max_workers=max_inflight, thread_name_prefix="llm-batch")
+        self._condition = threading.Condition()
+        # Katalog -> bekleyen (anahtar, komut) listesi ve ilk komutun geliş anı
+        self._pending: Dict[Catalogue, List[Tuple[str, str]]] = {}
+        self._opened_at: Dict[Catalogue, float] = {}
+        # Katalog kimliği + normalize edilmiş komut -> sonucu bekleyen Future
+        self._inflight: Dict[str, Future] = {}
+        self._flusher: Optional[threading.Thread] = None
+        self._closed = False
+
+        self.commands = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.batched_commands = 0
+        self.errors = 0
+
+    def submit(self, command: str, catalogue: Catalogue) -> Future:
+        """
+        Komutu kuyruğa al; sonucu (eylem listesi) verecek Future'ı döndür.
+        Batcher kapatılmışsa GeminiAPIError fırlatılır.
+        """
+        # Farklı kataloglu evler (eve özel kurallar) birbirinin sonucunu almaz
+        key = f"{catalogue_key(catalogue)}:{normalize_command(command)}"
+        with self._condition:
+            self.commands += 1
+        cached = self.cache.get(key)
+        if cached is not None:
+            future = Future()
+            future.set_result(json.loads(cached))
+            return future
+
+        with self._condition:
+            if self._closed:
+                raise GeminiAPIError("LLMBatcher kapatıldı")
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future
+
+            future = self._inflight[key] = Future()
+            batch = self._pending.setdefault(catalogue, [])
+            batch.append((key, command))
+            if len(batch) == 1:
+                self._opened_at[catalogue] = time.monotonic()
+
+            if self.window <= 0 or len(batch) >= self.max_batch:
+                self._dispatch(catalogue)
+            else:
+                self._ensure_flusher()
+                self._condition.notify()
+        return future
+
+    def extract(self, command: str, catalogue: Catalogue) -> List[str]:
+        """Komutun eylemlerini döndür (bloklar). Hata durumunda GeminiAPIError fırlatılır."""
+        # Birleştirilen komutlar aynı sonuç listesini paylaşır
+        return list(self.submit(command, catalogue).result())
+
+    async def extract_async(self, command: str, catalogue: Catalogue) -> List[str]:
+        """extract'ın olay döngüsünü bloklamayan sürümü."""
+        return list(await asyncio.wrap_future(self.submit(command, catalogue)))
+
+    def _ensure_flusher(self):
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_loop, name="llm-batch-flusher", daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self):
+        """Penceresi dolan toplu istekleri gönder."""
+        with self._condition:
+            while not self._closed:
+                if not self._opened_at:
+                    self._condition.wait()
+                    continue
+                now = time.monotonic()
+                due = min(self._opened_at.values()) + self.window
+                if due > now:
+                    self._condition.wait(due - now)
+                    continue
+                for catalogue, opened_at in list(self._opened_at.items()):
+                    if opened_at + self.window <= now:
+                        self._dispatch(catalogue)
+
+    def _dispatch(self, catalogue: Catalogue):
+        """Kataloğun bekleyen komutlarını (kilit tutulurken) gönderim için havuza ver."""
+        batch = self._pending.pop(catalogue)
+        del self._opened_at[catalogue]
+        self.batches += 1
+        self.batched_commands += len(batch)
+        self._executor.submit(self._send, catalogue, batch)
+
+    def _send(self, catalogue: Catalogue, batch: List[Tuple[str, str]]):
+        try:
+            text = self.client.generate(build_prompt([command for _, command in batch], catalogue), json_mode=True)
+            results = parse_actions(text, len(batch), catalogue)
+        except Exception as e:
+            # Bekleyenler yalnızca GeminiAPIError'u ele alır; beklenmeyen hatalar da ona çevrilir
+            error = e
+            if not isinstance(e, GeminiAPIError):
+                error = GeminiAPIError(f"LLM isteği başarısız: {e!r}")
+                error.__cause__ = e
+            with self._condition:
+                self.errors += 1
+                futures = [self._inflight.pop(key) for key, _ in batch]
+            for future in futures:
+                future.set_exception(error)
+            return
+
+        for (key, _), actions in zip(batch, results):
+            self.cache.put(key, json.dumps(actions, ensure_ascii=False))
+        with self._condition:
+            futures = [self._inflight.pop(key) for key, _ in batch]
+        for future, actions in zip(futures, results):
+            future.set_result(actions)
+
+    def stats(self) -> Dict[str, float]:
+        """Birleştirme ve toplu işleme sayaçları."""
+        with self._condition:
+            return {
+                "komut_sayısı": self.commands,
+                "birleştirilen": self.coalesced,
+                "toplu_istek": self.batches,
+                "ortalama_toplu_boyut": self.batched_commands / self.batches if self.batches else 0.0,
+                "hata_sayısı": self.errors,
+                "önbellek_isabet": self.cache.hits,
+            }
+
+    def close(self):
+        """Bekleyen komutları gönder ve iş parçacıklarını durdur."""
+        with self._condition:
+            self._closed = True
+            for catalogue in list(self._pending):
+                self._dispatch(catalogue)
+            self._condition.notify_all()
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,401 @@
+"""
+Çalışma zamanı metrikleri.
+
+Süreç içi bir metrik kaydı (sayaç, gösterge, histogram), ajan için
+kural başına ve aşama başına ölçümler ve kaydı Prometheus metin biçiminde
+yerel bir HTTP portundan sunan dışa aktarıcı.
+
+Ucuz sayaçlar (komut sayısı, kural tetiklenmeleri, LLM istekleri ve
+hataları) her zaman tam tutulur. Pahalı ölçümler (aşama süreleri ve kural
+başına değerlendirme süresi) yalnızca örneklenen komutlarda yapılır;
+``sample_rate=0.01`` ile her yüz komuttan biri ölçülür ve ek yük %1'in
+altında kalır. Ajana metrik verilmezse hiçbir ölçüm yapılmaz.
+"""
+
+import bisect
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from rule_engine import compile_condition
+
+# Gecikme histogramları için varsayılan kova sınırları (saniye)
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Komut işleme aşamaları (smart_home_stage_duration_seconds etiketleri)
+STAGES = ("zaman", "duygu", "niyet", "llm", "kurallar", "eylem")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Toplayıcıların ürettiği örnek: (ad, tür, açıklama, etiketler, değer)
+Sample = Tuple[str, str, str, Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """Etiketli metriklerin temel sınıfı; değerler etiket değerleri demetine göre tutulur."""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _labels(self, values: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.label_names, values))
+
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        with self._lock:
+            return [(self.name, self._labels(key), value) for key, value in self._values.items()]
+
+
+class Counter(Metric):
+    """Yalnızca artan sayaç."""
+
+    type_name = "counter"
+
+    def inc(self, amount: float = 1.0, labels: Tuple[str, ...] = ()):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, labels: Tuple[str, ...] = ()) -> float:
+        return self._values.get(labels, 0.0)
+
+
+class Gauge(Metric):
+    """Anlık değer."""
+
+    type_name = "gauge"
+
+    def set(self, value: float, labels: Tuple[str, ...] = ()):
+        with self._lock:
+            self._values[labels] = value
+
+    def value(self, labels: Tuple[str, ...] = ()) -> float:
+        return self._values.get(labels, 0.0)
+
+
+class Histogram(Metric):
+    """Sabit kovalı histogram; kova sayıları, toplam ve gözlem sayısı tutulur."""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, labels: Tuple[str, ...] = ()):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def count(self, labels: Tuple[str, ...] = ()) -> int:
+        state = self._values.get(labels)
+        return state[2] if state is not None else 0
+
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        result = []
+        with self._lock:
+            for key, (counts, total, count) in self._values.items():
+                labels = self._labels(key)
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    result.append((f"{self.name}_bucket", dict(labels, le=_format_value(bound)), cumulative))
+                result.append((f"{self.name}_sum", labels, total))
+                result.append((f"{self.name}_count", labels, count))
+        return result
+
+
+class MetricsRegistry:
+    """Süreç içi metrik kaydı. Aynı adla istenen metrik bir kez oluşturulur."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Sample]]] = []
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, metric_type, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = metric_type(name, *args, **kwargs)
+            elif not isinstance(metric, metric_type):
+                raise ValueError(f"'{name}' metriği farklı türde kayıtlı")
+            return metric
+
+    def counter(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help_text, label_names)
+
+    def gauge(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, help_text, label_names)
+
+    def histogram(self, name: str, help_text: str, label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help_text, label_names, buckets)
+
+    def add_collector(self, collector: Callable[[], Iterable[Sample]]):
+        """Dışa aktarım anında değer üreten bir toplayıcı ekle (ör. önbellek sayaçları)."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Tüm metrikleri Prometheus metin biçiminde döndür."""
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        described = set()
+        for collector in list(self._collectors):
+            for name, type_name, help_text, labels, value in collector():
+                if name not in described:
+                    described.add(name)
+                    lines.append(f"# HELP {name} {help_text}")
+                    lines.append(f"# TYPE {name} {type_name}")
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class CommandSample:
+    """Örneklenen bir komutun başlangıç zamanı ve aşama süreleri."""
+
+    __slots__ = ("start", "stages")
+
+    def __init__(self, start: float):
+        self.start = start
+        self.stages: Dict[str, float] = {}
+
+    def add(self, stage: str, seconds: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+
+class StageTimer:
+    """Bir aşamanın süresini örneklenen komuta ekleyen bağlam."""
+
+    __slots__ = ("sample", "name", "start")
+
+    def __init__(self, sample: CommandSample, name: str):
+        self.sample = sample
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.sample.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NoStage:
+    """Örneklenmeyen komutlarda kullanılan boş aşama zamanlayıcısı."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NO_STAGE = _NoStage()
+
+
+class AgentMetrics:
+    """
+    Ajan ölçümleri. Birden fazla ajan (ev) aynı nesneyi paylaşabilir; her
+    ajan yürüttüğü komutun örneğini kendisi tutar. sample_rate, aşama ve
+    kural sürelerinin ölçüleceği komutların oranıdır (1.0 = tümü, 0 = hiçbiri).
+    """
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None, sample_rate: float = 1.0,
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.registry = registry if registry is not None else MetricsRegistry()
+        self.sample_rate = sample_rate
+        # Deterministik örnekleme: her N. komut ölçülür. Sayaç kilitsizdir;
+        # eşzamanlı komutlarda sayım ve örnekleme oranı yaklaşıktır
+        self._sample_every = round(1.0 / sample_rate) if sample_rate > 0 else 0
+        self._commands = 0
+        self._rule_labels: Dict[object, Tuple[str]] = {}
+        self._gemini_clients: List = []
+        self._llm_batchers: List = []
+
+        registry = self.registry
+        self.sampled_commands = registry.counter(
+            "smart_home_sampled_commands_total", "Aşama süreleri ölçülen (örneklenen) komut sayısı")
+        self.command_seconds = registry.histogram(
+            "smart_home_command_duration_seconds", "Örneklenen komutların toplam işlenme süresi", (), buckets)
+        self.stage_seconds = registry.histogram(
+            "smart_home_stage_duration_seconds", "Örneklenen komutlarda aşama başına süre", ("stage",), buckets)
+        self.rule_evaluations = registry.counter(
+            "smart_home_rule_evaluations_total", "Örneklenen komutlarda kural başına değerlendirme sayısı", ("rule",))
+        self.rule_seconds = registry.counter(
+            "smart_home_rule_evaluation_seconds_total",
+            "Örneklenen komutlarda kural başına toplam değerlendirme süresi", ("rule",))
+        self.rule_fires = registry.counter("smart_home_rule_fires_total", "Kural başına tetiklenme sayısı", ("rule",))
+        self.llm_seconds = registry.histogram(
+            "smart_home_llm_request_duration_seconds", "Gemini çağrısı süresi (önbellek isabetleri dahil)", (), buckets)
+        self.llm_errors = registry.counter("smart_home_llm_errors_total", "Başarısız Gemini çağrısı sayısı")
+        self.tier_requests = registry.counter(
+            "smart_home_tier_requests_total", "Katman (yerel / llm) başına deneme ve isabet sayısı",
+            ("tier", "result"))
+        registry.gauge("smart_home_sample_rate", "Aşama ve kural sürelerinin ölçüldüğü komut oranı").set(sample_rate)
+        registry.add_collector(self._collect)
+
+    # Komutlar
+
+    def begin_command(self) -> Optional[CommandSample]:
+        """Bir komutu say; örneklenecekse aşama sürelerinin toplanacağı örneği döndür."""
+        self._commands += 1
+        if self._sample_every and self._commands % self._sample_every == 0:
+            return CommandSample(time.perf_counter())
+        return None
+
+    def end_command(self, sample: CommandSample):
+        """Örneklenen komutun toplam ve aşama sürelerini histogramlara kaydet."""
+        self.sampled_commands.inc()
+        self.command_seconds.observe(time.perf_counter() - sample.start)
+        for stage, seconds in sample.stages.items():
+            self.stage_seconds.observe(seconds, (stage,))
+
+    # Kurallar
+
+    def _rule_label(self, rule) -> Tuple[str]:
+        label = self._rule_labels.get(rule)
+        if label is None:
+            label = self._rule_labels[rule] = (f"{rule.condition} -> {rule.action}",)
+        return label
+
+    def rule_evaluated(self, rule, seconds: float):
+        label = self._rule_label(rule)
+        self.rule_evaluations.inc(1.0, label)
+        self.rule_seconds.inc(seconds, label)
+
+    def rule_fired(self, rule):
+        self.rule_fires.inc(1.0, self._rule_label(rule))
+
+    def rule_report(self, limit: Optional[int] = None) -> List[Dict]:
+        """Kural başına değerlendirme, tetiklenme ve süre; toplam süreye göre azalan sırada."""
+        labels = {key[0] for key in self.rule_evaluations._values}
+        labels.update(key[0] for key in self.rule_fires._values)
+        report = []
+        for label in labels:
+            evaluations = self.rule_evaluations.value((label,))
+            seconds = self.rule_seconds.value((label,))
+            report.append({
+                "kural": label,
+                "değerlendirme": int(evaluations),
+                "tetiklenme": int(self.rule_fires.value((label,))),
+                "toplam_süre_sn": seconds,
+                "ortalama_süre_us": seconds / evaluations * 1e6 if evaluations else 0.0,
+            })
+        report.sort(key=lambda item: (-item["toplam_süre_sn"], -item["tetiklenme"], item["kural"]))
+        return report[:limit] if limit is not None else report
+
+    # LLM, katmanlar ve önbellekler
+
+    def llm_request(self, seconds: float, error: bool = False):
+        self.llm_seconds.observe(seconds)
+        if error:
+            self.llm_errors.inc()
+
+    def tier(self, tier: str, hit: bool):
+        self.tier_requests.inc(1.0, (tier, "isabet" if hit else "ıskalama"))
+
+    def watch_gemini(self, client):
+        """Gemini istemcisinin yeniden deneme sayacını dışa aktar."""
+        if all(watched is not client for watched in self._gemini_clients):
+            self._gemini_clients.append(client)
+
+    def watch_llm(self, batcher):
+        """LLM toplayıcısının yanıt önbelleğini ve istemcisinin yeniden deneme sayacını dışa aktar."""
+        if all(watched is not batcher for watched in self._llm_batchers):
+            self._llm_batchers.append(batcher)
+        self.watch_gemini(batcher.client)
+
+    def _collect(self) -> Iterable[Sample]:
+        yield ("smart_home_commands_total", "counter", "İşlenen komut sayısı", {}, self._commands)
+
+        # Aynı metriğin satırları dışa aktarımda art arda gelmelidir
+        info = compile_condition.cache_info()
+        caches = [("koşul", info.hits, info.misses)]
+        if self._llm_batchers:
+            caches.append(("llm", sum(batcher.cache.hits for batcher in self._llm_batchers),
+                           sum(batcher.cache.misses for batcher in self._llm_batchers)))
+        for cache, hits, _ in caches:
+            yield ("smart_home_cache_hits_total", "counter", "Önbellek isabet sayısı", {"cache": cache}, hits)
+        for cache, _, misses in caches:
+            yield ("smart_home_cache_misses_total", "counter", "Önbellek ıskalama sayısı", {"cache": cache}, misses)
+        if self._gemini_clients:
+            yield ("smart_home_llm_retries_total", "counter", "Gemini yeniden deneme sayısı", {},
+                   sum(client.retries for client in self._gemini_clients))
+
+
+class MetricsServer:
+    """
+    Kaydı ``/metrics`` yolunda Prometheus metin biçiminde sunan HTTP
+    sunucusu. Arka plandaki bir iş parçacığında çalışır; port=0 ile boş
+    bir port seçilir (seçilen port ``port`` özelliğindedir).
+    """
+
+    def __init__(self, registry: MetricsRegistry, port: int = 9464, host: str = "127.0.0.1"):
+        self.registry = registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(handler):
+                if handler.path.split("?", 1)[0] not in ("/metrics", "/"):
+                    handler.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                handler.send_response(200)
+                handler.send_header("Content-Type", CONTENT_TYPE)
+                handler.send_header("Content-Length", str(len(body)))
+                handler.end_headers()
+                handler.wfile.write(body)
+
+            def log_message(handler, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.host, self.port = self._server.server_address[:2]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
@@ -0,0 +1,206 @@
+"""
+Sınırlı bellekli kullanıcı alışkanlığı öğrenicisi.
+
+Her komut O(1) sürede işlenir ve bellek kullanımı geçmişin uzunluğundan
+bağımsızdır:
+
+- Cihaz kullanımı, haftanın her saati için (7 x 24 = 168 kova) sabit
+  boyutlu sayaç dizilerinde tutulur.
+- Sayaçlar yarı ömürle zamanla söner (ileri sönümleme: yeni gözlemler
+  daha büyük ağırlıkla eklenir, sorguda geçerli ağırlığa bölünür; böylece
+  her gözlemde tüm sayaçları güncellemek gerekmez).
+- Sabah ve akşam rutinleri boyutu sınırlı, sıralı kümelerdir; en uzun
+  süredir görülmeyen gerçek ilk çıkarılır.
+- Sıcaklık tercihi sönümlü ağırlıklı ortalama olarak tutulur.
+"""
+
+import datetime
+from array import array
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+HOURS_PER_WEEK = 7 * 24
+
+# Varsayılan yarı ömür: iki hafta önceki gözlem bugünkünün yarısı kadar etkilidir
+DEFAULT_HALF_LIFE = 14 * 24 * 3600.0
+
+# Bir rutinde tutulan en fazla gerçek sayısı
+DEFAULT_MAX_ROUTINE = 32
+
+# Ağırlık üssü bu değeri aşınca sayaçlar yeniden ölçeklenir (taşmayı önler)
+_MAX_EXPONENT = 60.0
+
+# Rutin pencereleri: (ad, başlangıç saati, bitiş saati)
+ROUTINE_WINDOWS: Tuple[Tuple[str, int, int], ...] = (
+    ("sabah_rutini", 5, 10),
+    ("akşam_rutini", 18, 23),
+)
+
+# Sıcaklık tercihini belirten gerçekler
+WARMER_FACTS = frozenset(("kişi_üşüyor", "sıcaklık_artır_isteği"))
+COOLER_FACTS = frozenset(("sıcaklık_azalt_isteği",))
+
+
+def hour_of_week(timestamp: float) -> int:
+    """Zaman damgasının haftanın kaçıncı saati olduğunu döndür (Pazartesi 00:00 = 0)."""
+    moment = datetime.datetime.fromtimestamp(timestamp)
+    return moment.weekday() * 24 + moment.hour
+
+
+class PatternLearner:
+    """Saat kovalı, sönümlü sayaçlarla kullanıcı alışkanlıklarını öğrenir."""
+
+    __slots__ = ("half_life", "max_routine", "_landmark", "_hourly", "_totals", "_routines",
+                 "_warmer", "_cooler", "_temp_weight", "_temp_sum")
+
+    def __init__(self, half_life: float = DEFAULT_HALF_LIFE, max_routine: int = DEFAULT_MAX_ROUTINE):
+        self.half_life = half_life
+        self.max_routine = max_routine
+        # İleri sönümleme için referans zamanı (ilk gözlemde belirlenir)
+        self._landmark: Optional[float] = None
+        # Cihaz -> 168 saatlik ağırlıklı sayaç ve toplam
+        self._hourly: Dict[str, array] = {}
+        self._totals: Dict[str, float] = {}
+        self._routines: Dict[str, "OrderedDict[str, None]"] = {name: OrderedDict() for name, _, _ in ROUTINE_WINDOWS}
+        self._warmer = 0.0
+        self._cooler = 0.0
+        self._temp_weight = 0.0
+        self._temp_sum = 0.0
+
+    def _weight(self, timestamp: float) -> float:
+        """timestamp anındaki bir gözlemin (landmark'a göre büyütülmüş) ağırlığı."""
+        if self._landmark is None:
+            self._landmark = timestamp
+        exponent = (timestamp - self._landmark) / self.half_life
+        if exponent > _MAX_EXPONENT:
+            self._rescale(timestamp)
+            exponent = 0.0
+        return 2.0 ** exponent
+
+    def _rescale(self, timestamp: float):
+        """Referans zamanını ileri al ve tüm sayaçları buna göre küçült (seyrek, amortize O(1))."""
+        factor = 2.0 ** (-(timestamp - self._landmark) / self.half_life)
+        for counts in self._hourly.values():
+            for index in range(HOURS_PER_WEEK):
+                counts[index] *= factor
+        for device in self._totals:
+            self._totals[device] *= factor
+        self._warmer *= factor
+        self._cooler *= factor
+        self._temp_weight *= factor
+        self._temp_sum *= factor
+        self._landmark = timestamp
+
+    def observe(self, facts: Iterable[str], devices: Iterable[str], timestamp: float,
+                temperature: Optional[float] = None):
+        """Bir komutun gerçeklerini, kullandığı cihazları ve (varsa) ayarlanan sıcaklığı öğren."""
+        weight = self._weight(timestamp)
+        moment = datetime.datetime.fromtimestamp(timestamp)
+        hour = moment.weekday() * 24 + moment.hour
+
+        for device in devices:
+            counts = self._hourly.get(device)
+            if counts is None:
+                counts = self._hourly[device] = array("d", bytes(8 * HOURS_PER_WEEK))
+            counts[hour] += weight
+            self._totals[device] = self._totals.get(device, 0.0) + weight
+
+        facts = tuple(facts)
+        for name, start, end in ROUTINE_WINDOWS:
+            if start <= moment.hour < end:
+                routine = self._routines[name]
+                for fact in facts:
+                    if fact in routine:
+                        routine.move_to_end(fact)
+                    else:
+                        routine[fact] = None
+                        if len(routine) > self.max_routine:
+                            routine.popitem(last=False)
+
+        if not WARMER_FACTS.isdisjoint(facts):
+            self._warmer += weight
+        elif not COOLER_FACTS.isdisjoint(facts):
+            self._cooler += weight
+
+        if temperature is not None:
+            self._temp_weight += weight
+            self._temp_sum += weight * temperature
+
+    # Sorgular
+
+    def top_devices(self, timestamp: float, k: int = 3) -> List[Tuple[str, float]]:
+        """Haftanın bu saatinde en sık kullanılan k cihazı (sönümlü puanlarıyla) döndür."""
+        if self._landmark is None:
+            return []
+        scale = self._weight(timestamp)
+        hour = hour_of_week(timestamp)
+        scores = [(device, counts[hour] / scale) for device, counts in self._hourly.items() if counts[hour]]
+        scores.sort(key=lambda item: (-item[1], item[0]))
+        return scores[:k]
+
+    def device_scores(self, timestamp: float) -> Dict[str, float]:
+        """Cihaz başına tüm saatler üzerinden sönümlü kullanım puanı."""
+        if self._landmark is None:
+            return {}
+        scale = self._weight(timestamp)
+        return {device: total / scale for device, total in self._totals.items()}
+
+    def preferred_temperature(self) -> Optional[float]:
+        """Ayarlanan sıcaklıkların sönümlü ağırlıklı ortalaması; gözlem yoksa None."""
+        if not self._temp_weight:
+            return None
+        return self._temp_sum / self._temp_weight
+
+    def temperature_tendency(self) -> Optional[str]:
+        """Kullanıcı daha sıcak mı daha serin mi tercih ediyor?"""
+        if self._warmer > self._cooler:
+            return "daha_sıcak_tercih"
+        if self._cooler > self._warmer:
+            return "daha_serin_tercih"
+        return None
+
+    def routine(self, name: str) -> List[str]:
+        """Rutindeki gerçekleri en eskiden en yeniye döndür."""
+        return list(self._routines.get(name, ()))
+
+    def summary(self, timestamp: float) -> Dict:
+        """Okunabilir özet (eski user_patterns biçimine yakın)."""
+        summary = {name: self.routine(name) for name in self._routines}
+        summary["sık_kullanılan_cihazlar"] = {
+            device: round(score, 3) for device, score in self.device_scores(timestamp).items()
+        }
+        summary["sıcaklık_tercihi"] = self.temperature_tendency()
+        summary["tercih_edilen_sıcaklık"] = self.preferred_temperature()
+        return summary
+
+    # Kalıcılık
+
+    def to_dict(self) -> Dict:
+        """JSON'a uygun durum."""
+        return {
+            "yarı_ömür": self.half_life,
+            "en_fazla_rutin": self.max_routine,
+            "referans": self._landmark,
+            "saatlik": {device: list(counts) for device, counts in self._hourly.items()},
+            "toplam": dict(self._totals),
+            "rutinler": {name: list(routine) for name, routine in self._routines.items()},
+            "sıcak": self._warmer,
+            "serin": self._cooler,
+            "sıcaklık_ağırlık": self._temp_weight,
+            "sıcaklık_toplam": self._temp_sum,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "PatternLearner":
+        """to_dict çıktısından öğreniciyi yeniden oluştur."""
+        learner = cls(data.get("yarı_ömür", DEFAULT_HALF_LIFE), data.get("en_fazla_rutin", DEFAULT_MAX_ROUTINE))
+        learner._landmark = data.get("referans")
+        learner._hourly = {device: array("d", counts) for device, counts in data.get("saatlik", {}).items()}
+        learner._totals = dict(data.get("toplam", {}))
+        for name, facts in data.get("rutinler", {}).items():
+            learner._routines[name] = OrderedDict.fromkeys(facts)
+        learner._warmer = data.get("sıcak", 0.0)
+        learner._cooler = data.get("serin", 0.0)
+        learner._temp_weight = data.get("sıcaklık_ağırlık", 0.0)
+        learner._temp_sum = data.get("sıcaklık_toplam", 0.0)
+        return learner
@@ -0,0 +1,275 @@
+"""
+Toplu / akış halinde komut oynatma.
+
+Komutları bir dosyadan ya da standart girdiden JSONL olarak okur; her
+satır ``{"ev": "ev-42", "zaman": 1718000000, "komut": "ışıkları aç"}``
+biçimindedir (zaman Unix zaman damgası ya da ISO 8601 metnidir). Her ev
+kendi elle ilerletilen saatine (ManualClock) sahiptir; kaydın zamanı bu
+saate verilir, böylece zaman gerçekleri kaydedilen anlara göre oluşur.
+
+Evler kimliklerine göre bir süreç havuzuna dağıtılır: aynı evin komutları
+her zaman aynı işçide, girdi sırasıyla işlenir. Sonuçlar (eklenen
+gerçekler, cihaz değişiklikleri, duygu) JSONL olarak akar; farklı evlerin
+sonuçları karışık sırada gelebilir, ``sıra`` alanı girdideki satır
+numarasıdır.
+
+Kullanım:
+    python replay.py komutlar.jsonl --output sonuç.jsonl --workers 4
+    cat komutlar.jsonl | python replay.py --rules yeni_kurallar.txt > sonuç.jsonl
+    python replay.py komutlar.jsonl --rules kurallar.json   # rule_compiler.py ile derlenmiş paket
+"""
+
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import zlib
+from typing import Dict, IO, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from app import LogicAgent, default_rule_base
+from events import DeviceChanged, EventBus, FactAsserted
+from rule_compiler import COMPILED_SUFFIX, compile_rules, load_compiled, load_rules
+from rule_engine import RuleNetwork
+from scheduler import ManualClock
+
+# İşçilere gönderilen ve geri alınan kayıt öbeklerinin boyutu
+DEFAULT_CHUNK_SIZE = 256
+
+# İşçi başına kuyrukta bekleyebilecek en fazla öbek (geri basınç)
+MAX_PENDING_CHUNKS = 8
+
+
+def parse_timestamp(value) -> float:
+    """Unix zaman damgasını ya da ISO 8601 metnini saniyeye çevir."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    return datetime.datetime.fromisoformat(value).timestamp()
+
+
+def read_commands(lines: Iterable[str]) -> Iterator[Dict]:
+    """
+    JSONL satırlarını kayıtlara çevir. Her kayda girdi sırası (``sıra``)
+    eklenir; okunamayan satırlar ``hata`` alanlı kayıt olarak döner.
+    """
+    for number, line in enumerate(lines):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+            record = {
+                "sıra": number,
+                "ev": str(record["ev"]),
+                "zaman": parse_timestamp(record["zaman"]) if record.get("zaman") is not None else None,
+                "komut": record["komut"],
+            }
+        except (ValueError, KeyError, TypeError) as e:
+            record = {"sıra": number, "hata": f"Geçersiz kayıt: {e}"}
+        yield record
+
+
+def build_rule_base(rules: Sequence[str] = (), compiled: Optional[str] = None) -> RuleNetwork:
+    """
+    Evlerin paylaştığı kural tabanı: derlenmiş bir paket verilirse o yüklenir,
+    aksi halde verilen kurallar varsayılan kural tabanına eklenip dondurulur.
+    """
+    if compiled is not None:
+        return load_compiled(compiled)
+    if not rules:
+        return default_rule_base()
+    return compile_rules(rules, default_rule_base())
+
+
+def home_partition(home_id: str, workers: int) -> int:
+    """Evin atanacağı işçi; süreçler arasında kararlıdır (str hash'inden farklı olarak)."""
+    return zlib.crc32(home_id.encode("utf-8")) % workers
+
+
+class HomeReplayer:
+    """Bir işçideki evlerin ajanlarını tutar ve kayıtları sırayla işler."""
+
+    def __init__(self, rules: Sequence[str] = (), compiled: Optional[str] = None):
+        self.rule_base = build_rule_base(rules, compiled)
+        self.events = EventBus()
+        self.events.subscribe(self._on_fact, FactAsserted)
+        self.events.subscribe(self._on_device, DeviceChanged)
+        self._agents: Dict[str, Tuple[LogicAgent, ManualClock]] = {}
+        self._facts_added: List[str] = []
+        self._device_changes: Dict[str, bool] = {}
+
+    def _on_fact(self, event: FactAsserted):
+        self._facts_added.append(event.fact)
+
+    def _on_device(self, event: DeviceChanged):
+        self._device_changes[event.device] = event.state
+
+    def _agent_for(self, home_id: str, timestamp: float) -> Tuple[LogicAgent, ManualClock]:
+        entry = self._agents.get(home_id)
+        if entry is None:
+            # Ev ilk kaydının anında oluşturulur; başlangıç gerçekleri sonuca yazılmaz
+            clock = ManualClock(timestamp)
+            agent = LogicAgent(rule_base=self.rule_base, event_bus=self.events, clock=clock)
+            entry = self._agents[home_id] = (agent, clock)
+        return entry
+
+    def process(self, record: Dict) -> Dict:
+        """Kaydı evin ajanında işle ve sonucu döndür."""
+        if "hata" in record:
+            return record
+
+        timestamp = record["zaman"]
+        agent, clock = self._agent_for(record["ev"], timestamp if timestamp is not None else time.time())
+        # Saat geri gitmez; zamansız ya da sırası bozuk kayıtlar evin son anında işlenir
+        if timestamp is not None and timestamp > clock.now:
+            clock.set(timestamp)
+
+        self._facts_added = []
+        self._device_changes = {}
+        result = {"sıra": record["sıra"], "ev": record["ev"], "zaman": clock.now, "komut": record["komut"]}
+        try:
+            emotion = agent.process_command(record["komut"])
+        except Exception as e:
+            result["hata"] = f"{type(e).__name__}: {e}"
+            return result
+
+        result["duygu"] = emotion
+        result["eklenen_gerçekler"] = list(dict.fromkeys(self._facts_added))
+        result["cihaz_değişiklikleri"] = self._device_changes
+        return result
+
+    def __len__(self):
+        return len(self._agents)
+
+
+def _worker(inbox, outbox, rules: Sequence[str], compiled: Optional[str]):
+    """İşçi süreci: öbekleri sırayla işle, sonuç öbeklerini geri gönder; None gelince dur."""
+    replayer = HomeReplayer(rules, compiled)
+    while True:
+        chunk = inbox.get()
+        if chunk is None:
+            break
+        outbox.put([replayer.process(record) for record in chunk])
+    outbox.put(None)
+
+
+def replay(records: Iterable[Dict], workers: int = 1, rules: Sequence[str] = (),
+           chunk_size: int = DEFAULT_CHUNK_SIZE, compiled: Optional[str] = None) -> Iterator[Dict]:
+    """
+    Kayıtları oynat ve sonuçları üretildikçe döndür. workers <= 1 ise aynı
+    süreçte ve girdi sırasıyla işlenir; aksi halde evler işçi süreçlere
+    dağıtılır ve her evin sonuçları kendi içinde sıralı gelir.
+    """
+    if workers <= 1:
+        replayer = HomeReplayer(rules, compiled)
+        for record in records:
+            yield replayer.process(record)
+        return
+
+    context = multiprocessing.get_context()
+    outbox = context.Queue()
+    inboxes = [context.Queue(MAX_PENDING_CHUNKS) for _ in range(workers)]
+    processes = [context.Process(target=_worker, args=(inbox, outbox, tuple(rules), compiled), daemon=True)
+                 for inbox in inboxes]
+    for process in processes:
+        process.start()
+
+    def feed():
+        # Kayıtlar ev kimliğine göre öbeklenir; okunamayan kayıtlar doğrudan sonuç olur
+        pending: List[List[Dict]] = [[] for _ in range(workers)]
+        try:
+            for record in records:
+                if "hata" in record:
+                    outbox.put([record])
+                    continue
+                index = home_partition(record["ev"], workers)
+                pending[index].append(record)
+                if len(pending[index]) >= chunk_size:
+                    inboxes[index].put(pending[index])
+                    pending[index] = []
+        finally:
+            for inbox, chunk in zip(inboxes, pending):
+                if chunk:
+                    inbox.put(chunk)
+                inbox.put(None)
+
+    feeder = threading.Thread(target=feed, name="replay-feeder", daemon=True)
+    feeder.start()
+
+    running = workers
+    try:
+        while running:
+            chunk = outbox.get()
+            if chunk is None:
+                running -= 1
+                continue
+            yield from chunk
+    finally:
+        if running:
+            # Tüketici erken bıraktı; işçiler beklenmeden sonlandırılır
+            for process in processes:
+                process.terminate()
+        else:
+            feeder.join()
+        for process in processes:
+            process.join()
+
+
+def write_results(results: Iterable[Dict], output: IO[str]) -> Dict[str, float]:
+    """Sonuçları JSONL olarak yaz ve oynatma özetini döndür."""
+    start = time.perf_counter()
+    commands = errors = 0
+    homes = set()
+    for result in results:
+        output.write(json.dumps(result, ensure_ascii=False) + "\n")
+        commands += 1
+        if "hata" in result:
+            errors += 1
+        elif "ev" in result:
+            homes.add(result["ev"])
+    elapsed = time.perf_counter() - start
+    return {
+        "komut_sayısı": commands,
+        "ev_sayısı": len(homes),
+        "hata_sayısı": errors,
+        "süre_sn": elapsed,
+        "komut_per_sn": commands / elapsed if elapsed else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="JSONL komut kayıtlarını oynat ve sonuçları JSONL olarak yaz")
+    parser.add_argument("input", nargs="?", help="Komut dosyası (verilmezse standart girdi)")
+    parser.add_argument("--output", help="Sonuç dosyası (verilmezse standart çıktı)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="İşçi süreç sayısı (1 = aynı süreçte)")
+    parser.add_argument("--rules", help="Varsayılan kurallara eklenecek kural dosyası (her satır 'koşul -> eylem') "
+                                        "ya da varsayılan kuralların yerine geçen derlenmiş paket (.json)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="İşçilere gönderilen öbek boyutu")
+    args = parser.parse_args(argv)
+
+    rules: Sequence[str] = ()
+    compiled = None
+    if args.rules and args.rules.endswith(COMPILED_SUFFIX):
+        compiled = args.rules
+    elif args.rules:
+        rules = load_rules(args.rules)
+    source = open(args.input, encoding="utf-8") if args.input else sys.stdin
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        summary = write_results(replay(read_commands(source), args.workers, rules, args.chunk_size, compiled),
+                                output)
+    finally:
+        if args.input:
+            source.close()
+        if args.output:
+            output.close()
+
+    # Özet standart hataya yazılır; standart çıktı yalnızca sonuçları içerir
+    print(json.dumps(summary, ensure_ascii=False), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+"""
+Kural tabanı derleyicisi ve statik çözümleme.
+
+Kural dosyaları yüklenirken bir kez çözümlenir: gerçek -> kural bağımlılık
+çizgesi ve topolojik değerlendirme sırası (RuleNetwork.order) çalışma
+zamanında da kullanılır. Çözümleme şunları raporlar:
+
+- aynı koşula sahip kurallar (hepsi tutulur, yalnızca bilgi amaçlıdır),
+- aynı anda sağlanabilen ve aynı cihazı zıt durumlara geçiren kurallar
+  (örn. ``ışık_aç`` ve ``ışık_kapat``),
+- ölü kurallar: koşulu hiçbir zaman sağlanamayanlar ve girdi gerçekleri
+  verildiyse hiçbir girdinin ya da kuralın üretmediği gerçeklere dayananlar,
+- birbirini tetikleyen kural döngüleri.
+
+Büyük kural paketleri derlenmiş biçimde (JSON) saklanabilir; yükleme
+koşulları yeniden ayrıştırmaz ve topolojik sırayı yeniden hesaplamaz.
+
+Kullanım:
+    python rule_compiler.py kurallar.txt --output kurallar.json
+    python rule_compiler.py kurallar.txt --defaults --output kurallar.json
+    python rule_compiler.py kurallar.json --inputs kişi_evde zaman_gece
+"""
+
+import argparse
+import json
+import time
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from devices import ActionTable, device_command
+from rule_engine import SYMBOLS, Rule, RuleNetwork, Term, parse_rule
+
+# Derlenmiş kural paketlerinin uzantısı; diğer dosyalar "koşul -> eylem" satırları olarak okunur
+COMPILED_SUFFIX = ".json"
+
+
+def compile_rules(rules: Iterable[str], base: Optional[RuleNetwork] = None) -> RuleNetwork:
+    """"koşul -> eylem" metinlerini (varsa base'in kopyasına ekleyerek) derle ve dondur."""
+    network = base.copy() if base is not None else RuleNetwork()
+    for rule in rules:
+        network.add(*parse_rule(rule))
+    return network.freeze()
+
+
+def save_compiled(network: RuleNetwork, path: str):
+    """Ağı derlenmiş biçimde dosyaya yaz."""
+    with open(path, "w", encoding="utf-8") as output:
+        json.dump(network.to_dict(), output, ensure_ascii=False, separators=(",", ":"))
+
+
+def load_compiled(path: str) -> RuleNetwork:
+    """Derlenmiş kural paketini yükle ve dondurulmuş ağ olarak döndür."""
+    with open(path, encoding="utf-8") as source:
+        return RuleNetwork.from_dict(json.load(source)).freeze()
+
+
+def load_rules(path: str) -> List[str]:
+    """Kural dosyasını oku: her satır "koşul -> eylem"; boş ve # ile başlayan satırlar atlanır."""
+    with open(path, encoding="utf-8") as rules:
+        return [line.strip() for line in rules if line.strip() and not line.lstrip().startswith("#")]
+
+
+def _describe(rule: Rule) -> str:
+    return f"{rule.condition} -> {rule.action}"
+
+
+class RuleReport:
+    """Statik çözümleme sonucu; kurallar kimlikleriyle (tanımlanma sırası) anılır."""
+
+    def __init__(self, network: RuleNetwork, duplicates: List[List[int]], conflicts: List[Tuple[int, int, str]],
+                 dead: List[Tuple[int, str]], unproduced: List[str], cycles: List[List[int]]):
+        self.network = network
+        self.duplicates = duplicates
+        self.conflicts = conflicts
+        self.dead = dead
+        self.unproduced = unproduced
+        self.cycles = cycles
+
+    @property
+    def order(self) -> List[int]:
+        """Kural kimlikleri, değerlendirme sırasıyla."""
+        order = self.network.order
+        return sorted(range(len(order)), key=order.__getitem__)
+
+    def to_dict(self) -> Dict:
+        rules = self.network.rules
+        return {
+            "kural_sayısı": len(rules),
+            "aynı_koşullu": [{"koşul": rules[group[0]].condition,
+                              "eylemler": [rules[rule_id].action for rule_id in group]}
+                             for group in self.duplicates],
+            "çelişkiler": [{"cihaz": device, "kurallar": [_describe(rules[first]), _describe(rules[second])]}
+                           for first, second, device in self.conflicts],
+            "ölü_kurallar": [{"kural": _describe(rules[rule_id]), "neden": reason} for rule_id, reason in self.dead],
+            "üretilmeyen_gerçekler": self.unproduced,
+            "döngüler": [[_describe(rules[rule_id]) for rule_id in cycle] for cycle in self.cycles],
+        }
+
+
+def _bit_count(bits: int) -> int:
+    return bin(bits).count("1")
+
+
+def _possible_terms(rule: Rule, exclusive: Sequence[int]) -> Optional[List[Term]]:
+    """Kuralın sağlanabilir DNF terimleri; birbirini dışlayan iki gerçeği isteyen terimler atılır."""
+    if rule.terms is None:
+        return None
+    return [(required, forbidden) for required, forbidden in rule.terms
+            if not any(_bit_count(required & group) > 1 for group in exclusive)]
+
+
+def _can_hold_together(first: Optional[List[Term]], second: Optional[List[Term]], exclusive: Sequence[int]) -> bool:
+    # DNF'ye dönüştürülemeyen koşullar için ihtiyatlı davranılır
+    if first is None or second is None:
+        return True
+    for required, forbidden in first:
+        for other_required, other_forbidden in second:
+            both = required | other_required
+            if both & (forbidden | other_forbidden):
+                continue
+            if any(_bit_count(both & group) > 1 for group in exclusive):
+                continue
+            return True
+    return False
+
+
+def _device_states(action: str, actions: Optional[ActionTable]) -> Tuple[Tuple[str, bool], ...]:
+    if actions is not None:
+        definition = actions.resolve(action)
+        return definition.devices if definition is not None else ()
+    command = device_command(action)
+    return (command,) if command is not None else ()
+
+
+def _cycles(network: RuleNetwork) -> List[List[int]]:
+    """Bağımlılık çizgesindeki kural döngüleri (Tarjan, yinelemeli)."""
+    rules = network.rules
+    dependents = [network.dependents(rule) for rule in rules]
+    index = [-1] * len(rules)
+    low = [0] * len(rules)
+    on_stack = [False] * len(rules)
+    stack: List[int] = []
+    cycles = []
+    counter = 0
+
+    for root in range(len(rules)):
+        if index[root] >= 0:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        work = [(root, iter(dependents[root]))]
+        while work:
+            node, children = work[-1]
+            for child in children:
+                if index[child] < 0:
+                    index[child] = low[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack[child] = True
+                    work.append((child, iter(dependents[child])))
+                    break
+                if on_stack[child]:
+                    low[node] = min(low[node], index[child])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        component.append(member)
+                        if member == node:
+                            break
+                    if len(component) > 1 or node in dependents[node]:
+                        cycles.append(sorted(component))
+    return sorted(cycles)
+
+
+def analyze(network: RuleNetwork, inputs: Optional[Iterable[str]] = None, actions: Optional[ActionTable] = None,
+            exclusive: Iterable[Iterable[str]] = ()) -> RuleReport:
+    """
+    Kural tabanını statik olarak çözümle. inputs, kurallar dışında
+    söylenebilecek gerçeklerdir (komutlar, zaman, cihaz durumları); verilmezse
+    erişilebilirlik denetimi yapılmaz. actions eylemlerin cihaz etkilerini
+    çözer (verilmezse ``<cihaz>_aç``/``<cihaz>_kapat`` adlarına bakılır).
+    exclusive, aynı anda bulunamayan gerçek gruplarıdır (örn. zaman dilimleri).
+    """
+    rules = network.rules
+    exclusive_masks = [SYMBOLS.mask(group) for group in exclusive]
+    terms = [_possible_terms(rule, exclusive_masks) for rule in rules]
+
+    by_condition: Dict[str, List[int]] = {}
+    for rule in rules:
+        by_condition.setdefault(rule.condition, []).append(rule.rule_id)
+    duplicates = [group for group in by_condition.values() if len(group) > 1]
+
+    dead: Dict[int, str] = {}
+    for rule in rules:
+        if terms[rule.rule_id] == []:
+            dead[rule.rule_id] = "koşul hiçbir zaman sağlanamaz"
+
+    unproduced: List[str] = []
+    if inputs is not None:
+        # Girdilerden başlayarak üretilebilen gerçekleri sabit noktaya kadar yay
+        input_bits = SYMBOLS.mask(inputs)
+        available = input_bits
+        live = [False] * len(rules)
+        pending = deque(range(len(rules)))
+        while pending:
+            rule_id = pending.popleft()
+            rule = rules[rule_id]
+            if live[rule_id] or rule_id in dead:
+                continue
+            rule_terms = terms[rule_id]
+            if rule_terms is not None and not any(required & ~available == 0 for required, _ in rule_terms):
+                continue
+            live[rule_id] = True
+            if not available & rule.action_bit:
+                available |= rule.action_bit
+                pending.extend(network.dependents(rule))
+
+        for rule in rules:
+            if not live[rule.rule_id] and rule.rule_id not in dead:
+                missing = min((required & ~available for required, _ in terms[rule.rule_id]), key=_bit_count)
+                dead[rule.rule_id] = "üretilmeyen gerçeklere dayanıyor: " + ", ".join(sorted(SYMBOLS.names(missing)))
+
+        referenced = SYMBOLS.mask(atom for rule in rules for atom in rule.atoms)
+        produced = input_bits | SYMBOLS.mask(rule.action for rule in rules)
+        unproduced = sorted(SYMBOLS.names(referenced & ~produced))
+
+    # Aynı cihazı zıt durumlara geçiren ve birlikte sağlanabilen canlı kurallar
+    by_device: Dict[str, Tuple[List[int], List[int]]] = {}
+    for rule in rules:
+        if rule.rule_id in dead:
+            continue
+        for device, state in _device_states(rule.action, actions):
+            by_device.setdefault(device, ([], []))[state].append(rule.rule_id)
+    conflicts = []
+    for device, (turned_off, turned_on) in sorted(by_device.items()):
+        for first in turned_on:
+            for second in turned_off:
+                if _can_hold_together(terms[first], terms[second], exclusive_masks):
+                    conflicts.append((min(first, second), max(first, second), device))
+
+    return RuleReport(network, duplicates, sorted(conflicts), sorted(dead.items()), unproduced, _cycles(network))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Kural dosyasını derle ve statik olarak çözümle")
+    parser.add_argument("rules", help="Kural dosyası (her satır 'koşul -> eylem') ya da derlenmiş paket (.json)")
+    parser.add_argument("--output", help="Derlenmiş paketin yazılacağı dosya")
+    parser.add_argument("--defaults", action="store_true",
+                        help="Varsayılan kuralları da ekle ve ajanın girdi gerçekleriyle çözümle")
+    parser.add_argument("--inputs", nargs="*", help="Kurallar dışında söylenebilecek gerçekler")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.rules.endswith(COMPILED_SUFFIX):
+        network = load_compiled(args.rules)
+    else:
+        base = None
+        if args.defaults:
+            # app bu modülü içe aktardığından yalnızca gerektiğinde yüklenir
+            from app import default_rule_base
+            base = default_rule_base()
+        network = compile_rules(load_rules(args.rules), base)
+    elapsed = time.perf_counter() - start
+
+    if args.output:
+        save_compiled(network, args.output)
+
+    if args.defaults:
+        from app import LogicAgent
+        report = LogicAgent(rule_base=network).analyze_rules(args.inputs or ())
+    else:
+        report = analyze(network, args.inputs)
+    result = report.to_dict()
+    result["yükleme_sn"] = elapsed
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
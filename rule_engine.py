@@ -0,0 +1,639 @@
+"""
+LogicAgent için kural koşulu derleyicisi.
+
+Koşul metinleri ("(zaman_sabah | zaman_akşam) & !televizyon_açık") bir kez
+ayrıştırılıp ifade ağacına dönüştürülür. Değerlendirme sırasında metin
+işlemi yapılmaz, yalnızca ağaç üzerinde yürünür.
+
+Öncelik sırası (yüksekten düşüğe): ``!`` , ``&`` , ``|``. Parantezler
+öncelik sırasını değiştirmek için kullanılabilir.
+
+Gerçek adları derleme sırasında tam sayı kimliklerine dönüştürülür (SYMBOLS)
+ve gerçek kümeleri bit maskesi olarak tutulur. Koşullar mümkün olduğunda
+(gerekli, yasak) maske çiftlerinin bir listesine (DNF) indirgenir; böylece
+değerlendirme ``(facts & required) == required and not facts & forbidden``
+sınamalarından ibarettir.
+"""
+
+import heapq
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+
+class ConditionSyntaxError(ValueError):
+    """Kural koşulu ayrıştırılamadığında fırlatılır."""
+
+
+class RuleCycleError(RuntimeError):
+    """İleri zincirleme sabit noktaya ulaşmadan kurallar döngüye girdiğinde fırlatılır."""
+
+
+class FactSymbols:
+    """
+    Gerçek adı <-> tam sayı kimliği tablosu. Süreç genelinde paylaşılır ve
+    yalnızca büyür; bir gerçeğin kimliği bit maskesindeki konumudur.
+    """
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+
+    def __len__(self):
+        return len(self._names)
+
+    def intern(self, name: str) -> int:
+        """Gerçek adının kimliğini döndür; ilk kez görülüyorsa yeni kimlik ata."""
+        fact_id = self._ids.get(name)
+        if fact_id is None:
+            fact_id = len(self._names)
+            self._ids[name] = fact_id
+            self._names.append(name)
+        return fact_id
+
+    def lookup(self, name: str) -> Optional[int]:
+        """Gerçek adının kimliğini döndür; hiç görülmemişse kimlik atamadan None."""
+        return self._ids.get(name)
+
+    def bit(self, name: str) -> int:
+        """Gerçeğin bit maskesindeki tek bitlik değeri."""
+        return 1 << self.intern(name)
+
+    def mask(self, names: Iterable[str]) -> int:
+        """Gerçek adlarından bit maskesi oluştur."""
+        bits = 0
+        for name in names:
+            bits |= 1 << self.intern(name)
+        return bits
+
+    def name(self, fact_id: int) -> str:
+        return self._names[fact_id]
+
+    def ids(self, bits: int) -> Iterator[int]:
+        """Maskede bulunan gerçeklerin kimliklerini artan sırayla üret."""
+        while bits:
+            low = bits & -bits
+            yield low.bit_length() - 1
+            bits ^= low
+
+    def names(self, bits: int) -> List[str]:
+        """Maskede bulunan gerçeklerin adlarını döndür."""
+        return [self._names[fact_id] for fact_id in self.ids(bits)]
+
+
+SYMBOLS = FactSymbols()
+
+# DNF'ye dönüştürmede izin verilen en fazla terim sayısı; aşılırsa ağaç değerlendirilir
+MAX_DNF_TERMS = 64
+
+# DNF terimi: (bulunması gereken gerçekler maskesi, bulunmaması gereken gerçekler maskesi)
+Term = Tuple[int, int]
+
+
+class Condition:
+    """Derlenmiş koşul ağacındaki düğümlerin temel sınıfı."""
+
+    __slots__ = ()
+
+    def evaluate_bits(self, bits: int) -> bool:
+        """Koşulu gerçeklerin bit maskesi üzerinde değerlendir."""
+        raise NotImplementedError
+
+    def atoms(self) -> FrozenSet[str]:
+        """Koşulun başvurduğu tüm atomik gerçekleri döndür."""
+        raise NotImplementedError
+
+    def negate(self) -> "Condition":
+        """De Morgan kurallarıyla değili yapraklara indirilmiş koşulu döndür."""
+        raise NotImplementedError
+
+    def to_dnf(self) -> Optional[List[Term]]:
+        """Koşulu (gerekli, yasak) maske terimlerinin VEYA'sına dönüştür; çok büyürse None."""
+        raise NotImplementedError
+
+
+class FactCondition(Condition):
+    """Tek bir gerçeğin varlığını sınayan yaprak düğüm."""
+
+    __slots__ = ("name", "bit")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.bit = SYMBOLS.bit(name)
+
+    def evaluate_bits(self, bits: int) -> bool:
+        return bool(bits & self.bit)
+
+    def atoms(self) -> FrozenSet[str]:
+        return frozenset((self.name,))
+
+    def negate(self) -> Condition:
+        return NotCondition(self)
+
+    def to_dnf(self) -> Optional[List[Term]]:
+        return [(self.bit, 0)]
+
+    def __repr__(self):
+        return self.name
+
+
+class NotCondition(Condition):
+    """Alt koşulun değilini alan düğüm."""
+
+    __slots__ = ("operand",)
+
+    def __init__(self, operand: Condition):
+        self.operand = operand
+
+    def evaluate_bits(self, bits: int) -> bool:
+        return not self.operand.evaluate_bits(bits)
+
+    def atoms(self) -> FrozenSet[str]:
+        return self.operand.atoms()
+
+    def negate(self) -> Condition:
+        return self.operand
+
+    def to_dnf(self) -> Optional[List[Term]]:
+        if isinstance(self.operand, FactCondition):
+            return [(0, self.operand.bit)]
+        return self.operand.negate().to_dnf()
+
+    def __repr__(self):
+        return f"!{self.operand!r}"
+
+
+class AndCondition(Condition):
+    """Tüm alt koşulların doğru olmasını gerektiren düğüm."""
+
+    __slots__ = ("operands",)
+
+    def __init__(self, operands: Tuple[Condition, ...]):
+        self.operands = operands
+
+    def evaluate_bits(self, bits: int) -> bool:
+        for operand in self.operands:
+            if not operand.evaluate_bits(bits):
+                return False
+        return True
+
+    def atoms(self) -> FrozenSet[str]:
+        return frozenset().union(*(operand.atoms() for operand in self.operands))
+
+    def negate(self) -> Condition:
+        return OrCondition(tuple(operand.negate() for operand in self.operands))
+
+    def to_dnf(self) -> Optional[List[Term]]:
+        terms: List[Term] = [(0, 0)]
+        for operand in self.operands:
+            operand_terms = operand.to_dnf()
+            if operand_terms is None:
+                return None
+            # Terimlerin çarpımı; hem gerekli hem yasak olan gerçek içeren terimler hiç sağlanamaz
+            terms = [
+                (required | other_required, forbidden | other_forbidden)
+                for required, forbidden in terms
+                for other_required, other_forbidden in operand_terms
+                if not (required | other_required) & (forbidden | other_forbidden)
+            ]
+            if len(terms) > MAX_DNF_TERMS:
+                return None
+        return terms
+
+    def __repr__(self):
+        return "(" + " & ".join(repr(operand) for operand in self.operands) + ")"
+
+
+class OrCondition(Condition):
+    """Alt koşullardan en az birinin doğru olmasını gerektiren düğüm."""
+
+    __slots__ = ("operands",)
+
+    def __init__(self, operands: Tuple[Condition, ...]):
+        self.operands = operands
+
+    def evaluate_bits(self, bits: int) -> bool:
+        for operand in self.operands:
+            if operand.evaluate_bits(bits):
+                return True
+        return False
+
+    def atoms(self) -> FrozenSet[str]:
+        return frozenset().union(*(operand.atoms() for operand in self.operands))
+
+    def negate(self) -> Condition:
+        return AndCondition(tuple(operand.negate() for operand in self.operands))
+
+    def to_dnf(self) -> Optional[List[Term]]:
+        terms: List[Term] = []
+        for operand in self.operands:
+            operand_terms = operand.to_dnf()
+            if operand_terms is None:
+                return None
+            terms.extend(operand_terms)
+            if len(terms) > MAX_DNF_TERMS:
+                return None
+        return terms
+
+    def __repr__(self):
+        return "(" + " | ".join(repr(operand) for operand in self.operands) + ")"
+
+
+_OPERATORS = "&|!()"
+
+
+def _tokenize(text: str) -> List[str]:
+    """Koşul metnini operatör ve gerçek adı belirteçlerine ayır."""
+    tokens = []
+    i = 0
+    length = len(text)
+    while i < length:
+        char = text[i]
+        if char.isspace():
+            i += 1
+        elif char in _OPERATORS:
+            tokens.append(char)
+            i += 1
+        else:
+            start = i
+            while i < length and not text[i].isspace() and text[i] not in _OPERATORS:
+                i += 1
+            tokens.append(text[start:i])
+    return tokens
+
+
+class _Parser:
+    """Özyinelemeli iniş ayrıştırıcısı: or -> and ('|' and)*, and -> unary ('&' unary)*."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = _tokenize(text)
+        self.pos = 0
+
+    def _peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _error(self, message: str):
+        raise ConditionSyntaxError(f"{message}: '{self.text}'")
+
+    def parse(self) -> Condition:
+        if not self.tokens:
+            self._error("Boş koşul")
+        node = self._parse_or()
+        if self._peek() is not None:
+            self._error(f"Beklenmeyen belirteç '{self._peek()}'")
+        return node
+
+    def _parse_or(self) -> Condition:
+        operands = [self._parse_and()]
+        while self._peek() == "|":
+            self.pos += 1
+            operands.append(self._parse_and())
+        return operands[0] if len(operands) == 1 else OrCondition(_flatten(operands, OrCondition))
+
+    def _parse_and(self) -> Condition:
+        operands = [self._parse_unary()]
+        while self._peek() == "&":
+            self.pos += 1
+            operands.append(self._parse_unary())
+        return operands[0] if len(operands) == 1 else AndCondition(_flatten(operands, AndCondition))
+
+    def _parse_unary(self) -> Condition:
+        token = self._peek()
+        if token is None:
+            self._error("Koşul beklenmedik şekilde bitti")
+        if token == "!":
+            self.pos += 1
+            return NotCondition(self._parse_unary())
+        if token == "(":
+            self.pos += 1
+            node = self._parse_or()
+            if self._peek() != ")":
+                self._error("Kapanış parantezi eksik")
+            self.pos += 1
+            return node
+        if token in _OPERATORS:
+            self._error(f"Beklenmeyen operatör '{token}'")
+        self.pos += 1
+        return FactCondition(token)
+
+
+def _flatten(operands: List[Condition], node_type) -> Tuple[Condition, ...]:
+    """İç içe aynı türdeki düğümleri tek seviyeye indir: (a & (b & c)) -> (a & b & c)."""
+    flat = []
+    for operand in operands:
+        if isinstance(operand, node_type):
+            flat.extend(operand.operands)
+        else:
+            flat.append(operand)
+    return tuple(flat)
+
+
+@lru_cache(maxsize=None)
+def compile_condition(text: str) -> Condition:
+    """Koşul metnini ifade ağacına derle. Aynı metin için önbellekteki ağaç döndürülür."""
+    return _Parser(text).parse()
+
+
+def parse_rule(rule: str) -> Tuple[str, str]:
+    """'koşul -> eylem' biçimindeki kural metnini (koşul, eylem) olarak ayır."""
+    if "->" not in rule:
+        raise ValueError("Kural 'koşul -> eylem' formatında olmalıdır")
+
+    condition, action = rule.split("->")
+    return condition.strip(), action.strip()
+
+
+class Rule:
+    """
+    Derlenmiş koşulu, eylemi ve başvurduğu gerçekleri tutan kural kaydı.
+    Derlenmiş biçimden yüklenen kurallarda koşul ağacı (compiled) yalnızca
+    koşul DNF'ye dönüştürülemediyse tutulur.
+    """
+
+    __slots__ = ("rule_id", "condition", "action", "compiled", "atoms", "terms", "action_bit")
+
+    def __init__(self, rule_id: int, condition: str, action: str, compiled: Optional[Condition],
+                 atoms: Optional[FrozenSet[str]] = None, terms: Optional[Tuple[Term, ...]] = None):
+        self.rule_id = rule_id
+        self.condition = condition
+        self.action = action
+        self.compiled = compiled
+        if compiled is not None:
+            atoms = compiled.atoms()
+            # Koşulun maske terimleri (DNF); dönüştürülemezse ağaç değerlendirilir
+            terms = compiled.to_dnf()
+            terms = tuple(terms) if terms is not None else None
+        self.atoms = atoms
+        self.terms = terms
+        # Kural sonucu çıkarılan bir gerçek olarak eklenir
+        self.action_bit = SYMBOLS.bit(action)
+
+    @property
+    def action_id(self) -> int:
+        return self.action_bit.bit_length() - 1
+
+    def matches(self, bits: int) -> bool:
+        """Kural koşulunun gerçek maskesi üzerinde sağlanıp sağlanmadığını döndür."""
+        if self.terms is None:
+            return self.compiled.evaluate_bits(bits)
+        for required, forbidden in self.terms:
+            if bits & required == required and not bits & forbidden:
+                return True
+        return False
+
+    def __repr__(self):
+        return f"Rule({self.rule_id}: {self.condition} -> {self.action})"
+
+
+# Derlenmiş kural tabanı biçiminin sürümü (RuleNetwork.to_dict)
+COMPILED_FORMAT_VERSION = 1
+
+
+class RuleNetwork:
+    """
+    Artımlı eşleştirme için kural ağı.
+
+    Her atomik gerçekten o gerçeğe başvuran kurallara bir dizin tutar. Böylece
+    bir gerçek eklendiğinde ya da kaldırıldığında yalnızca etkilenebilecek
+    kurallar yeniden değerlendirilir. Dizin aynı zamanda kurallar arası
+    bağımlılık çizgesidir: bir kuralın sonucuna başvuran kurallar ondan
+    sonra değerlendirilmelidir; ``order`` bu çizgenin topolojik sırasıdır.
+
+    Aynı koşula sahip kurallar birbirinin üzerine yazılmaz, hepsi tutulur;
+    yalnızca koşulu ve eylemi aynı olan kural ikinci kez eklenmez.
+
+    Dondurulmuş (freeze) bir ağ değiştirilemez ve birçok ajan arasında
+    paylaşılabilir; ajana özel kurallar için önce copy() ile kopyalanır.
+    Kural nesneleri değişmez olduğundan kopyalar aynı kuralları paylaşır.
+    """
+
+    def __init__(self):
+        self.rules: List[Rule] = []
+        self._by_text: Dict[Tuple[str, str], Rule] = {}
+        # Gerçek kimliği -> o gerçeğe başvuran kural kimlikleri
+        self._index: Dict[int, List[int]] = {}
+        # Kural kimliği -> topolojik sıra ve bu sıraya dizilmiş kurallar; kural eklenince yeniden hesaplanır
+        self._order: Optional[Tuple[int, ...]] = None
+        self._sequence: Optional[Tuple[Rule, ...]] = None
+        # Gerçek kimliği -> o gerçeğe başvuran kuralların sıraları
+        self._rank_index: Optional[Dict[int, Tuple[int, ...]]] = None
+        # Kuralların başvurduğu tüm atomik gerçekler; kural eklenince yeniden hesaplanır
+        self._atoms: Optional[FrozenSet[str]] = None
+        self._frozen = False
+
+    def __len__(self):
+        return len(self.rules)
+
+    @property
+    def frozen(self) -> bool:
+        return self._frozen
+
+    def freeze(self) -> "RuleNetwork":
+        """Ağı salt okunur yap ve kendisini döndür. Sıra paylaşılmadan önce hesaplanır."""
+        self.sequence
+        self.rank_index
+        self.atoms
+        self._frozen = True
+        return self
+
+    def copy(self) -> "RuleNetwork":
+        """Değiştirilebilir bir kopya döndür (kopyala-yaz)."""
+        network = RuleNetwork()
+        network.rules = list(self.rules)
+        network._by_text = dict(self._by_text)
+        network._index = {fact: list(rule_ids) for fact, rule_ids in self._index.items()}
+        network._order = self._order
+        network._sequence = self._sequence
+        network._rank_index = self._rank_index
+        network._atoms = self._atoms
+        return network
+
+    def add(self, condition: str, action: str) -> Rule:
+        """Kuralı ağa ekle. Koşulu ve eylemi aynı bir kural varsa o döndürülür."""
+        existing = self._by_text.get((condition, action))
+        if existing is not None:
+            return existing
+        return self._append(Rule(len(self.rules), condition, action, compile_condition(condition)))
+
+    def _append(self, rule: Rule) -> Rule:
+        if self._frozen:
+            raise RuntimeError("Paylaşılan kural tabanı değiştirilemez; önce copy() ile kopyalayın")
+
+        self.rules.append(rule)
+        self._by_text[(rule.condition, rule.action)] = rule
+        for atom in rule.atoms:
+            self._index.setdefault(SYMBOLS.intern(atom), []).append(rule.rule_id)
+        self._order = None
+        self._sequence = None
+        self._rank_index = None
+        self._atoms = None
+        return rule
+
+    def remove_last(self, rule: Rule):
+        """Son eklenen kuralı geri al (örn. eklenmesi bir döngüye yol açtıysa)."""
+        if self._frozen:
+            raise RuntimeError("Paylaşılan kural tabanı değiştirilemez; önce copy() ile kopyalayın")
+        if not self.rules or self.rules[-1] is not rule:
+            raise ValueError(f"Son eklenen kural değil: {rule!r}")
+
+        self.rules.pop()
+        del self._by_text[(rule.condition, rule.action)]
+        for atom in rule.atoms:
+            rule_ids = self._index[SYMBOLS.intern(atom)]
+            rule_ids.pop()
+            if not rule_ids:
+                del self._index[SYMBOLS.intern(atom)]
+        self._order = None
+        self._sequence = None
+        self._rank_index = None
+        self._atoms = None
+
+    def find(self, condition: str, action: str) -> Optional[Rule]:
+        """Koşulu ve eylemi verilen kuralı döndür."""
+        return self._by_text.get((condition, action))
+
+    def dependents(self, rule: Rule) -> List[int]:
+        """Kuralın sonucuna başvuran (ondan sonra değerlendirilmesi gereken) kuralların kimlikleri."""
+        return self._index.get(rule.action_id, [])
+
+    @property
+    def atoms(self) -> FrozenSet[str]:
+        """Kuralların başvurduğu tüm atomik gerçekler."""
+        if self._atoms is None:
+            self._atoms = frozenset().union(*(rule.atoms for rule in self.rules))
+        return self._atoms
+
+    @property
+    def order(self) -> Tuple[int, ...]:
+        """
+        Kural kimliği -> değerlendirme sırası. Bir kural, sonucuna başvurduğu
+        kurallardan sonra gelir; eşitlikte tanımlanma sırası korunur. Döngüdeki
+        kurallar en erken tanımlananından başlayarak sıraya alınır.
+        """
+        if self._order is None:
+            self._order = self._topological_order()
+        return self._order
+
+    @property
+    def sequence(self) -> Tuple[Rule, ...]:
+        """Kurallar, değerlendirme sırasıyla (sequence[order[kimlik]] kuralın kendisidir)."""
+        if self._sequence is None:
+            sequence: List[Optional[Rule]] = [None] * len(self.rules)
+            for rule, rank in zip(self.rules, self.order):
+                sequence[rank] = rule
+            self._sequence = tuple(sequence)
+        return self._sequence
+
+    def _topological_order(self) -> Tuple[int, ...]:
+        rules = self.rules
+        dependents = [self.dependents(rule) for rule in rules]
+        indegree = [0] * len(rules)
+        for targets in dependents:
+            for target in targets:
+                indegree[target] += 1
+
+        # Hazır kurallar kimliğe göre yığında; sıralı liste zaten geçerli bir yığındır
+        ready = [rule_id for rule_id, degree in enumerate(indegree) if not degree]
+        ranks = [-1] * len(rules)
+        rank = 0
+        next_unranked = 0
+        while rank < len(rules):
+            if not ready:
+                # Kalan kurallar döngüdedir; en erken tanımlanan öne alınır
+                while ranks[next_unranked] >= 0:
+                    next_unranked += 1
+                indegree[next_unranked] = 0
+                ready.append(next_unranked)
+            rule_id = heapq.heappop(ready)
+            if ranks[rule_id] >= 0:
+                continue
+            ranks[rule_id] = rank
+            rank += 1
+            for target in dependents[rule_id]:
+                indegree[target] -= 1
+                if indegree[target] == 0 and ranks[target] < 0:
+                    heapq.heappush(ready, target)
+        return tuple(ranks)
+
+    @property
+    def rank_index(self) -> Dict[int, Tuple[int, ...]]:
+        """Gerçek kimliği -> o gerçeğe başvuran kuralların değerlendirme sıraları."""
+        if self._rank_index is None:
+            order = self.order
+            self._rank_index = {fact_id: tuple(sorted(order[rule_id] for rule_id in rule_ids))
+                                for fact_id, rule_ids in self._index.items()}
+        return self._rank_index
+
+    def affected_ranks(self, changed_bits: int) -> List[int]:
+        """Değişen gerçeklerin maskesinden etkilenen kuralların sıraları (tek gerçekte artan sırada)."""
+        index = self.rank_index
+        # Çoğu değişiklik tek bir gerçektir; küme kurmadan dizinden okunur
+        if not changed_bits & (changed_bits - 1):
+            return list(index.get(changed_bits.bit_length() - 1, ()))
+        ranks = set()
+        for fact_id in SYMBOLS.ids(changed_bits):
+            ranks.update(index.get(fact_id, ()))
+        return list(ranks)
+
+    def to_dict(self) -> Dict:
+        """
+        Ağı derlenmiş haliyle JSON'a uygun bir sözlüğe dönüştür. Maskeler,
+        süreçten bağımsız olsun diye sözlükteki yerel gerçek tablosunun
+        kimlik listeleri olarak yazılır; DNF'ye dönüştürülemeyen koşullar
+        yüklenirken yeniden derlenir.
+        """
+        local: Dict[int, int] = {}
+
+        def ids(bits: int) -> List[int]:
+            return [local.setdefault(fact_id, len(local)) for fact_id in SYMBOLS.ids(bits)]
+
+        rules = []
+        for rule in self.rules:
+            atoms = ids(SYMBOLS.mask(rule.atoms))
+            terms = [[ids(required), ids(forbidden)] for required, forbidden in rule.terms] \
+                if rule.terms is not None else None
+            ids(rule.action_bit)
+            rules.append([rule.condition, rule.action, atoms, terms])
+        return {
+            "sürüm": COMPILED_FORMAT_VERSION,
+            "gerçekler": [SYMBOLS.name(fact_id) for fact_id in local],
+            "kurallar": rules,
+            "sıra": list(self.order),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "RuleNetwork":
+        """to_dict çıktısından ağı koşulları yeniden ayrıştırmadan kur."""
+        if data.get("sürüm") != COMPILED_FORMAT_VERSION:
+            raise ValueError(f"Desteklenmeyen derlenmiş kural biçimi: {data.get('sürüm')!r}")
+
+        names = data["gerçekler"]
+        fact_ids = [SYMBOLS.intern(name) for name in names]
+        bits = [1 << fact_id for fact_id in fact_ids]
+
+        def mask(local_ids: List[int]) -> int:
+            result = 0
+            for local_id in local_ids:
+                result |= bits[local_id]
+            return result
+
+        # Dizin, kimlikler zaten bilindiğinden _append yerine doğrudan kurulur
+        network = cls()
+        rules = network.rules
+        index = network._index
+        for condition, action, atoms, terms in data["kurallar"]:
+            rule_id = len(rules)
+            if terms is None:
+                rule = Rule(rule_id, condition, action, compile_condition(condition))
+            else:
+                rule = Rule(rule_id, condition, action, None, frozenset([names[local_id] for local_id in atoms]),
+                            tuple([(mask(required), mask(forbidden)) for required, forbidden in terms]))
+            rules.append(rule)
+            network._by_text[(condition, action)] = rule
+            for local_id in atoms:
+                index.setdefault(fact_ids[local_id], []).append(rule_id)
+
+        order = data.get("sıra")
+        if order is not None and len(order) == len(network.rules):
+            network._order = tuple(order)
+        return network
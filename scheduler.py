@@ -0,0 +1,306 @@
+"""
+Zamanlayıcı: zaman dilimi gerçekleri, kullanıcı tanımlı zaman pencereleri
+ve cron benzeri tetikleyiciler.
+
+İşler bir min-yığında (heap) bir sonraki çalışma zamanlarına göre tutulur;
+``run_pending`` yalnızca zamanı gelmiş işleri çalıştırır, zamanı gelmiş iş
+yoksa maliyeti yığının tepesine bakmaktan ibarettir. Saat (clock)
+enjekte edilebilir; ManualClock ile testler gerçek zamanı beklemeden,
+belirlenimci olarak yürütülür.
+"""
+
+import asyncio
+import datetime
+import heapq
+import itertools
+import threading
+import time
+from typing import Any, Callable, FrozenSet, Iterable, List, Optional, Tuple
+
+Clock = Callable[[], float]
+
+MINUTES_PER_DAY = 24 * 60
+
+# Günün zaman dilimleri: (gerçek, başlangıç dakikası, bitiş dakikası); gece yarısını aşabilir
+TIME_BUCKETS: Tuple[Tuple[str, int, int], ...] = (
+    ("zaman_sabah", 5 * 60, 12 * 60),
+    ("zaman_öğle", 12 * 60, 17 * 60),
+    ("zaman_akşam", 17 * 60, 22 * 60),
+    ("zaman_gece", 22 * 60, 5 * 60),
+)
+
+
+class ManualClock:
+    """Elle ilerletilen saat (testler ve yeniden oynatma için)."""
+
+    def __init__(self, start: float = 0.0):
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+    def set(self, timestamp: float):
+        self.now = timestamp
+
+
+def parse_time_of_day(value) -> int:
+    """"SS:DD" metnini ya da dakika sayısını gün içindeki dakikaya çevir."""
+    if isinstance(value, int):
+        return value % MINUTES_PER_DAY
+    hour, _, minute = value.partition(":")
+    return (int(hour) * 60 + int(minute or 0)) % MINUTES_PER_DAY
+
+
+def minute_of_day(timestamp: float) -> Tuple[int, int]:
+    """Yerel saate göre (gün içindeki dakika, haftanın günü; Pazartesi = 0)."""
+    moment = datetime.datetime.fromtimestamp(timestamp)
+    return moment.hour * 60 + moment.minute, moment.weekday()
+
+
+def next_time_of_day(timestamp: float, minutes: Iterable[int]) -> float:
+    """timestamp'ten sonraki, gün içi dakikası minutes'tan biri olan ilk anı döndür."""
+    moment = datetime.datetime.fromtimestamp(timestamp)
+    midnight = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    best = None
+    for day in (0, 1):
+        for minute in minutes:
+            candidate = (midnight + datetime.timedelta(days=day, minutes=minute)).timestamp()
+            if candidate > timestamp and (best is None or candidate < best):
+                best = candidate
+    return best
+
+
+class TimeWindow:
+    """
+    Gün içindeki bir zaman aralığı; isteğe bağlı olarak haftanın belirli
+    günleriyle sınırlıdır. Gece yarısını aşan pencerelerde gün, pencerenin
+    başladığı gündür. Başlangıcı bitişine eşit pencere tüm günü kapsar (gün
+    başlangıç saatinde değişir).
+    """
+
+    __slots__ = ("fact", "start", "end", "days")
+
+    def __init__(self, fact: str, start, end, days: Optional[Iterable[int]] = None):
+        self.fact = fact
+        self.start = parse_time_of_day(start)
+        self.end = parse_time_of_day(end)
+        self.days: Optional[FrozenSet[int]] = frozenset(days) if days is not None else None
+
+    def contains(self, timestamp: float) -> bool:
+        minute, weekday = minute_of_day(timestamp)
+        if self.start < self.end:
+            inside = self.start <= minute < self.end
+        else:
+            inside = minute >= self.start or minute < self.end
+            if inside and minute < self.end:
+                weekday = (weekday - 1) % 7
+        return inside and (self.days is None or weekday in self.days)
+
+    def next_boundary(self, timestamp: float) -> float:
+        return next_time_of_day(timestamp, (self.start, self.end))
+
+
+def _parse_cron_field(field: str, low: int, high: int) -> FrozenSet[int]:
+    values = set()
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start_text, end_text = part.split("-", 1)
+            start, end = int(start_text), int(end_text)
+        else:
+            start = end = int(part)
+            if step != 1:
+                end = high
+        if start < low or end > high or start > end or step < 1:
+            raise ValueError(f"Geçersiz cron alanı: {field}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class CronSpec:
+    """
+    Beş alanlı cron ifadesi: ``dakika saat ay_günü ay haftanın_günü``.
+    ``*``, listeler (``1,15``), aralıklar (``1-5``) ve adımlar (``*/15``)
+    desteklenir. Haftanın günü 0 (ya da 7) = Pazar.
+    """
+
+    # İleride aranacak en fazla gün (ör. 29 Şubat için birkaç yıl)
+    MAX_SEARCH_DAYS = 366 * 8
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron ifadesi beş alanlı olmalıdır: {expression}")
+        self.expression = expression
+        self.minutes = sorted(_parse_cron_field(fields[0], 0, 59))
+        self.hours = sorted(_parse_cron_field(fields[1], 0, 23))
+        self.days_of_month = _parse_cron_field(fields[2], 1, 31)
+        self.months = _parse_cron_field(fields[3], 1, 12)
+        self.days_of_week = frozenset(day % 7 for day in _parse_cron_field(fields[4], 0, 7))
+        # Standart cron: iki gün alanı da kısıtlıysa herhangi birinin tutması yeterlidir.
+        # Vixie cron'daki gibi '*' ile başlayan alanlar (örn. '*/2') kısıtlı sayılmaz
+        self._dom_restricted = not fields[2].startswith("*")
+        self._dow_restricted = not fields[4].startswith("*")
+
+    def _day_matches(self, day: datetime.datetime) -> bool:
+        if day.month not in self.months:
+            return False
+        dom = day.day in self.days_of_month
+        dow = (day.weekday() + 1) % 7 in self.days_of_week
+        if self._dom_restricted and self._dow_restricted:
+            return dom or dow
+        return dom and dow
+
+    def next_after(self, timestamp: float) -> Optional[float]:
+        """timestamp'ten sonraki ilk eşleşen dakikanın zaman damgası."""
+        moment = datetime.datetime.fromtimestamp(timestamp)
+        midnight = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+        for offset in range(self.MAX_SEARCH_DAYS):
+            day = midnight + datetime.timedelta(days=offset)
+            if not self._day_matches(day):
+                continue
+            for hour in self.hours:
+                for minute in self.minutes:
+                    candidate = day.replace(hour=hour, minute=minute).timestamp()
+                    if candidate > timestamp:
+                        return candidate
+        return None
+
+
+class Job:
+    """
+    Zamanlanmış iş. next_due verilirse iş her çalıştıktan sonra yeniden
+    zamanlanır. owner, işin değiştirdiği nesnedir (örn. ajan); paylaşılan
+    zamanlayıcıyı çalıştıran taraf meşgul sahiplerin işlerini erteleyebilir.
+    """
+
+    __slots__ = ("due", "callback", "next_due", "name", "owner", "cancelled")
+
+    def __init__(self, due: float, callback: Callable[[float], None],
+                 next_due: Optional[Callable[[float], Optional[float]]] = None, name: str = "",
+                 owner: Any = None):
+        self.due = due
+        self.callback = callback
+        self.next_due = next_due
+        self.name = name
+        self.owner = owner
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def __repr__(self):
+        return f"Job({self.name!r}, due={self.due})"
+
+
+class Scheduler:
+    """
+    Yığın tabanlı zamanlayıcı. Birden fazla ajan aynı zamanlayıcıyı
+    paylaşabilir; işler sınır anlarında çalışır, aradaki komutlarda
+    ``run_pending`` yalnızca yığının tepesine bakar.
+    """
+
+    def __init__(self, clock: Clock = time.time):
+        self.clock = clock
+        self._heap: List[Tuple[float, int, Job]] = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def _push(self, job: Job):
+        with self._lock:
+            heapq.heappush(self._heap, (job.due, next(self._counter), job))
+
+    def schedule_at(self, due: float, callback: Callable[[float], None], name: str = "", owner: Any = None) -> Job:
+        """callback'i due anında bir kez çalıştır."""
+        job = Job(due, callback, name=name, owner=owner)
+        self._push(job)
+        return job
+
+    def schedule_recurring(self, next_due: Callable[[float], Optional[float]],
+                           callback: Callable[[float], None], name: str = "", owner: Any = None) -> Optional[Job]:
+        """callback'i next_due(önceki an) ile belirlenen anlarda tekrar tekrar çalıştır."""
+        due = next_due(self.clock())
+        if due is None:
+            return None
+        job = Job(due, callback, next_due, name, owner)
+        self._push(job)
+        return job
+
+    def every(self, interval: float, callback: Callable[[float], None], name: str = "", owner: Any = None) -> Job:
+        """callback'i interval saniyede bir çalıştır."""
+        return self.schedule_recurring(lambda timestamp: timestamp + interval, callback, name, owner)
+
+    def cron(self, expression: str, callback: Callable[[float], None], name: str = "",
+             owner: Any = None) -> Optional[Job]:
+        """callback'i cron ifadesine uyan her dakikada çalıştır."""
+        return self.schedule_recurring(CronSpec(expression).next_after, callback, name or expression, owner)
+
+    def next_due(self) -> Optional[float]:
+        """Sıradaki işin zamanı; iş yoksa None."""
+        with self._lock:
+            while self._heap and self._heap[0][2].cancelled:
+                heapq.heappop(self._heap)
+            return self._heap[0][0] if self._heap else None
+
+    def run_pending(self, defer: Optional[Callable[[Job], bool]] = None) -> int:
+        """
+        Zamanı gelmiş işleri zaman sırasıyla çalıştır; çalıştırılan iş sayısını
+        döndür. defer(job) doğru dönen işler çalıştırılmaz, zamanı gelmiş
+        olarak yığında kalır.
+        """
+        now = self.clock()
+        ran = 0
+        deferred: List[Job] = []
+        try:
+            while True:
+                with self._lock:
+                    if not self._heap or self._heap[0][0] > now:
+                        return ran
+                    due, _, job = heapq.heappop(self._heap)
+                if job.cancelled:
+                    continue
+                if defer is not None and defer(job):
+                    deferred.append(job)
+                    continue
+                self._run(job, due)
+                ran += 1
+        finally:
+            for job in deferred:
+                self._push(job)
+
+    def _run(self, job: Job, due: float):
+        job.callback(due)
+        if job.next_due is not None and not job.cancelled:
+            next_due = job.next_due(due)
+            if next_due is not None:
+                job.due = max(next_due, due + 1e-6)
+                self._push(job)
+
+    async def run(self, stop: Optional[asyncio.Event] = None, max_sleep: float = 60.0,
+                  defer: Optional[Callable[[Job], bool]] = None, retry_delay: float = 0.01):
+        """
+        İşleri zamanında çalıştıran asyncio döngüsü; stop kurulunca durur.
+        defer ile ertelenen işler retry_delay saniye sonra yeniden denenir.
+        """
+        while stop is None or not stop.is_set():
+            self.run_pending(defer)
+            next_due = self.next_due()
+            delay = max_sleep if next_due is None else min(max_sleep, max(retry_delay, next_due - self.clock()))
+            if stop is None:
+                await asyncio.sleep(delay)
+            else:
+                try:
+                    await asyncio.wait_for(stop.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
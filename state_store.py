@@ -0,0 +1,310 @@
+"""
+LogicAgent durumu için kalıcı, çökmeye dayanıklı depo.
+
+Durum iki parçada tutulur:
+
+- Yalnızca sona eklenen bir günlük (``journal.jsonl``): her satır sıra
+  numaralı bir değişiklik kaydıdır (gerçek ekleme/kaldırma, kural, cihaz,
+  sıcaklık, alışkanlık gözlemi). Kayıtlar önce bellekte biriktirilir ve belirli
+  sayıda kayıtta ya da sürede bir ``fsync`` ile diske yazılır.
+- SQLite anlık görüntüsü (``snapshot.db``): doğrudan söylenmiş gerçekler,
+  ajana özel kurallar, cihaz durumları, sıcaklıklar ve alışkanlıklar tek
+  bir satırda, hangi günlük kaydına kadar içerdiğini belirten sıra
+  numarasıyla saklanır. Anlık görüntü alındıktan sonra günlük kısaltılır.
+
+Açılışta en son anlık görüntü yüklenir ve günlüğün yalnızca ondan sonraki
+kayıtları yeniden oynatılır; böylece açılış süresi geçmiş büyüdükçe artmaz.
+Anlık görüntü yazıldıktan sonra ama günlük kısaltılmadan çökülürse eski
+kayıtlar sıra numaralarına göre atlanır; yarım yazılmış son satır yok sayılır.
+Çıkarılan gerçekler saklanmaz, kurallardan yeniden hesaplanır.
+"""
+
+import json
+import os
+import sqlite3
+import time
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from app import default_rule_base
+from events import DeviceChanged, FactAsserted, FactRetracted, PatternsUpdated, RuleAdded, TemperatureChanged
+from pattern_learner import PatternLearner
+from rule_engine import SYMBOLS
+
+JOURNAL_FILE = "journal.jsonl"
+SNAPSHOT_FILE = "snapshot.db"
+
+# Günlük kayıt türleri
+OP_FACT_ADD = "gerçek_ekle"
+OP_FACT_REMOVE = "gerçek_kaldır"
+OP_RULE = "kural"
+OP_DEVICE = "cihaz"
+OP_TEMPERATURE = "sıcaklık"
+OP_PATTERNS = "desen"
+
+
+def default_base_rules() -> FrozenSet[Tuple[str, str]]:
+    """Paylaşılan varsayılan kural tabanının (koşul, eylem) çiftleri."""
+    return frozenset((rule.condition, rule.action) for rule in default_rule_base().rules)
+
+
+def capture_state(agent, base_rules: FrozenSet[Tuple[str, str]]) -> Dict:
+    """Ajanın kalıcı durumunu JSON'a uygun bir sözlük olarak döndür."""
+    # Yalnızca ortak tabanda olmayan kurallar saklanır
+    rules = [[condition, action] for condition, action in agent.rules
+             if (condition, action) not in base_rules]
+    return {
+        "gerçekler": SYMBOLS.names(agent._asserted),
+        "kurallar": rules,
+        "cihazlar": dict(agent.devices.items()),
+        "sıcaklıklar": dict(agent.device_temps),
+        "desenler": agent.patterns.to_dict(),
+    }
+
+
+def _restore_rule(agent, condition: str, action: str):
+    # Ajanda zaten aynı olan kural eklenmez; paylaşılan taban gereksiz yere kopyalanmaz
+    if not agent.has_rule(condition, action):
+        agent.tell_rule(f"{condition} -> {action}")
+
+
+def apply_state(agent, state: Dict):
+    """capture_state çıktısını ajana uygula (toplu işlem içinde çağrılmalıdır)."""
+    for condition, action in state.get("kurallar", ()):
+        _restore_rule(agent, condition, action)
+    for device, is_on in state.get("cihazlar", {}).items():
+        agent.devices[device] = is_on
+    agent.device_temps.update(state.get("sıcaklıklar", {}))
+    if state.get("desenler") is not None:
+        agent.patterns = PatternLearner.from_dict(state["desenler"])
+
+    facts = set(state.get("gerçekler", ()))
+    agent.retract_facts([fact for fact in SYMBOLS.names(agent._asserted) if fact not in facts])
+    agent.tell_facts(sorted(facts))
+
+
+def apply_record(agent, record: Dict):
+    """Tek bir günlük kaydını ajana uygula."""
+    op = record["op"]
+    if op == OP_FACT_ADD:
+        agent.tell_fact(record["gerçek"])
+    elif op == OP_FACT_REMOVE:
+        agent.retract_fact(record["gerçek"])
+    elif op == OP_RULE:
+        _restore_rule(agent, record["koşul"], record["eylem"])
+    elif op == OP_DEVICE:
+        # Cihaz durumu belleğe geri yüklenir; sürücüye komut gönderilmez
+        agent.devices[record["cihaz"]] = record["durum"]
+    elif op == OP_TEMPERATURE:
+        agent.device_temps[record["cihaz"]] = record["sıcaklık"]
+    elif op == OP_PATTERNS:
+        agent.patterns.observe(record["gerçekler"], record["cihazlar"], record["zaman"], record.get("sıcaklık"))
+
+
+class StateStore:
+    """
+    Tek bir ev için günlük + anlık görüntü deposu.
+
+    ``attach(agent)`` ajanın olay veriyoluna abone olur ve değişiklikleri
+    günlüğe yazar; ``snapshot_every`` kayıtta bir anlık görüntü alınır.
+    ``restore(agent)`` ajanı diskteki duruma getirir.
+    """
+
+    def __init__(self, directory: str, sync_every: int = 64, sync_interval: float = 1.0,
+                 snapshot_every: int = 1000, base_rules: Optional[FrozenSet[Tuple[str, str]]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        sync_every kayıtta ya da sync_interval saniyede bir günlük fsync ile
+        diske yazılır. snapshot_every 0 ise anlık görüntü yalnızca elle
+        (snapshot()) alınır. base_rules ortak kural tabanıdır; bu kurallar
+        anlık görüntüye yazılmaz.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.snapshot_every = snapshot_every
+        self.base_rules = base_rules if base_rules is not None else default_base_rules()
+        self._clock = clock
+
+        self._db = sqlite3.connect(os.path.join(directory, SNAPSHOT_FILE))
+        self._db.execute("PRAGMA synchronous=FULL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS snapshot (id INTEGER PRIMARY KEY, seq INTEGER, state TEXT)")
+        self._db.commit()
+
+        self._journal_path = os.path.join(directory, JOURNAL_FILE)
+        snapshot_seq, _ = self._read_snapshot()
+        records, valid_size = self._scan_journal(snapshot_seq)
+        if os.path.exists(self._journal_path) and os.path.getsize(self._journal_path) > valid_size:
+            # Yarım kalmış son satırı at; yeni kayıtlar geçerli son satırın ardına eklensin
+            os.truncate(self._journal_path, valid_size)
+        self._seq = records[-1]["seq"] if records else snapshot_seq
+        self._since_snapshot = len(records)
+        self._journal = open(self._journal_path, "a", encoding="utf-8")
+        self._buffer: List[str] = []
+        self._last_sync = clock()
+        self._agent = None
+        self._bus = None
+
+        # Yazma büyütmesi (write amplification) ölçümü için sayaçlar
+        self.record_bytes = 0
+        self.journal_bytes_written = 0
+        self.snapshot_bytes_written = 0
+        self.syncs = 0
+        self.snapshots = 0
+
+    # Günlük
+
+    def append(self, op: str, **fields):
+        """Günlüğe bir kayıt ekle; gerekirse diske yaz ve anlık görüntü al."""
+        self._seq += 1
+        record = {"seq": self._seq, "op": op}
+        record.update(fields)
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+        self._buffer.append(line)
+        self.record_bytes += len(line.encode("utf-8"))
+        self._since_snapshot += 1
+
+        if len(self._buffer) >= self.sync_every or self._clock() - self._last_sync >= self.sync_interval:
+            self.sync()
+        if self.snapshot_every and self._since_snapshot >= self.snapshot_every and self._agent is not None:
+            self.snapshot(self._agent)
+
+    def sync(self):
+        """Biriken kayıtları günlüğe yaz ve fsync ile kalıcı hale getir."""
+        if self._buffer:
+            data = "".join(self._buffer)
+            self._buffer = []
+            self._journal.write(data)
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+            self.journal_bytes_written += len(data.encode("utf-8"))
+            self.syncs += 1
+        self._last_sync = self._clock()
+
+    def _scan_journal(self, after_seq: int) -> Tuple[List[Dict], int]:
+        """
+        Sıra numarası after_seq'ten büyük kayıtları ve günlüğün geçerli
+        kısmının bayt uzunluğunu döndür. Bozuk ilk satırda okuma durur.
+        """
+        records = []
+        valid_size = 0
+        if not os.path.exists(self._journal_path):
+            return records, valid_size
+        with open(self._journal_path, "rb") as journal:
+            for line in journal:
+                if not line.endswith(b"\n"):
+                    # Çökme sırasında yarım kalmış satır
+                    break
+                try:
+                    record = json.loads(line.decode("utf-8"))
+                except ValueError:
+                    break
+                valid_size += len(line)
+                if record["seq"] > after_seq:
+                    records.append(record)
+        return records, valid_size
+
+    # Anlık görüntü
+
+    def snapshot(self, agent):
+        """Ajanın durumunu anlık görüntüye yaz ve günlüğü kısalt."""
+        self.sync()
+        state = json.dumps(capture_state(agent, self.base_rules), ensure_ascii=False, separators=(",", ":"))
+        with self._db:
+            self._db.execute("INSERT OR REPLACE INTO snapshot (id, seq, state) VALUES (1, ?, ?)", (self._seq, state))
+        self.snapshot_bytes_written += len(state.encode("utf-8"))
+        self.snapshots += 1
+
+        # Anlık görüntü kalıcı; önceki kayıtlar artık gerekmez
+        self._journal.truncate(0)
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self._since_snapshot = 0
+
+    def _read_snapshot(self) -> Tuple[int, Optional[Dict]]:
+        row = self._db.execute("SELECT seq, state FROM snapshot WHERE id = 1").fetchone()
+        if row is None:
+            return 0, None
+        return row[0], json.loads(row[1])
+
+    # Ajan bağlantısı
+
+    def restore(self, agent) -> int:
+        """
+        Ajanı anlık görüntü ve günlük kuyruğundan geri yükle; oynatılan kayıt
+        sayısını döndür. Geri yükleme sırasında cihaz sürücülerine komut
+        gönderilmez.
+        """
+        self.sync()
+        snapshot_seq, state = self._read_snapshot()
+        records, _ = self._scan_journal(snapshot_seq)
+
+        # Kurallar kayıttaki gerçeklerle yeniden tetiklenmez; tetiklendiklerinde yol açtıkları
+        # cihaz durumları kayıtta zaten vardır ve sonradan değiştirilmiş olabilir
+        dispatcher, agent.dispatcher = agent.dispatcher, None
+        try:
+            with agent.replaying():
+                if state is not None:
+                    apply_state(agent, state)
+                for record in records:
+                    apply_record(agent, record)
+        finally:
+            agent.dispatcher = dispatcher
+
+        # Anlık görüntüdeki zaman dilimi eski olabilir; canlı ajanda da dilim her zaman günceldir.
+        # Alışkanlık gerçekleri canlı ajandaki gibi yalnızca saat başı işinde yenilenir
+        agent.update_time_facts()
+        return len(records)
+
+    def attach(self, agent):
+        """Ajanın değişikliklerini günlüğe yazmaya başla."""
+        self.detach()
+        self._agent = agent
+        self._bus = agent.events
+        self._bus.subscribe(self._on_event)
+
+    def detach(self):
+        """Günlüğe yazmayı durdur."""
+        if self._bus is not None:
+            self._bus.unsubscribe(self._on_event)
+        self._agent = None
+        self._bus = None
+
+    def _on_event(self, event):
+        # Paylaşılan veriyolunda diğer evlerin olayları da gelir
+        if event.source is not self._agent:
+            return
+        if isinstance(event, FactAsserted):
+            if not event.derived:
+                self.append(OP_FACT_ADD, gerçek=event.fact)
+        elif isinstance(event, FactRetracted):
+            if not event.derived:
+                self.append(OP_FACT_REMOVE, gerçek=event.fact)
+        elif isinstance(event, RuleAdded):
+            self.append(OP_RULE, koşul=event.condition, eylem=event.action)
+        elif isinstance(event, DeviceChanged):
+            self.append(OP_DEVICE, cihaz=event.device, durum=event.state)
+        elif isinstance(event, TemperatureChanged):
+            self.append(OP_TEMPERATURE, cihaz=event.device, sıcaklık=event.temperature)
+        elif isinstance(event, PatternsUpdated):
+            self.append(OP_PATTERNS, gerçekler=event.facts, cihazlar=event.devices, zaman=event.timestamp,
+                        sıcaklık=event.temperature)
+
+    def stats(self) -> Dict[str, float]:
+        """Yazılan bayt sayıları ve yazma büyütmesi oranı."""
+        written = self.journal_bytes_written + self.snapshot_bytes_written
+        return {
+            "kayıt_baytı": self.record_bytes,
+            "günlük_baytı": self.journal_bytes_written,
+            "anlık_görüntü_baytı": self.snapshot_bytes_written,
+            "fsync_sayısı": self.syncs,
+            "anlık_görüntü_sayısı": self.snapshots,
+            "yazma_büyütmesi": written / self.record_bytes if self.record_bytes else 0.0,
+        }
+
+    def close(self):
+        """Biriken kayıtları yaz ve dosyaları kapat."""
+        self.detach()
+        self.sync()
+        self._journal.close()
+        self._db.close()